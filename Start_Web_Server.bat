@@ -7,13 +7,13 @@ echo ===================================================
 echo   SDA - WEB MODE STARTUP
 echo ===================================================
 echo.
-echo [1/3] Launching Auth API Server (Port 5000)...
+echo [1/3] Launching Camera Service...
 cd backend
-start "SDA Auth API" cmd /k "python api_server.py"
-timeout /t 3 /nobreak > nul
+start "SDA Camera" cmd /k "python camera_service.py"
+timeout /t 2 /nobreak > nul
 
-echo [2/3] Launching AI Core Server (Port 5002)...
-start "SDA AI Core" cmd /k "python web_main.py"
+echo [2/3] Launching SDA Server (Port 5000)...
+start "SDA Server" cmd /k "python server.py"
 timeout /t 3 /nobreak > nul
 
 echo [3/3] Launching React Frontend...
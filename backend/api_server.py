@@ -1,42 +1,56 @@
 """
-Flask REST API Server for Smart Driver Assistant
+REST API for Smart Driver Assistant ("auth" blueprint, served by server.py)
 Auth endpoints + simple state endpoints.
 No direct camera access via cv2.imshow — zero UI dependencies at startup.
 """
 from modules.db_mysql import validate_login, save_driver_to_db, update_driver_contacts
-from flask import Flask, request, jsonify, Response
-from flask_cors import CORS
+from quart import Blueprint, request, jsonify, Response
+from quart.utils import run_sync
+import asyncio
 import cv2
 import sys, os, uuid, threading, time
 import json
 import re
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from modules.db_mysql import validate_login, save_driver_to_db
+from modules.db_mysql import authenticate, save_driver_to_db, get_pool_stats, get_profile_cache_stats, get_sync_status
 from modules.face_login import recognize_driver
+from modules.face_enrollment import enroll_async, ENROLL_FRAMES
+from modules.camera_broker import open_camera
+from modules.event_stream import stream_changes, sse_response, conditional_json
+from modules.state_store import StateStore
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint("auth", __name__)
 
 # ── Face session stores ────────────────────────────────────────────────
-face_scan_sessions         = {}
+face_scan_sessions         = StateStore({})  # session_id -> session dict; changes wake /api/auth/face/events
 face_registration_sessions = {}
 
+
+def _update_scan(session_id, **fields):
+    face_scan_sessions.update(lambda sessions: {session_id: {**sessions[session_id], **fields}}
+                              if session_id in sessions else None)
+
+
+def _expire_scans(max_age=60):
+    now = time.time()
+    face_scan_sessions.remove(*[k for k, v in face_scan_sessions.snapshot().items() if now - v.get("timestamp", 0) > max_age])
+
 # ── Global State (Driven by background AI thread) ───────────────────────
 _camera_lock    = threading.Lock()
 _latest_frame   = None
-_state_lock = threading.Lock()
-_sys_state = {
+_sys_state = StateStore({
     "head_pose": "forward", 
     "drowsy": False,
     "phoneDetected": False,
     "audioAlert": False,
-    "ear": 0.31,
+    "ear": None,      # measured eye aspect ratio, None when no face
     "alertLevel": "SAFE", # SAFE, WARNING, CRITICAL, EMERGENCY
     "message": "System Online",
     "active": False, 
     "error": None
-}
+})
+_set_sys_state = _sys_state.set  # bumps the version (ETag) only when a value actually changes
 
 
 def _backend_camera_worker():
@@ -52,7 +66,7 @@ def _backend_camera_worker():
     modules_available = True
     try:
         from modules.head_pose import detect_head_pose
-        from modules.drowsiness_detection import detect_drowsiness
+        from modules.drowsiness_detection import detect_drowsiness, get_last_signals
         from modules.phone_detection import detect_phone
     except Exception as e:
         print(f"\u26a0\ufe0f  AI models unavailable: {e}")
@@ -64,25 +78,15 @@ def _backend_camera_worker():
     while True:
         cap = None
         try:
-            # 1. Try to open camera
-            cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-            if not cap or not cap.isOpened():
-                cap = cv2.VideoCapture(0)
+            # 1. Subscribe to the shared camera
+            cap = open_camera()
             
-            if not cap or not cap.isOpened():
-                with _state_lock:
-                    _sys_state["active"] = False
-                    _sys_state["error"]  = "Hardware device not found"
+            if not cap.isOpened():
+                _set_sys_state(active=False, error="Hardware device not found")
                 time.sleep(5)  # Wait before retry
                 continue
 
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            cap.set(cv2.CAP_PROP_FPS, 30)
-
-            with _state_lock:
-                _sys_state["active"] = True
-                _sys_state["error"]  = None
+            _set_sys_state(active=True, error=None)
             
             print("\u2705 AI Camera Connection Established (Headless Mode)")
 
@@ -112,7 +116,7 @@ def _backend_camera_worker():
                 direction = "forward"
                 drowsy_flag = False
                 phone_flag = False
-                current_ear = 0.31
+                current_ear = None
                 alert_level = "SAFE"
 
                 if modules_available:
@@ -121,16 +125,14 @@ def _backend_camera_worker():
                         _, level = detect_head_pose(frame)
                         direction = direction_map.get(level, "forward")
                         
-                        # 2. Drowsiness (Assuming detect_drowsiness returns frame, level)
-                        # We will simulate the exact EAR value for UI purposes if the module doesn't return it
-                        # For now, rely on level (0=safe, 1=warning, 2=drowsy, 3=critical)
+                        # 2. Drowsiness (level 0=safe, 1=warning, 2=drowsy) + the measured EAR
                         _, d_level = detect_drowsiness(frame)
+                        ear = get_last_signals()["ear"]
+                        current_ear = round(ear, 3) if ear is not None else None
                         if d_level >= 2:
                             drowsy_flag = True
-                            current_ear = 0.18
                             alert_level = "CRITICAL"
                         elif d_level == 1:
-                            current_ear = 0.25
                             alert_level = "WARNING"
                         
                         # 3. Phone Detection
@@ -147,12 +149,8 @@ def _backend_camera_worker():
                         pass # Ignore individual frame AI errors
                 
                 # Update global state dictionary securely
-                with _state_lock:
-                    _sys_state["head_pose"] = direction
-                    _sys_state["drowsy"] = drowsy_flag
-                    _sys_state["phoneDetected"] = phone_flag
-                    _sys_state["ear"] = current_ear
-                    _sys_state["alertLevel"] = alert_level
+                _set_sys_state(head_pose=direction, drowsy=drowsy_flag, phoneDetected=phone_flag,
+                               ear=current_ear, alertLevel=alert_level)
 
                 # Draw minimal debug info for the MJPEG stream
                 try:
@@ -180,8 +178,7 @@ def _backend_camera_worker():
             if cap:
                 try: cap.release()
                 except Exception: pass
-            with _state_lock:
-                _sys_state["active"] = False
+            _set_sys_state(active=False)
             
             print("\u26a0\ufe0f Camera worker disconnected. Restarting in 5s...")
             time.sleep(5)
@@ -192,10 +189,10 @@ def _backend_camera_worker():
 # ══════════════════════════════════════════════════════════════════════
 # ... (Keeping existing Auth Routes intact) ...
 
-@app.route('/api/auth/register', methods=['POST'])
-def register():
+@bp.route('/api/auth/register', methods=['POST'])
+async def register():
     try:
-        data = request.get_json()
+        data = await request.get_json()
         if not data: return jsonify({"success": False, "error": "Invalid request format"}), 400
 
         # ---> NEW LOGIC: Auto-fill Commercial Driver Contacts <---
@@ -219,7 +216,7 @@ def register():
 
         driver_ref_id = str(uuid.uuid4())
         data.setdefault('trusted_contacts', {})
-        if save_driver_to_db(driver_ref_id, data):
+        if await run_sync(save_driver_to_db)(driver_ref_id, data):
             return jsonify(
                 {"success": True, "message": "Driver registered successfully", "driver_id": driver_ref_id}), 201
         return jsonify({"success": False, "error": "Failed to save driver to database"}), 500
@@ -227,17 +224,17 @@ def register():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/driver/update-contacts', methods=['POST'])
-def update_contacts():
+@bp.route('/api/driver/update-contacts', methods=['POST'])
+async def update_contacts():
     try:
-        data = request.get_json()
+        data = await request.get_json()
         driver_id = data.get('driver_id')  # <--- Changed from driver_name
         trusted_contacts = data.get('trusted_contacts')
 
         if not driver_id or trusted_contacts is None:
             return jsonify({"success": False, "error": "Missing data"}), 400
 
-        if update_driver_contacts(driver_id, trusted_contacts):
+        if await run_sync(update_driver_contacts)(driver_id, trusted_contacts):
             return jsonify({"success": True, "message": "Contacts updated successfully"}), 200
 
         return jsonify({"success": False, "error": "Database update failed"}), 500
@@ -247,82 +244,96 @@ def update_contacts():
 
 def _run_face_scan(session_id):
     try:
-        face_scan_sessions[session_id].update({"status": "scanning", "message": "Scanning for face..."})
+        _update_scan(session_id, status="scanning", message="Scanning for face...")
         profile = recognize_driver()
         if profile:
-            face_scan_sessions[session_id].update({"status": "success", "driver": profile, "message": f"Welcome, {profile.get('name', 'Driver')}!"})
+            _update_scan(session_id, status="success", driver=profile, message=f"Welcome, {profile.get('name', 'Driver')}!")
         else:
-            face_scan_sessions[session_id].update({"status": "failed", "message": "Face not recognized. Please try again."})
+            _update_scan(session_id, status="failed", message="Face not recognized. Please try again.")
     except Exception as e:
-        face_scan_sessions[session_id].update({"status": "error", "message": f"Error: {e}"})
+        _update_scan(session_id, status="error", message=f"Error: {e}")
 
 
-@app.route('/api/auth/face/start', methods=['POST'])
+@bp.route('/api/auth/face/start', methods=['POST'])
 def start_face_scan():
     try:
         # Prevent React double-firing from crashing OpenCV
-        for sid, s in list(face_scan_sessions.items()):
+        for sid, s in face_scan_sessions.snapshot().items():
             if s["status"] in ["initializing", "scanning"]:
                 return jsonify({"success": True, "session_id": sid, "message": "Scan already in progress"}), 200
 
         session_id = str(uuid.uuid4())
-        face_scan_sessions[session_id] = {
+        face_scan_sessions.set(**{session_id: {
             "status": "initializing",
             "driver": None,
             "message": "Initializing...",
             "timestamp": time.time()
-        }
+        }})
         threading.Thread(target=_run_face_scan, args=(session_id,), daemon=True).start()
 
         return jsonify({"success": True, "session_id": session_id, "message": "Face scan started"}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/auth/face/status/<session_id>', methods=['GET'])
+@bp.route('/api/auth/face/status/<session_id>', methods=['GET'])
 def get_face_scan_status(session_id):
     try:
-        now = time.time()
-        for sid in [k for k, v in face_scan_sessions.items() if now - v.get("timestamp", 0) > 60]: del face_scan_sessions[sid]
-        if session_id not in face_scan_sessions: return jsonify({"success": False, "error": "Session not found or expired"}), 404
-        s = face_scan_sessions[session_id]
+        _expire_scans()
+        s = face_scan_sessions.get(session_id)
+        if s is None: return jsonify({"success": False, "error": "Session not found or expired"}), 404
         return jsonify({"success": True, "status": s["status"], "driver": s.get("driver"), "message": s.get("message", "")}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+
+@bp.route('/api/auth/face/events/<session_id>', methods=['GET'])
+async def face_scan_events(session_id):
+    """Push channel for one scan session; closes once the scan has an outcome."""
+    if face_scan_sessions.get(session_id) is None:
+        return jsonify({"success": False, "error": "Session not found or expired"}), 404
+
+    def snapshot():
+        s = face_scan_sessions.get(session_id) or {"status": "error", "message": "Session expired"}
+        return {"status": s["status"], "driver": s.get("driver"), "message": s.get("message", "")}
+
+    return sse_response(stream_changes(snapshot, face_scan_sessions,
+                                       is_finished=lambda state: state["status"] in ("success", "failed", "error")))
+
 def _run_face_registration(session_id, driver_id):
     import cv2
     try:
         face_registration_sessions[session_id].update({"status": "capturing", "message": "Opening camera..."})
-        cap = cv2.VideoCapture(0)
+        cap = open_camera()
         if not cap.isOpened():
             face_registration_sessions[session_id].update({"status": "error", "message": "Could not open camera"})
             return
         face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        save_path = "known_faces"
-        os.makedirs(save_path, exist_ok=True)
-        full_path = os.path.join(save_path, f"{driver_id}.jpg")
         face_registration_sessions[session_id]["message"] = "Position your face in frame..."
-        start, captured = time.time(), False
-        while (time.time() - start) < 10 and not captured:
+        start, frames, last_grab = time.time(), [], 0
+        while (time.time() - start) < 10 and len(frames) < ENROLL_FRAMES:
             ret, frame = cap.read()
             if not ret: continue
+            if time.time() - last_grab < 0.2: continue  # spread the burst over ~1s
             gray  = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             faces = cv2.CascadeClassifier.detectMultiScale(face_cascade, gray, 1.1, 4)
             if len(faces) > 0:
-                face_registration_sessions[session_id].update({"status": "processing", "message": "Face detected! Processing..."})
-                cv2.imwrite(full_path, frame)
-                captured = True
-                time.sleep(1)
+                frames.append(frame)
+                last_grab = time.time()
+                face_registration_sessions[session_id]["message"] = f"Face detected! Capturing ({len(frames)}/{ENROLL_FRAMES})..."
         cap.release()
-        if captured: face_registration_sessions[session_id].update({"status": "success", "message": "Face registered successfully!"})
-        else: face_registration_sessions[session_id].update({"status": "failed", "message": "No face detected."})
+        if not frames:
+            face_registration_sessions[session_id].update({"status": "failed", "message": "No face detected."})
+            return
+        face_registration_sessions[session_id].update({"status": "processing", "message": "Processing face..."})
+        success, message = enroll_async(driver_id, frames).result()
+        face_registration_sessions[session_id].update({"status": "success" if success else "failed", "message": message})
     except Exception as e:
         face_registration_sessions[session_id].update({"status": "error", "message": f"Error: {e}"})
 
-@app.route('/api/face/register', methods=['POST'])
-def start_face_registration():
+@bp.route('/api/face/register', methods=['POST'])
+async def start_face_registration():
     try:
-        data = request.get_json()
+        data = await request.get_json()
         if not data or 'driver_id' not in data: return jsonify({"success": False, "error": "driver_id is required"}), 400
         session_id = str(uuid.uuid4())
         face_registration_sessions[session_id] = {"status": "initializing", "driver_id": data['driver_id'], "message": "Initializing...", "timestamp": time.time()}
@@ -331,7 +342,7 @@ def start_face_registration():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/face/register/status/<session_id>', methods=['GET'])
+@bp.route('/api/face/register/status/<session_id>', methods=['GET'])
 def get_face_registration_status(session_id):
     try:
         now = time.time()
@@ -342,7 +353,7 @@ def get_face_registration_status(session_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/api/face/check-registration/<driver_id>', methods=['GET'])
+@bp.route('/api/face/check-registration/<driver_id>', methods=['GET'])
 def check_face_registration(driver_id):
     try:
         face_path = os.path.join("known_faces", f"{driver_id}.jpg")
@@ -351,7 +362,7 @@ def check_face_registration(driver_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route('/api/auth/guest', methods=['POST'])
+@bp.route('/api/auth/guest', methods=['POST'])
 def guest_login():
     # Default fallback values
     owner_name = "Car Owner"
@@ -389,7 +400,7 @@ def guest_login():
 # ==========================================
 # NEW: CAR OWNER SETUP ROUTES (Feature 3)
 # ==========================================
-@app.route('/api/system/check-owner', methods=['GET'])
+@bp.route('/api/system/check-owner', methods=['GET'])
 def check_owner():
     """Checks if the car has an owner configured yet."""
     exists = os.path.exists("owner_config.json")
@@ -397,23 +408,30 @@ def check_owner():
 
 
 
-@app.route('/api/auth/login', methods=['POST'])
-def login():
+@bp.route('/api/auth/login', methods=['POST'])
+async def login():
     try:
-        data = request.get_json()
+        data = await request.get_json()
         driver_name = data.get('driver_name', '').strip()
         password    = data.get('password', '').strip()
-        profile = validate_login(driver_name, password)
+        profile, status, retry_after = await run_sync(authenticate)(driver_name, password)
         if profile: return jsonify({"success": True, "driver": profile}), 200
+        if status == "throttled":
+            wait = int(retry_after) + 1
+            return jsonify({"success": False, "error": f"Too many failed attempts. Try again in {wait} seconds."}), 429, {"Retry-After": str(wait)}
+        if status == "busy":
+            return jsonify({"success": False, "error": "Server busy, please retry."}), 503, {"Retry-After": "1"}
+        if status == "error":
+            return jsonify({"success": False, "error": "Database unavailable"}), 503
         return jsonify({"success": False, "error": "Invalid driver name or password"}), 401
     except Exception as e:
         return jsonify({"success": False, "error": "Server error occurred"}), 500
 
 
-@app.route('/api/system/setup-owner', methods=['POST'])
-def setup_owner():
+@bp.route('/api/system/setup-owner', methods=['POST'])
+async def setup_owner():
     """Saves the initial car owner configuration with Twilio formatting."""
-    data = request.get_json()
+    data = await request.get_json()
     if not data or not data.get('owner_name') or not data.get('owner_phone'):
         return jsonify({"success": False, "error": "Name and Phone are required."}), 400
 
@@ -451,40 +469,43 @@ def setup_owner():
 # NEW: FULL STATE ENDPOINT FOR REACT TO POLL
 # ══════════════════════════════════════════════════════════════════════
 
-@app.route('/api/sys_state', methods=['GET'])
-def get_sys_state():
-    """React polls this twice a second to update its UI"""
-    with _state_lock:
-        return jsonify(_sys_state), 200
+@bp.route('/api/sys_state', methods=['GET'])
+async def get_sys_state():
+    """React polls this twice a second to update its UI (ETag / ?wait= long-poll supported)"""
+    return await conditional_json(lambda: dict(_sys_state.snapshot()), _sys_state)
 
 
-@app.route('/api/head_pose', methods=['GET'])
-def get_head_pose():
+@bp.route('/api/head_pose', methods=['GET'])
+async def get_head_pose():
     """Legacy compatibility just in case"""
-    with _state_lock:
-        return jsonify({
-            "head_pose": _sys_state["head_pose"],
-            "active":    _sys_state["active"],
-            "error":     _sys_state["error"],
-        }), 200
-
-def _generate_mjpeg():
-    """Reads latest frame from global buffer populated by background worker."""
-    from modules.face_login import latest_scan_frame
+    def build():
+        state = _sys_state.snapshot()
+        return {
+            "head_pose": state["head_pose"],
+            "active":    state["active"],
+            "error":     state["error"],
+        }
+    return await conditional_json(build, _sys_state)
+
+async def _generate_mjpeg():
+    """Streams the face-scan preview frames (only re-encodes when a new frame arrived)."""
+    from modules import face_login
+    last = None
     while True:
-        frame = latest_scan_frame
+        frame = face_login.latest_scan_frame
         
-        if frame is not None:
+        if frame is not None and frame is not last:
+             last = frame
              try:
-                ok, jpeg_buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                ok, jpeg_buf = await run_sync(cv2.imencode)('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
                 if ok:
                     yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg_buf.tobytes() + b'\r\n')
              except Exception:
                 pass
-        time.sleep(0.1)
+        await asyncio.sleep(0.1)
 
-@app.route('/video-feed')
-def video_feed():
+@bp.route('/api/auth/face/video-feed')
+async def video_feed():
     # Only stream if we are doing a face scan
     return Response(_generate_mjpeg(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
@@ -493,20 +514,22 @@ def video_feed():
 # HEALTH
 # ══════════════════════════════════════════════════════════════════════
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
+@bp.route('/api/health', methods=['GET'])
+async def health_check():
     return jsonify({"status": "healthy", "service": "Smart Driver Assistant API"}), 200
 
 
-if __name__ == '__main__':
-    print("=" * 50)
-    print("\U0001f680 Smart Driver Assistant API Server (HEADLESS WEB MODE)")
-    print("=" * 50)
-    print("  GET  /api/sys_state      \u2190 React polls this for all data")
-    print("  GET  /video-feed         \u2190 MJPEG stream")
-    print("=" * 50)
-    
-    # We don't start the background worker here anymore because it conflicts with face login.
-    # The background worker will be started by web_main.py after login.
+@bp.route('/api/system/db-stats', methods=['GET'])
+def db_stats():
+    """Connection pool, profile cache and local-store sync counters."""
+    return jsonify({"success": True, "pool": get_pool_stats(), "profile_cache": get_profile_cache_stats(),
+                    "sync": get_sync_status()}), 200
 
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
\ No newline at end of file
+
+if __name__ == '__main__':
+    # These routes are now one blueprint of the combined server.
+    # The background worker is not started here; web_main.py runs monitoring after login.
+    # Both share the device through modules/camera_broker.py, so there is no hand-off delay.
+    print("\u2139\ufe0f  api_server.py is served by server.py now; starting the combined server...")
+    from server import main
+    main()
\ No newline at end of file
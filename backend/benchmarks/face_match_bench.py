@@ -0,0 +1,84 @@
+"""
+Face match latency vs roster size.
+Compares the old per-frame path (Python list -> compare_faces + face_distance)
+with the vectorized FaceMatcher in exact and approximate (IVF) mode.
+
+Usage (from backend/):
+    python -m benchmarks.face_match_bench --sizes 10 100 2000 10000 --per-driver 3
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modules.face_matcher import FaceMatcher
+
+
+def synthetic_roster(n_drivers, per_driver, rng):
+    """Unit-ish 128-d encodings with a little per-capture noise, like dlib's."""
+    centers = rng.normal(0, 0.09, size=(n_drivers, 128)).astype(np.float32)
+    embeddings = np.repeat(centers, per_driver, axis=0) + rng.normal(0, 0.02, size=(n_drivers * per_driver, 128))
+    ids = np.repeat([f"driver_{i}" for i in range(n_drivers)], per_driver)
+    return centers, embeddings.astype(np.float32), list(ids)
+
+
+def legacy_match(known_encodings, known_ids, query, tolerance=0.5):
+    """What recognize_driver used to do for every detected face."""
+    distances = np.linalg.norm(np.array(known_encodings) - query, axis=1)      # face_distance
+    matches = list(np.linalg.norm(np.array(known_encodings) - query, axis=1) <= tolerance)  # compare_faces
+    best = int(np.argmin(distances))
+    return known_ids[best] if matches[best] else None
+
+
+def time_calls(fn, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            fn(q)
+            samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000.0
+    return np.median(samples), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face matching latency vs roster size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 2000, 10000, 50000])
+    parser.add_argument("--per-driver", type=int, default=3, help="embeddings per driver")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'drivers':>8} {'rows':>8} | {'legacy p50/p99 ms':>18} | {'exact p50/p99 ms':>17} | "
+          f"{'ivf p50/p99 ms':>15} {'ivf recall@1':>12} {'ivf build s':>11}")
+    print("-" * 104)
+
+    for n in args.sizes:
+        centers, embeddings, ids = synthetic_roster(n, args.per_driver, rng)
+        picks = rng.integers(0, n, size=args.queries)
+        queries = (centers[picks] + rng.normal(0, 0.02, size=(args.queries, 128))).astype(np.float32)
+
+        known_list = list(embeddings)  # the old code kept a Python list of arrays
+        legacy = time_calls(lambda q: legacy_match(known_list, ids, q), queries, args.repeat)
+
+        exact = FaceMatcher(embeddings, ids, ann=False)
+        exact_t = time_calls(lambda q: exact.match(q, k=3), queries, args.repeat)
+
+        start = time.perf_counter()
+        ivf = FaceMatcher(embeddings, ids, ann=True)
+        build_s = time.perf_counter() - start
+        ivf_t = time_calls(lambda q: ivf.match(q, k=3), queries, args.repeat)
+
+        hits = 0
+        for q in queries:
+            a, b = exact.match(q, k=1), ivf.match(q, k=1)
+            hits += bool(a and b and a[0]["driver_id"] == b[0]["driver_id"])
+
+        print(f"{n:>8} {len(embeddings):>8} | {legacy[0]:>8.3f} / {legacy[1]:>7.3f} | "
+              f"{exact_t[0]:>7.3f} / {exact_t[1]:>7.3f} | {ivf_t[0]:>6.3f} / {ivf_t[1]:>6.3f} "
+              f"{hits / len(queries):>12.2%} {build_s:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Password login latency vs table size.
+Fills the drivers table with synthetic rows (tagged driver_ref_id 'bench_*'),
+then fires concurrent logins through db_mysql.authenticate() and reports
+p50 / p99 at each size. Needs the MySQL database from .env.
+
+Usage (from backend/):
+    python -m benchmarks.login_load --sizes 1000 10000 100000 --threads 16 --logins 400
+    python -m benchmarks.login_load --cleanup
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modules import db_mysql
+from modules.passwords import hash_password
+
+BENCH_PREFIX = "bench_"
+PASSWORD = "bench-pass"
+
+
+def fill_table(target, current, password_hash):
+    """Adds synthetic drivers until the bench rows reach `target`."""
+    drivers = []
+    for i in range(current, target):
+        drivers.append((f"{BENCH_PREFIX}{i}", {
+            "name": f"Bench Driver {i}",
+            "emergency_contact_name": "Bench Contact",
+            "emergency_contact_number": "whatsapp:+910000000000",
+            "email_receiver": "bench@example.com",
+            "trusted_contacts": {},
+            "driver_type": "Private",
+            "password": password_hash,   # one precomputed hash: only lookup cost matters here
+        }))
+    start = time.time()
+    saved = db_mysql.save_drivers_bulk(drivers, chunk_size=2000)
+    print(f"   inserted {len(saved)} row(s) in {time.time() - start:.1f}s")
+
+
+def run_logins(size, threads, logins, wrong_ratio):
+    names = [f"Bench Driver {random.randrange(size)}" for _ in range(logins)]
+
+    def one(name):
+        password = PASSWORD if random.random() >= wrong_ratio else "wrong"
+        start = time.perf_counter()
+        _, status, _ = db_mysql.authenticate(name, password)
+        return (time.perf_counter() - start) * 1000.0, status
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, names))
+
+    latencies = np.array([r[0] for r in results])
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return np.median(latencies), np.percentile(latencies, 99), statuses
+
+
+def cleanup():
+    with db_mysql._pool.connection() as pooled:
+        if pooled is None:
+            print("❌ No database connection.")
+            return
+        cursor = pooled.conn.cursor()
+        cursor.execute("DELETE FROM drivers WHERE driver_ref_id LIKE %s", (BENCH_PREFIX + "%",))
+        print(f"🧹 Removed {cursor.rowcount} bench row(s).")
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password login latency vs table size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--threads", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--logins", type=int, default=400, help="logins per size")
+    parser.add_argument("--wrong", type=float, default=0.0, help="fraction of logins with a wrong password")
+    parser.add_argument("--cleanup", action="store_true", help="delete the bench rows and exit")
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+
+    # Throttling would turn repeated wrong passwords into instant 429s and skew the numbers
+    db_mysql._throttle.record_failure = lambda account: None
+
+    password_hash = hash_password(PASSWORD)
+    print(f"{'rows':>8} | {'p50 ms':>8} {'p99 ms':>8} | statuses")
+    print("-" * 60)
+    current = 0
+    for size in sorted(args.sizes):
+        fill_table(size, current, password_hash)
+        current = size
+        p50, p99, statuses = run_logins(size, args.threads, args.logins, args.wrong)
+        print(f"{size:>8} | {p50:>8.1f} {p99:>8.1f} | {statuses}")
+
+    print(f"\nPool: {db_mysql.get_pool_stats()}")
+    print("Run with --cleanup to remove the synthetic drivers.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Server thread count and memory with many open stream clients.
+Opens N long-lived connections (MJPEG or SSE) to a running server and samples
+the server process's threads and resident memory (psutil) before and while
+they are connected. Run it against the old Flask servers and against
+server.py to compare.
+
+Usage (from backend/, server already running):
+    python -m benchmarks.server_footprint --pid 1234 --url http://localhost:5000/video-feed --clients 50
+    python -m benchmarks.server_footprint --pid 1234 --url http://localhost:5000/api/dashboard/events
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+
+def sample(process):
+    return process.num_threads(), process.memory_info().rss / (1024 * 1024)
+
+
+def hold_stream(url, stop, connected, errors):
+    try:
+        with requests.get(url, stream=True, timeout=10) as response:
+            connected.append(response.status_code)
+            for _ in response.iter_content(chunk_size=4096):
+                if stop.is_set():
+                    break
+    except requests.RequestException as e:
+        errors.append(str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server threads/memory under open stream clients.")
+    parser.add_argument("--pid", type=int, required=True, help="server process id")
+    parser.add_argument("--url", required=True, help="streaming endpoint to hold open")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--hold", type=float, default=10.0, help="seconds to keep the clients connected")
+    args = parser.parse_args()
+
+    try:
+        import psutil
+    except ImportError:
+        print("❌ This benchmark needs psutil: pip install psutil")
+        return
+    process = psutil.Process(args.pid)
+
+    idle_threads, idle_mb = sample(process)
+    print(f"Idle:      {idle_threads:>4} threads, {idle_mb:7.1f} MB")
+
+    stop, connected, errors = threading.Event(), [], []
+    clients = [threading.Thread(target=hold_stream, args=(args.url, stop, connected, errors), daemon=True)
+               for _ in range(args.clients)]
+    for client in clients:
+        client.start()
+
+    peak_threads, peak_mb = idle_threads, idle_mb
+    deadline = time.time() + args.hold
+    while time.time() < deadline:
+        threads, mb = sample(process)
+        peak_threads, peak_mb = max(peak_threads, threads), max(peak_mb, mb)
+        time.sleep(0.5)
+
+    stop.set()
+    print(f"{args.clients} clients: {peak_threads:>4} threads, {peak_mb:7.1f} MB (peak)")
+    print(f"Per client: {(peak_threads - idle_threads) / args.clients:.2f} threads, "
+          f"{(peak_mb - idle_mb) * 1024 / args.clients:.0f} KB")
+    print(f"Connected: {len(connected)}/{args.clients}, errors: {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
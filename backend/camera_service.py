@@ -0,0 +1,21 @@
+"""
+Standalone Camera Owner
+Keeps the webcam open permanently and publishes frames to every other
+process (api_server.py, web_main.py, register_driver.py) through shared memory.
+Optional: without it, the first process that needs the camera becomes the owner.
+"""
+import time
+
+from modules.camera_broker import CameraBroker
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("📷 SDA Camera Service")
+    print("=" * 50)
+
+    broker = CameraBroker(linger=float("inf"))
+    while True:
+        if not broker.is_running() and not broker.start():
+            time.sleep(5)  # No device yet, retry
+            continue
+        time.sleep(1)
@@ -0,0 +1,72 @@
+"""
+Fleet Ingest Server (Depot Mode)
+Accepts JPEG frames pushed by remote vehicle clients over HTTP, analyzes them
+with the shared detectors and pushes per-vehicle alerts back.
+"""
+import os
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+from dotenv import load_dotenv
+
+from modules.fleet_ingest import FleetIngest
+
+load_dotenv()
+
+app = Flask(__name__)
+CORS(app)
+
+FLEET_PORT = int(os.getenv("FLEET_PORT", "5004"))
+FLEET_WORKERS = int(os.getenv("FLEET_WORKERS", "0")) or None
+
+ingest = FleetIngest(workers=FLEET_WORKERS)
+
+# Hint sent with 429 responses so clients skip frames instead of queueing them
+RETRY_AFTER_MS = 100
+
+
+@app.route('/api/fleet/<vehicle_id>/frame', methods=['POST'])
+def push_frame(vehicle_id):
+    """Body is a single JPEG frame. Pending alerts are returned in the response."""
+    jpeg_bytes = request.get_data()
+    if not jpeg_bytes:
+        return jsonify({"success": False, "error": "Empty frame"}), 400
+
+    accepted, alerts = ingest.submit(vehicle_id, jpeg_bytes)
+    if not accepted:
+        resp = jsonify({"success": False, "error": "Vehicle queue full", "alerts": alerts,
+                        "retry_after_ms": RETRY_AFTER_MS})
+        resp.headers["Retry-After"] = "1"
+        return resp, 429
+
+    return jsonify({"success": True, "alerts": alerts}), 202
+
+
+@app.route('/api/fleet/<vehicle_id>/alerts', methods=['GET'])
+def get_vehicle_alerts(vehicle_id):
+    return jsonify({"success": True, "alerts": ingest.get_alerts(vehicle_id)}), 200
+
+
+@app.route('/api/fleet/<vehicle_id>/status', methods=['GET'])
+def get_vehicle_status(vehicle_id):
+    status = ingest.get_vehicle_status(vehicle_id)
+    if status is None:
+        return jsonify({"success": False, "error": "Unknown vehicle"}), 404
+    return jsonify({"success": True, **status}), 200
+
+
+@app.route('/api/fleet/stats', methods=['GET'])
+def get_fleet_stats():
+    """?fps=<frames per second each vehicle sends> adds vehicles_per_core."""
+    target_fps = request.args.get("fps", type=float)
+    return jsonify({"success": True, **ingest.stats(target_fps)}), 200
+
+
+if __name__ == '__main__':
+    print("=" * 50)
+    print("🚌 SDA Fleet Ingest Server")
+    print("=" * 50)
+    print("  POST /api/fleet/<vehicle_id>/frame   ← JPEG frame")
+    print("  GET  /api/fleet/<vehicle_id>/alerts")
+    print("  GET  /api/fleet/stats?fps=10")
+    print("=" * 50)
+    app.run(host='0.0.0.0', port=FLEET_PORT, debug=False, threaded=True)
@@ -0,0 +1,117 @@
+"""
+Simulated vehicle clients for the fleet ingest server.
+Each vehicle replays a video file, pushes JPEG frames at a fixed rate and
+prints the alerts the server sends back. Ends with a vehicles-per-core report.
+
+Usage:
+    python fleet_simulator.py --vehicles 8 --fps 10 --duration 60 clip1.mp4 clip2.mp4
+"""
+import argparse
+import threading
+import time
+
+import cv2
+import requests
+
+
+def run_vehicle(vehicle_id, video_path, server, fps, duration, counters, lock):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"❌ {vehicle_id}: could not open {video_path}")
+        return
+
+    session = requests.Session()
+    url = f"{server}/api/fleet/{vehicle_id}/frame"
+    interval = 1.0 / fps
+    end = time.time() + duration
+    next_send = time.time()
+
+    sent = accepted = rejected = errors = 0
+
+    while time.time() < end:
+        ret, frame = cap.read()
+        if not ret:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # loop the clip
+            continue
+
+        delay = next_send - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        next_send += interval
+
+        frame = cv2.resize(frame, (640, 480))
+        ok, jpeg_buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        if not ok:
+            continue
+
+        try:
+            r = session.post(url, data=jpeg_buf.tobytes(), headers={"Content-Type": "image/jpeg"}, timeout=5)
+            sent += 1
+            body = r.json()
+            if r.status_code == 429:
+                rejected += 1
+                # Back off: skip frames instead of piling them up
+                next_send += body.get("retry_after_ms", 100) / 1000.0
+            else:
+                accepted += 1
+            for alert in body.get("alerts", []):
+                print(f"🚨 {vehicle_id}: {alert['type']} - {alert['message']}")
+        except Exception:
+            errors += 1
+
+    cap.release()
+    with lock:
+        counters["sent"] += sent
+        counters["accepted"] += accepted
+        counters["rejected"] += rejected
+        counters["errors"] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay video files as simulated fleet vehicles.")
+    parser.add_argument("videos", nargs="+", help="Video files (assigned round-robin to vehicles)")
+    parser.add_argument("--server", default="http://localhost:5004")
+    parser.add_argument("--vehicles", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    args = parser.parse_args()
+
+    counters = {"sent": 0, "accepted": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    print(f"🚌 Starting {args.vehicles} simulated vehicle(s) at {args.fps} fps for {args.duration}s")
+    threads = []
+    for i in range(args.vehicles):
+        video = args.videos[i % len(args.videos)]
+        t = threading.Thread(target=run_vehicle, daemon=True,
+                             args=(f"bus-{i + 1:03d}", video, args.server, args.fps, args.duration, counters, lock))
+        t.start()
+        threads.append(t)
+
+    # Reset the server's measurement window once clients are warmed up, then
+    # sample it again just before they stop.
+    time.sleep(min(5, args.duration / 4))
+    requests.get(f"{args.server}/api/fleet/stats", timeout=5)
+    time.sleep(max(1, args.duration - min(5, args.duration / 4) - 1))
+    stats = requests.get(f"{args.server}/api/fleet/stats", params={"fps": args.fps}, timeout=5).json()
+
+    for t in threads:
+        t.join()
+
+    offered_fps = args.vehicles * args.fps
+    print("\n" + "=" * 50)
+    print("📊 FLEET SIMULATION REPORT")
+    print("=" * 50)
+    print(f"Vehicles:            {args.vehicles} @ {args.fps} fps (offered {offered_fps:.0f} fps)")
+    print(f"Frames sent:         {counters['sent']}")
+    print(f"Accepted / rejected: {counters['accepted']} / {counters['rejected']}  (errors: {counters['errors']})")
+    print(f"Server processed:    {stats.get('processed_fps')} fps")
+    print(f"Server CPU cores:    {stats.get('cpu_cores_used')} of {stats.get('cpu_count')}")
+    print(f"Vehicles per core:   {stats.get('vehicles_per_core')}")
+    sustained = stats.get("processed_fps", 0) >= 0.95 * offered_fps
+    print(f"Sustained:           {'YES' if sustained else 'NO (server is shedding frames)'}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
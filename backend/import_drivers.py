@@ -0,0 +1,249 @@
+"""
+Bulk driver import.
+Registers a whole fleet from a CSV of driver details plus a folder of photos,
+instead of running register_driver.py once per driver. Face embeddings are
+computed in a process pool, profiles are upserted in chunks and the face
+index is written once at the end.
+
+CSV columns (header row required):
+    name, password, driver_type, emergency_contact_name,
+    emergency_contact_number, email_receiver, trusted_contacts, photo, driver_id
+Only name is mandatory. trusted_contacts is "Name=number; Name=number".
+photo defaults to <driver_id>.jpg/.png inside --photos; driver_id defaults
+to the name in lower_snake_case (same as register_driver.py).
+
+Usage (from backend/):
+    python import_drivers.py drivers.csv --photos ./photos --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from modules.db_mysql import save_drivers_bulk
+from modules.face_index import FACES_DIR, get_face_index
+from modules.passwords import hash_password
+
+OWNER_CONFIG_PATH = "owner_config.json"
+MAX_PHOTO_SIDE = 1024        # ID photos are often 4000px; faces don't need that
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+DRIVER_ID_REGEX = r'^[\w.-]+$'  # used as a file name in known_faces/
+
+
+# ---------------- ROW VALIDATION ----------------
+def normalize_phone(raw):
+    """Same rules as register_driver.validate_phone. Returns None if invalid."""
+    clean = re.sub(r'[\s\-\(\)\+]', '', raw.replace("whatsapp:", ""))
+    if clean.startswith("91") and len(clean) == 12:
+        clean = clean[2:]
+    if len(clean) != 10 or not clean.isdigit():
+        return None
+    return f"whatsapp:+91{clean}"
+
+
+def parse_row(row, owner):
+    """Returns (driver_id, data, photo name) or raises ValueError."""
+    name = (row.get("name") or "").strip().title()
+    if not name or any(c.isdigit() for c in name):
+        raise ValueError("invalid name")
+
+    driver_id = (row.get("driver_id") or "").strip() or name.lower().replace(' ', '_')
+    if not re.match(DRIVER_ID_REGEX, driver_id) or ".." in driver_id:
+        raise ValueError(f"invalid driver_id '{driver_id}'")
+    driver_type = (row.get("driver_type") or "Private").strip().title()
+    password = (row.get("password") or "").strip()
+    if len(password) < 4:
+        raise ValueError("password must be at least 4 characters")
+
+    if driver_type == "Commercial" and owner:
+        # Same as the interactive flow: alerts go to the car owner
+        ec_name = owner.get("owner_name", "Car Owner")
+        ec_number = owner.get("owner_phone", "")
+        email = owner.get("owner_email", "")
+    else:
+        ec_name = (row.get("emergency_contact_name") or "").strip().title()
+        ec_number = normalize_phone(row.get("emergency_contact_number") or "")
+        email = (row.get("email_receiver") or "").strip()
+        if not ec_name or not ec_number:
+            raise ValueError("missing or invalid emergency contact")
+        if not re.match(EMAIL_REGEX, email):
+            raise ValueError("invalid email")
+
+    trusted_contacts = {ec_number: ec_name}
+    if driver_type == "Private":
+        for pair in filter(None, (p.strip() for p in (row.get("trusted_contacts") or "").split(";"))):
+            c_name, _, c_number = pair.partition("=")
+            number = normalize_phone(c_number)
+            if not number:
+                raise ValueError(f"invalid trusted contact '{pair}'")
+            trusted_contacts[number] = c_name.strip().title()
+
+    data = {
+        "name": name,
+        "emergency_contact_name": ec_name,
+        "emergency_contact_number": ec_number,
+        "email_receiver": email,
+        "trusted_contacts": trusted_contacts,
+        "driver_type": driver_type,
+        "password": password,
+    }
+    return driver_id, data, (row.get("photo") or "").strip()
+
+
+def find_photo(photos_dir, driver_id, photo):
+    candidates = [photo] if photo else [f"{driver_id}{ext}" for ext in (".jpg", ".jpeg", ".png")]
+    for name in candidates:
+        path = os.path.join(photos_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+# ---------------- ENCODING (worker processes) ----------------
+def _init_worker():
+    cv2.setNumThreads(1)  # one process per core already; avoid oversubscription
+
+
+def encode_photo(job):
+    """
+    Worker: (driver_id, photo path, faces_dir, password) ->
+    (driver_id, encoding list or None, error, password hash).
+    Password hashing is deliberately slow, so it is done here in parallel too.
+    """
+    import face_recognition
+
+    driver_id, path, faces_dir, password = job
+    try:
+        img = cv2.imread(path)
+        if img is None:
+            return driver_id, None, "unreadable image", None
+        scale = MAX_PHOTO_SIDE / max(img.shape[:2])
+        if scale < 1:
+            img = cv2.resize(img, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        locations = face_recognition.face_locations(rgb)
+        if not locations:
+            return driver_id, None, "no face found", None
+        largest = max(locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]))
+        encodings = face_recognition.face_encodings(rgb, [largest])
+        if not encodings:
+            return driver_id, None, "face could not be encoded", None
+
+        cv2.imwrite(os.path.join(faces_dir, f"{driver_id}.jpg"), img)
+        return driver_id, encodings[0].tolist(), None, hash_password(password)
+    except Exception as e:
+        return driver_id, None, str(e), None
+
+
+# ---------------- MAIN ----------------
+def load_rows(csv_path, photos_dir, owner):
+    drivers, jobs, rejected = {}, [], []
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                driver_id, data, photo = parse_row(row, owner)
+            except ValueError as e:
+                rejected.append((line_no, row.get("name", ""), str(e)))
+                continue
+            if driver_id in drivers:
+                rejected.append((line_no, data["name"], f"duplicate driver_id '{driver_id}'"))
+                continue
+            path = find_photo(photos_dir, driver_id, photo)
+            if not path:
+                rejected.append((line_no, data["name"], "photo not found"))
+                continue
+            drivers[driver_id] = data
+            jobs.append((driver_id, path, FACES_DIR, data["password"]))
+    return drivers, jobs, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import drivers from a CSV and a folder of photos.")
+    parser.add_argument("csv", help="CSV file with one driver per row")
+    parser.add_argument("--photos", required=True, help="Folder containing the driver photos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="encoding processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per database batch")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV")
+    args = parser.parse_args()
+
+    owner = None
+    if os.path.exists(OWNER_CONFIG_PATH):
+        with open(OWNER_CONFIG_PATH, "r") as f:
+            owner = json.load(f)
+
+    drivers, jobs, rejected = load_rows(args.csv, args.photos, owner)
+    print(f"📋 {len(jobs)} driver(s) to import, {len(rejected)} row(s) rejected during validation.")
+    if not jobs:
+        return
+
+    # 1. Embeddings, in parallel
+    os.makedirs(FACES_DIR, exist_ok=True)
+    start = time.time()
+    encoded = {}
+    last_report = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        chunksize = max(1, min(16, len(jobs) // (args.workers * 4)))
+        for done, (driver_id, encoding, error, password_hash) in enumerate(pool.map(encode_photo, jobs, chunksize=chunksize), start=1):
+            if encoding is None:
+                rejected.append(("-", drivers[driver_id]["name"], error))
+            else:
+                encoded[driver_id] = encoding
+                drivers[driver_id]["password"] = password_hash
+
+            now = time.time()
+            if now - last_report >= 2 or done == len(jobs):
+                last_report = now
+                rate = done / max(now - start, 1e-6)
+                eta = (len(jobs) - done) / rate
+                print(f"⏳ Encoded {done}/{len(jobs)} ({rate:.1f} photos/s, ETA {eta:.0f}s)")
+    encode_time = time.time() - start
+
+    # 2. Profiles, in chunks
+    start = time.time()
+    saved = save_drivers_bulk([(d, drivers[d]) for d in encoded], chunk_size=args.chunk_size)
+    db_time = time.time() - start
+    for driver_id in set(encoded) - set(saved):
+        # Don't leave a face behind for a profile that was never written
+        rejected.append(("-", drivers[driver_id]["name"], "database error"))
+        try:
+            os.remove(os.path.join(FACES_DIR, f"{driver_id}.jpg"))
+        except OSError:
+            pass
+
+    # 3. Face index, one pass
+    start = time.time()
+    get_face_index(sync=False).add_many([(os.path.join(FACES_DIR, f"{d}.jpg"), d, [encoded[d]]) for d in saved])
+    index_time = time.time() - start
+
+    total = encode_time + db_time + index_time
+    print("\n" + "=" * 50)
+    print("📊 IMPORT REPORT")
+    print("=" * 50)
+    print(f"Imported:   {len(saved)}")
+    print(f"Rejected:   {len(rejected)}")
+    print(f"Encoding:   {encode_time:.1f}s ({len(jobs) / max(encode_time, 1e-6):.1f} photos/s, {args.workers} workers)")
+    print(f"Database:   {db_time:.1f}s")
+    print(f"Face index: {index_time:.1f}s")
+    print(f"Total:      {total:.1f}s ({len(saved) / max(total, 1e-6):.1f} drivers/s)")
+
+    if rejected:
+        for line_no, name, reason in rejected[:10]:
+            print(f"  ❌ line {line_no} {name}: {reason}")
+        if len(rejected) > 10:
+            print(f"  ... and {len(rejected) - 10} more")
+        if args.rejects:
+            with open(args.rejects, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["line", "name", "reason"])
+                writer.writerows(rejected)
+            print(f"Rejected rows written to {args.rejects}")
+
+
+if __name__ == "__main__":
+    main()
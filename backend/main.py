@@ -6,8 +6,9 @@ from dotenv import load_dotenv
 
 # --- IMPORTS ---
 from modules.shared_state import set_current_driver
-from modules.dashboard_data import init_trip, update_status, set_ai_message
-from modules.dashboard_api import start_dashboard_server # <--- IMPORT API SERVER
+from modules.dashboard_data import init_trip, update_status, set_ai_message, batch_updates
+from server import serve_in_background # <--- IMPORT API SERVER
+from modules.camera_broker import open_camera
 
 # ---------------- SYSTEM START FUNCTION ----------------
 def start_monitoring(profile):
@@ -26,32 +27,27 @@ def start_monitoring(profile):
     set_current_driver(profile)
     
     # 3. Initialize Dashboard Data
-    init_trip()
-    set_ai_message(f"Welcome {profile['name']}. System Active.")
-
-    from modules.whatsapp_bot import start_whatsapp_server
-    from modules.drowsiness_detection import detect_drowsiness
-    from modules.head_pose import detect_head_pose
-    from modules.phone_detection import detect_phone
-    from modules.voice_assistant import speak, start_listening_thread, get_latest_command, is_listening, play_local_music, stop_music, check_music_queue
-    from modules.emergency import handle_emergency
+    with batch_updates():
+        init_trip()
+        set_ai_message(f"Welcome {profile['name']}. System Active.")
+
+    from modules.stream_session import StreamSession
+    from modules.telemetry import TelemetryRecorder, FLAG_VOICE_ALERT, FLAG_EMERGENCY
+    from modules.voice_assistant import speak, WARNING, CRITICAL, prewarm_tts, get_tts_stats, start_listening_thread, get_latest_command, is_listening, play_local_music, stop_music, check_music_queue
+    from modules.voice_assistant import PHRASE_EYES_ON_ROAD, PHRASE_TIRED, PHRASE_PHONE, PHRASE_OFFER_SONG, PHRASE_PULL_OVER, PHRASE_NO_RESPONSE
+    from modules.emergency import start_emergency, emergency_active
     from modules.api_services import start_trip_monitoring, stop_trip_monitoring
     # from modules.gaze_tracking import GazeTracker # REMOVED
 
     print("🚗  Your Smart Driver Assistant Started")
+    prewarm_tts()  # alert phrases synthesized while the camera opens
 
-    # Start WhatsApp Bot
-    whatsapp_thread = threading.Thread(target=start_whatsapp_server, daemon=True)
-    whatsapp_thread.start()
-    
-    # Start Dashboard API (Frontend)
-    dashboard_thread = threading.Thread(target=start_dashboard_server, daemon=True)
-    dashboard_thread.start()
-    print("🌐 Dashboard API running on http://localhost:5001")
+    # Start Dashboard API (Frontend) + WhatsApp Bot webhook
+    serve_in_background(parts=("dashboard", "whatsapp"))
+    print("🌐 Dashboard API and WhatsApp webhook running on http://localhost:5000")
 
     # ---------------- CAMERA ----------------
-    cap = cv2.VideoCapture(0)
-    time.sleep(1)
+    cap = open_camera()
 
     # ---------------- GAZE TRACKER REMOVED ----------------
     # gaze_tracker = GazeTracker()
@@ -75,6 +71,10 @@ def start_monitoring(profile):
     waiting_for_music_response = False
     music_prompt_time = 0
 
+    # Detector state for the driver camera (adaptive detection rate)
+    session = StreamSession("driver")
+    recorder = TelemetryRecorder(driver_id=profile.get("id"))
+
     # ---------------- AUTOMATIC START ----------------
     # No questions asked. Just start monitoring.
     print("   - Starting Trip Monitor...")
@@ -95,9 +95,9 @@ def start_monitoring(profile):
         frame = cv2.flip(frame, 1)
 
         # ---------------- MODULE CALLS ----------------
-        frame, drowsy_level = detect_drowsiness(frame)
-        frame, head_pose_level = detect_head_pose(frame)
-        frame, phone_detected = detect_phone(frame)
+        hold_full_rate = head_distraction_start is not None or waiting_for_music_response
+        frame, drowsy_level, head_pose_level, phone_detected = session.process(frame, hold_full_rate)
+        recorder.sample(session)
         # frame, gaze_direction = gaze_tracker.get_gaze_direction(frame) # REMOVED
 
         # ---------------- DASHBOARD UPDATE ----------------
@@ -127,7 +127,7 @@ def start_monitoring(profile):
                 last_interaction_time = now
                 
             elif cmd == "no":
-                speak("Okay. Please pull over if you are tired.")
+                speak(PHRASE_PULL_OVER, WARNING)
                 set_ai_message("Driver refused music. Monitoring closely.")
                 drowsy_warning_count = 0
                 last_drowsy_time = now
@@ -137,16 +137,18 @@ def start_monitoring(profile):
             elif not is_listening() and cmd is None:
                 # Timeout happened (thread finished but no valid command)
                 if now - music_prompt_time > 8:
-                    speak("No response. Calling emergency contact.")
+                    speak(PHRASE_NO_RESPONSE, CRITICAL)
                     set_ai_message("Driver Unresponsive. Triggering Emergency.")
-                    handle_emergency(cap)
+                    recorder.mark(FLAG_EMERGENCY)
+                    start_emergency()  # runs on its own thread
                     waiting_for_music_response = False
                     drowsy_warning_count = 0
                     last_drowsy_time = now
                     last_interaction_time = now
 
         # If we just had an interaction (like asking about music), skip logic for 10 seconds
-        if now - last_interaction_time < 10:
+        # (also while the emergency conversation owns the voice channel)
+        if emergency_active() or now - last_interaction_time < 10:
             cv2.imshow("Smart Driver Assistant", frame)
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
@@ -157,25 +159,27 @@ def start_monitoring(profile):
 
         # ---------------- PHONE LOGIC ----------------
         if phone_detected:
-            speak("Do not use phone while driving.")
+            speak(PHRASE_PHONE, WARNING)
+            recorder.mark(FLAG_VOICE_ALERT)
             set_ai_message("Phone usage detected. Please focus.")
             last_interaction_time = now # Add small delay so it doesn't spam
 
         # ---------------- DROWSINESS LOGIC ----------------
         if drowsy_level >= 2:
             if now - last_drowsy_time > 5:  # cooldown between warnings
-                speak("You seem tired. Stay alert.")
+                speak(PHRASE_TIRED, WARNING)
+                recorder.mark(FLAG_VOICE_ALERT)
                 set_ai_message("Drowsiness detected. Stay alert.")
                 drowsy_warning_count += 1
                 last_drowsy_time = now
 
             if drowsy_warning_count >= 2 and not waiting_for_music_response:
                 # Instead of immediate emergency, offer music first
-                speak("You seem very tired. Would you like me to play a song for you?")
+                prompt = speak(PHRASE_OFFER_SONG, WARNING)
                 set_ai_message("Driver is very tired. Offering music assistance.")
                 
                 # START ASYNC LISTENING
-                start_listening_thread(timeout=5)
+                start_listening_thread(timeout=5, after=prompt)
                 waiting_for_music_response = True
                 music_prompt_time = now
 
@@ -190,13 +194,15 @@ def start_monitoring(profile):
                 head_distraction_start = now
             elif now - head_distraction_start > 4:  # distracted > 4 sec (stricter than 5)
                 if head_warning_count < 2:
-                    speak("Keep your eyes on the road.")
+                    speak(PHRASE_EYES_ON_ROAD, WARNING)
+                    recorder.mark(FLAG_VOICE_ALERT)
                     set_ai_message("Distraction detected. Eyes on road.")
                     head_warning_count += 1
                     head_distraction_start = now
                     last_interaction_time = now
                 else:
-                    handle_emergency(cap)
+                    recorder.mark(FLAG_EMERGENCY)
+                    start_emergency()  # runs on its own thread
                     head_distraction_start = None
                     head_warning_count = 0
                     last_interaction_time = now
@@ -217,6 +223,9 @@ def start_monitoring(profile):
 
     cap.release()
     cv2.destroyAllWindows()
+    recorder.close()
+    print(f"📉 Detection rate: {session.stats()}")
+    print(f"🔊 TTS cache: {get_tts_stats()}")
     print("✅ System stopped safely.")
 
 # This file is now a module. The main entry point is login_manager.py
@@ -0,0 +1,105 @@
+"""
+Motion-adaptive inference rate.
+Lowers the detection rate while the driver is calm (face still, eyes open,
+looking ahead) and jumps straight back to full rate on any change.
+"""
+import time
+import numpy as np
+
+# ---------------- CONFIG ----------------
+MAX_INTERVAL = 0.2            # seconds between detection passes when fully relaxed
+FIRST_STEP_INTERVAL = 0.05    # first relaxed step (~20 fps)
+STABLE_PASSES_TO_RELAX = 15   # calm passes needed before each slow-down step
+
+MOTION_THRESH = 2.0           # mean landmark displacement in pixels
+EAR_DELTA_THRESH = 0.03       # deviation from the running EAR baseline
+YAW_DELTA_THRESH = 6.0        # degrees
+PITCH_DELTA_THRESH = 6.0      # degrees
+BASELINE_ALPHA = 0.1          # EMA weight for the EAR / pose baseline
+
+
+class AdaptiveRateController:
+    def __init__(self, max_interval=MAX_INTERVAL):
+        self.max_interval = max_interval
+        self.interval = 0.0
+        self.last_run = 0.0
+        self.stable_passes = 0
+
+        self.prev_landmarks = None
+        self.ref_ear = None
+        self.ref_yaw = None
+        self.ref_pitch = None
+
+        self.frames_seen = 0
+        self.frames_run = 0
+
+    def should_run(self, now=None):
+        """True if the detectors should process this frame."""
+        now = time.time() if now is None else now
+        self.frames_seen += 1
+        if self.interval <= 0 or now - self.last_run >= self.interval:
+            self.last_run = now
+            self.frames_run += 1
+            return True
+        return False
+
+    def force_full_rate(self):
+        self.interval = 0.0
+        self.stable_passes = 0
+
+    def update(self, landmarks, ear, yaw, pitch, alert_active=False):
+        """
+        Feeds the signals of the pass that just ran.
+        Any missing signal (no face, head pose calibrating) counts as unstable.
+        """
+        stable = (
+            not alert_active
+            and landmarks is not None
+            and ear is not None
+            and yaw is not None
+            and pitch is not None
+        )
+
+        if stable and self.prev_landmarks is not None and len(self.prev_landmarks) == len(landmarks):
+            motion = np.mean(np.linalg.norm(landmarks - self.prev_landmarks, axis=1))
+            if motion > MOTION_THRESH:
+                stable = False
+
+        if stable and self.ref_ear is not None:
+            if (abs(ear - self.ref_ear) > EAR_DELTA_THRESH
+                    or abs(yaw - self.ref_yaw) > YAW_DELTA_THRESH
+                    or abs(pitch - self.ref_pitch) > PITCH_DELTA_THRESH):
+                stable = False
+
+        self.prev_landmarks = landmarks
+        self._update_baseline(ear, yaw, pitch)
+
+        if not stable:
+            self.force_full_rate()
+            return
+
+        self.stable_passes += 1
+        if self.stable_passes >= STABLE_PASSES_TO_RELAX:
+            self.stable_passes = 0
+            self.interval = min(self.max_interval, max(FIRST_STEP_INTERVAL, self.interval * 2))
+
+    def _update_baseline(self, ear, yaw, pitch):
+        if ear is None or yaw is None or pitch is None:
+            return
+        if self.ref_ear is None:
+            self.ref_ear, self.ref_yaw, self.ref_pitch = ear, yaw, pitch
+            return
+        a = BASELINE_ALPHA
+        self.ref_ear += a * (ear - self.ref_ear)
+        self.ref_yaw += a * (yaw - self.ref_yaw)
+        self.ref_pitch += a * (pitch - self.ref_pitch)
+
+    def stats(self):
+        """Share of camera frames that actually went through the detectors."""
+        run_ratio = self.frames_run / self.frames_seen if self.frames_seen else 1.0
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_run": self.frames_run,
+            "run_ratio": round(run_ratio, 3),
+            "interval": self.interval,
+        }
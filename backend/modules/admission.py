@@ -0,0 +1,95 @@
+"""
+Admission control for the web server (ASGI middleware, wraps the app in server.py).
+Every request is counted against the budget of its route class for its whole
+lifetime, including a streamed body. A full budget answers 503 with a
+Retry-After immediately instead of queueing, so a client stuck in a reconnect
+loop is refused cheaply and the other classes keep working. Control routes
+(emergency cancel, stop) have their own budget that streams can't take.
+
+Budgets for the classes that run blocking work on the worker pool (auth, face,
+default) add up to WORKER_THREADS, so the pool's queue can't grow without bound.
+"""
+import json
+import os
+from urllib.parse import parse_qs
+
+# ---------------- CONFIG ----------------
+WORKER_THREADS = int(os.getenv("SERVER_WORKER_THREADS", "16"))
+
+# class -> (max concurrent requests, Retry-After seconds)
+BUDGETS = {
+    "control": (8, 1),
+    "stream": (int(os.getenv("SERVER_MAX_STREAMS", "64")), 5),  # MJPEG, SSE, long-polls
+    "face": (2, 2),                                              # camera + face recognition
+    "auth": (6, 1),                                              # password hashing
+    "default": (8, 1),
+}
+
+CONTROL_PATHS = ("/api/system/emergency/cancel", "/api/system/stop", "/api/health")
+STREAM_PATHS = ("/video-feed", "/video_feed", "/api/auth/face/video-feed", "/api/dashboard/events",
+                "/api/auth/face/events/")
+FACE_PATHS = ("/api/auth/face/start", "/api/face/register")
+AUTH_PATHS = ("/api/auth/login", "/api/auth/register")
+
+
+def classify(path, query_string=b""):
+    if path in CONTROL_PATHS:
+        return "control"
+    if path.startswith(STREAM_PATHS) or "wait" in parse_qs(query_string.decode("latin-1")):
+        return "stream"  # ?wait=<s> long-poll (not ?nowait= / ?await=)
+    if path.startswith(FACE_PATHS) and not path.startswith("/api/face/register/status"):
+        return "face"
+    if path in AUTH_PATHS:
+        return "auth"
+    return "default"
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, budgets=BUDGETS):
+        self.app = app
+        self.budgets = budgets
+        # All counters are touched on the event loop thread only: plain ints are enough
+        self.active = {name: 0 for name in budgets}
+        self.peak = {name: 0 for name in budgets}
+        self.rejected = {name: 0 for name in budgets}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        name = classify(scope["path"], scope.get("query_string", b""))
+        limit, retry_after = self.budgets[name]
+        if self.active[name] >= limit:
+            self.rejected[name] += 1
+            await self._reject(send, name, retry_after)
+            return
+
+        self.active[name] += 1
+        self.peak[name] = max(self.peak[name], self.active[name])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.active[name] -= 1
+
+    @staticmethod
+    async def _reject(send, name, retry_after):
+        body = json.dumps({"success": False, "error": f"Server busy ({name}), retry in {retry_after}s."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(retry_after).encode()),
+                (b"access-control-allow-origin", b"*"),  # so the browser lets the app read the 503
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def stats(self):
+        return {
+            name: {"limit": limit, "active": self.active[name], "peak": self.peak[name],
+                   "rejected": self.rejected[name]}
+            for name, (limit, _) in self.budgets.items()
+        }
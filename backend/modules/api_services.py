@@ -4,9 +4,9 @@ import time
 import threading
 from dotenv import load_dotenv
 from google import genai
-from .voice_assistant import speak, listen_voice, play_spotify
+from .voice_assistant import speak, listen_voice, play_spotify, CHATTER
 from .dashboard_data import set_weather_data
-from .dashboard_data import set_weather_data, set_traffic_data # <--- Add set_traffic_data
+from .dashboard_data import set_weather_data, set_traffic_data, batch_updates # <--- Add set_traffic_data
 
 # Load environment variables
 load_dotenv()
@@ -152,16 +152,17 @@ def trip_monitor_loop():
             weather_data = get_weather_data(lat, lon)
             traffic_data = get_traffic_data(lat, lon)
 
-            if weather_data:
-                set_weather_data(f"{weather_data['temp']}°C / {weather_data['condition'].title()}")
+            with batch_updates():  # weather + traffic reach the dashboard together
+                if weather_data:
+                    set_weather_data(f"{weather_data['temp']}°C / {weather_data['condition'].title()}")
 
-            if traffic_data:
-                set_traffic_data(traffic_data['status'])
+                if traffic_data:
+                    set_traffic_data(traffic_data['status'])
 
             # 3. Generate Smart Update via Gemini
             smart_message = generate_smart_update(city, weather_data, traffic_data)
 
-            speak(smart_message)
+            speak(smart_message, CHATTER)  # dropped if it waited too long behind alerts
 
         # Wait for 7 minutes (420 seconds)
         for _ in range(420):
@@ -204,5 +205,5 @@ def co_pilot_update(city):
     w = get_weather_data(lat, lon)
     t = get_traffic_data(lat, lon)
     msg = generate_smart_update(city, w, t)
-    speak(msg)
+    speak(msg, CHATTER)
     return msg, ""
@@ -0,0 +1,389 @@
+"""
+Camera broker.
+One owner keeps cv2.VideoCapture(0) open and fans frames out to any number
+of subscribers: in-process through a condition variable, cross-process
+through a shared-memory frame slot. Login, registration and monitoring all
+call open_camera(), so handing the camera from one to the next is instant.
+
+Subscriptions mimic the cv2.VideoCapture API (read / isOpened / release) so
+existing loops and handle_emergency(cap) keep working unchanged.
+"""
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+
+# ---------------- CONFIG ----------------
+CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAME_FPS = 30
+
+# Keep the device open this long after the last subscriber leaves
+LINGER_SECONDS = float(os.getenv("CAMERA_LINGER", "120"))
+
+SHM_NAME = f"sda_camera_{CAMERA_INDEX}"
+MAX_FRAME_BYTES = 1920 * 1080 * 3
+HEADER_BYTES = 64
+STALE_AFTER = 2.0            # seconds without a heartbeat = owner is gone
+READ_TIMEOUT = 1.0
+
+# Header slots (int64)
+H_SEQ, H_HEARTBEAT, H_HEIGHT, H_WIDTH, H_CHANNELS, H_OWNER_PID, H_READER_SEEN = range(7)
+
+
+def _now_ns():
+    return time.time_ns()
+
+
+# ---------------- OWNER ----------------
+class CameraBroker:
+    def __init__(self, index=CAMERA_INDEX, linger=LINGER_SECONDS):
+        self.index = index
+        self.linger = linger
+
+        self._cap = None
+        self._frame = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._last_release = time.time()
+        self._running = False
+        self._thread = None
+        self._shm = None
+        self._header = None
+        self._data = None
+
+    def start(self):
+        """Opens the device and starts the reader thread. Returns False if no camera."""
+        with self._cond:
+            if self._running:
+                return True
+
+            cap = cv2.VideoCapture(self.index, cv2.CAP_DSHOW)
+            if not cap.isOpened():
+                cap = cv2.VideoCapture(self.index)
+            if not cap.isOpened():
+                print("❌ Camera broker: could not open camera.")
+                return False
+
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+            cap.set(cv2.CAP_PROP_FPS, FRAME_FPS)
+            self._cap = cap
+            self._open_shared_memory()
+
+            self._running = True
+            self._last_release = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        print("📷 Camera broker started (device open).")
+        return True
+
+    def is_running(self):
+        return self._running
+
+    def subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+        return CameraSubscription(self)
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+            if self._subscribers == 0:
+                self._last_release = time.time()
+
+    def _wait_frame(self, last_seq, timeout):
+        """(seq, frame) of the next frame; (seq, None) on timeout, (None, None) once the broker stopped."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != last_seq or not self._running, timeout):
+                return last_seq, None
+            if not self._running:
+                return None, None  # don't hand out the last frame forever
+            return self._seq, self._frame
+
+    # ---------------- READER THREAD ----------------
+    def _run(self):
+        fail_count = 0
+        while self._running:
+            ret, frame = self._cap.read()
+            if not ret or frame is None:
+                fail_count += 1
+                if fail_count > 50:
+                    print("⚠️ Camera broker: device stopped delivering frames.")
+                    break
+                time.sleep(0.02)
+                continue
+            fail_count = 0
+
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._cond.notify_all()
+            self._publish_shared(frame)
+
+            if self._should_close():
+                break
+
+        self._close()
+
+    def _should_close(self):
+        if self._subscribers > 0:
+            return False
+        if self._header is not None:
+            reader_seen = self._header[H_READER_SEEN] / 1e9
+            if time.time() - reader_seen < STALE_AFTER:
+                return False  # another process is reading
+            last_use = max(self._last_release, reader_seen)
+        else:
+            last_use = self._last_release
+        return time.time() - last_use > self.linger
+
+    def _close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._cap:
+            self._cap.release()
+            self._cap = None
+        if self._shm is not None:
+            self._header[H_HEARTBEAT] = 0
+            self._header = self._data = None
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except (FileNotFoundError, OSError):
+                pass
+            self._shm = None
+        print("📷 Camera broker stopped (device released).")
+
+    # ---------------- SHARED MEMORY ----------------
+    def _open_shared_memory(self):
+        try:
+            try:
+                shm = shared_memory.SharedMemory(name=SHM_NAME, create=True, size=HEADER_BYTES + MAX_FRAME_BYTES)
+            except FileExistsError:
+                # Left over by an owner that died; take it over
+                shm = shared_memory.SharedMemory(name=SHM_NAME)
+            self._shm = shm
+            self._header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+            self._data = np.ndarray((MAX_FRAME_BYTES,), dtype=np.uint8, buffer=shm.buf, offset=HEADER_BYTES)
+            self._header[H_OWNER_PID] = os.getpid()
+        except Exception as e:
+            print(f"⚠️ Camera broker: cross-process sharing disabled ({e})")
+            self._shm = self._header = self._data = None
+
+    def _publish_shared(self, frame):
+        if self._header is None or frame.nbytes > MAX_FRAME_BYTES:
+            return
+        h = self._header
+        # Seqlock: odd sequence while the slot is being written
+        h[H_SEQ] += 1
+        h[H_HEIGHT], h[H_WIDTH] = frame.shape[:2]
+        h[H_CHANNELS] = frame.shape[2] if frame.ndim == 3 else 1
+        self._data[:frame.nbytes] = frame.reshape(-1)
+        h[H_SEQ] += 1
+        h[H_HEARTBEAT] = _now_ns()
+
+
+class CameraSubscription:
+    """In-process subscriber with a cv2.VideoCapture-like interface."""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._last_seq = 0
+        self._open = True
+
+    def isOpened(self):
+        return self._open and self._broker.is_running()
+
+    def read(self):
+        """Waits for the next frame. Returns (ret, frame) like VideoCapture.read()."""
+        if not self._open:
+            return False, None
+        seq, frame = self._broker._wait_frame(self._last_seq, READ_TIMEOUT)
+        if seq is None or frame is None:
+            return False, None
+        self._last_seq = seq
+        return True, frame.copy()  # callers draw on their frames
+
+    def set(self, prop, value):
+        return False  # resolution / fps are owned by the broker
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        if self._open:
+            self._open = False
+            self._broker._unsubscribe()
+
+
+# ---------------- CROSS-PROCESS READER ----------------
+class SharedCameraSubscription:
+    """
+    Reads frames published by a broker running in another process. If that
+    process dies (stale heartbeat), reads continue through open_camera():
+    another live owner, or this process opens the device itself.
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self._header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        self._data = np.ndarray((MAX_FRAME_BYTES,), dtype=np.uint8, buffer=shm.buf, offset=HEADER_BYTES)
+        self._last_seq = 0
+        self._open = True
+        self._fallback = None      # subscription used after the owner process died
+        self._last_takeover = 0.0
+
+    @staticmethod
+    def attach():
+        """Returns a subscription if a live owner is publishing, else None."""
+        try:
+            shm = shared_memory.SharedMemory(name=SHM_NAME)
+        except (FileNotFoundError, OSError):
+            return None
+        _untrack(shm)
+
+        header = np.ndarray((HEADER_BYTES // 8,), dtype=np.int64, buffer=shm.buf)
+        alive = time.time() - header[H_HEARTBEAT] / 1e9 < STALE_AFTER
+        del header
+        if not alive:
+            shm.close()
+            return None
+        return SharedCameraSubscription(shm)
+
+    def _owner_alive(self):
+        return time.time() - self._header[H_HEARTBEAT] / 1e9 < STALE_AFTER
+
+    def isOpened(self):
+        if self._fallback is not None:
+            return self._fallback.isOpened()
+        return self._open and self._owner_alive()
+
+    def _take_over(self):
+        """The owner died: attach to whoever owns the camera now, or open it ourselves."""
+        if time.time() - self._last_takeover < STALE_AFTER:
+            return  # no camera last time; don't hammer the device
+        self._last_takeover = time.time()
+        if self._fallback is not None:
+            self._fallback.release()
+            self._fallback = None
+        if self._header is not None:
+            self._header = self._data = None
+            self._shm.close()
+        print("📷 Camera owner process is gone; taking over the camera.")
+        self._fallback = open_camera()
+
+    def read(self):
+        if not self._open:
+            return False, None
+        if self._fallback is not None and self._fallback.isOpened():
+            return self._fallback.read()
+        if self._fallback is not None or not self._owner_alive():
+            self._take_over()
+            if self._fallback is not None and self._fallback.isOpened():
+                return self._fallback.read()
+            time.sleep(0.1)
+            return False, None
+
+        deadline = time.time() + READ_TIMEOUT
+        while self._open and time.time() < deadline:
+            self._header[H_READER_SEEN] = _now_ns()
+            seq = int(self._header[H_SEQ])
+            if seq % 2 == 0 and seq != self._last_seq:
+                h, w, c = (int(v) for v in self._header[H_HEIGHT:H_CHANNELS + 1])
+                frame = self._data[:h * w * c].copy().reshape((h, w, c) if c > 1 else (h, w))
+                if int(self._header[H_SEQ]) == seq:
+                    self._last_seq = seq
+                    return True, frame
+            time.sleep(0.005)
+        return False, None
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        if self._open:
+            self._open = False
+            if self._fallback is not None:
+                self._fallback.release()
+                self._fallback = None
+            if self._header is not None:
+                self._header = self._data = None
+                self._shm.close()
+
+
+def _untrack(shm):
+    """Stops this process's resource tracker from unlinking a segment it doesn't own."""
+    if os.name != "posix":
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+# ---------------- ENTRY POINT ----------------
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The in-process owner (started on demand)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None or not _broker.is_running():
+            _broker = CameraBroker()
+            if not _broker.start():
+                return None
+        return _broker
+
+
+def open_camera():
+    """
+    Returns a VideoCapture-like subscription to the shared camera.
+    Uses this process's broker if it runs one, attaches to another process's
+    broker if one is alive, and otherwise becomes the owner.
+    """
+    with _broker_lock:
+        local = _broker if _broker is not None and _broker.is_running() else None
+    if local:
+        return local.subscribe()
+
+    remote = SharedCameraSubscription.attach()
+    if remote:
+        return remote
+
+    broker = get_broker()
+    if broker is None:
+        return _ClosedCamera()
+    return broker.subscribe()
+
+
+class _ClosedCamera:
+    """Returned when no camera is available; behaves like a failed VideoCapture."""
+
+    def isOpened(self):
+        return False
+
+    def read(self):
+        return False, None
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        pass
@@ -1,40 +1,48 @@
-from flask import Flask, jsonify, Response, request
-from flask_cors import CORS
-import cv2
+"""
+Desktop-mode dashboard routes ("dashboard" blueprint).
+main.py serves these, plus the WhatsApp webhook, through server.serve_in_background().
+"""
+import asyncio
 import threading
 
+import cv2
+from quart import Blueprint, jsonify, Response, request
+from quart.utils import run_sync
+
 # Import your existing modules
 from .dashboard_data import get_dashboard_json
-from .camera_manager import latest_frame
+from . import camera_manager
 from .voice_assistant import speak, stop_music, is_music_active
 from .shared_state import set_current_driver
 
-app = Flask(__name__)
-CORS(app)  # Allow React to access this API
+bp = Blueprint("dashboard", __name__)
 
 
-def generate_frames():
+async def generate_frames():
+    last = None
     while True:
-        if latest_frame is not None:
-            ret, buffer = cv2.imencode('.jpg', latest_frame)
-            frame = buffer.tobytes()
+        frame = camera_manager.latest_frame
+        if frame is not None and frame is not last:
+            last = frame
+            ret, buffer = await run_sync(cv2.imencode)('.jpg', frame)
             yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+        await asyncio.sleep(1 / 30)
 
 
-@app.route('/video_feed')
-def video_feed():
+@bp.route('/video_feed')
+async def video_feed():
     return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
-@app.route('/status')
+@bp.route('/status')
 def get_status():
     data = get_dashboard_json()
     data["is_music_playing"] = is_music_active()
     return jsonify(data)
 
 # ---> NEW: Route to stop music from the dashboard button
-@app.route('/stop_music', methods=['POST'])
+@bp.route('/stop_music', methods=['POST'])
 def stop_music_route():
     stop_music()
     return jsonify({"status": "success", "message": "Music stopped"})
@@ -43,9 +51,9 @@ def stop_music_route():
 # ==========================================
 # NEW: THE STARTUP / WELCOME ROUTE
 # ==========================================
-@app.route('/start', methods=['POST'])
-def start_system():
-    data = request.json
+@bp.route('/start', methods=['POST'])
+async def start_system():
+    data = await request.get_json()
     if data and "driver" in data:
         # 1. Save the driver to the backend state
         set_current_driver(data["driver"])
@@ -62,7 +70,3 @@ def start_system():
         return jsonify({"status": "success", "message": "System started."})
 
     return jsonify({"status": "error", "message": "No driver provided."}), 400
-
-
-def start_dashboard_server():
-    app.run(host='0.0.0.0', port=5001)
\ No newline at end of file
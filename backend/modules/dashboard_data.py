@@ -1,7 +1,10 @@
+import threading
 import time
 
-# Global State Dictionary
-DASHBOARD_STATE = {
+from .state_store import StateStore
+
+# Global State (copy-on-write: readers get an immutable snapshot, writers publish a new one)
+DASHBOARD_STATE = StateStore({
     "trip_start_time": None,
     "driver_status": "FOCUSED",  # FOCUSED, DISTRACTED, DROWSY
     "ai_message": "System Initialized. Drive Safely.",
@@ -13,23 +16,38 @@ DASHBOARD_STATE = {
     "emergency_countdown": None,
     "whatsapp_sender": None,  # <--- NEW
     "whatsapp_time": 0
-}
+})
+
+WHATSAPP_TOAST_SECONDS = 5
+
+# Every real change bumps the version and wakes the push streams (/api/dashboard/events).
+_set = DASHBOARD_STATE.set
+get_version = DASHBOARD_STATE.get_version
+wait_for_change = DASHBOARD_STATE.wait_for_change
+batch_updates = DASHBOARD_STATE.batch  # with batch_updates(): several setters -> one version
+
 
 def set_emergency_state(status="NONE", countdown=None):
-    DASHBOARD_STATE["emergency_status"] = status
-    DASHBOARD_STATE["emergency_countdown"] = countdown
+    _set(emergency_status=status, emergency_countdown=countdown)
+
+
+def tick_emergency_countdown(countdown):
+    """Updates the countdown only if the emergency wasn't cancelled meanwhile (atomic check-and-set)."""
+    DASHBOARD_STATE.update(lambda state: {"emergency_countdown": countdown}
+                           if state["emergency_status"] == "COUNTDOWN" else None)
 
 def init_trip():
     """Call this when monitoring starts"""
-    DASHBOARD_STATE["trip_start_time"] = time.time()
+    _set(trip_start_time=time.time())
 
 
-def get_trip_duration():
+def get_trip_duration(trip_start_time=None):
     """Returns formatted string HH:MM:SS"""
-    if not DASHBOARD_STATE["trip_start_time"]:
+    trip_start_time = trip_start_time or DASHBOARD_STATE.get("trip_start_time")
+    if not trip_start_time:
         return "00:00:00"
 
-    elapsed = int(time.time() - DASHBOARD_STATE["trip_start_time"])
+    elapsed = int(time.time() - trip_start_time)
     hours = elapsed // 3600
     minutes = (elapsed % 3600) // 60
     seconds = elapsed % 60
@@ -39,55 +57,60 @@ def get_trip_duration():
 def update_status(drowsy_level, is_distracted, phone_detected):
     """Determines the overall driver status"""
     if drowsy_level >= 2:
-        DASHBOARD_STATE["driver_status"] = "DROWSY"
+        _set(driver_status="DROWSY")
     elif is_distracted or phone_detected:
-        DASHBOARD_STATE["driver_status"] = "DISTRACTED"
+        _set(driver_status="DISTRACTED")
     else:
-        DASHBOARD_STATE["driver_status"] = "FOCUSED"
+        _set(driver_status="FOCUSED")
 
 
 def set_ai_message(msg):
     """Updates the Co-Pilot message box"""
-    DASHBOARD_STATE["ai_message"] = msg
+    _set(ai_message=msg)
 
 
 def set_speaking_state(is_speaking):
     """Turns the dashboard visualizer on and off"""
-    DASHBOARD_STATE["is_speaking"] = is_speaking
+    _set(is_speaking=is_speaking)
 
 
 def set_weather_data(weather_text):
-    DASHBOARD_STATE["weather_info"] = weather_text
+    _set(weather_info=weather_text)
 
 # ---> NEW: Setter for Traffic Data
 def set_traffic_data(traffic_text):
-    DASHBOARD_STATE["traffic_info"] = traffic_text
+    _set(traffic_info=traffic_text)
 
 # ---> NEW: Trigger the WhatsApp UI Toast
 def set_whatsapp_notification(sender_name):
-    DASHBOARD_STATE["whatsapp_sender"] = sender_name
-    DASHBOARD_STATE["whatsapp_time"] = time.time()
+    stamp = time.time()
+    _set(whatsapp_sender=sender_name, whatsapp_time=stamp)
+    # Hide the toast after 5s (as its own versioned change, so pushes/long-polls see it)
+    timer = threading.Timer(WHATSAPP_TOAST_SECONDS, _clear_whatsapp_notification, args=(stamp,))
+    timer.daemon = True
+    timer.start()
 
 
+def _clear_whatsapp_notification(stamp):
+    # Only if no newer notification replaced it in the meantime
+    DASHBOARD_STATE.update(lambda state: {"whatsapp_sender": None} if state["whatsapp_time"] == stamp else None)
+
 
-def get_dashboard_json():
-    """Returns the full state for the Frontend API"""
 
-    if DASHBOARD_STATE["whatsapp_sender"] and (time.time() - DASHBOARD_STATE["whatsapp_time"] > 5):
-        DASHBOARD_STATE["whatsapp_sender"] = None
+def get_dashboard_json():
+    """Returns the full state for the Frontend API (from one consistent snapshot)"""
+    state = DASHBOARD_STATE.snapshot()
 
     return {
-        "trip_time": get_trip_duration(),
-        "status": DASHBOARD_STATE["driver_status"],
-        "message": DASHBOARD_STATE["ai_message"],
-        "weather": DASHBOARD_STATE["weather_info"],
-        "traffic": DASHBOARD_STATE["traffic_info"],
-        "location": DASHBOARD_STATE["location"],
-        "is_speaking": DASHBOARD_STATE["is_speaking"] , # <--- NEW: Send flag to React
-        "emergency_status": DASHBOARD_STATE["emergency_status"],
-        "emergency_countdown": DASHBOARD_STATE["emergency_countdown"],
-        "whatsapp_sender": DASHBOARD_STATE["whatsapp_sender"]
+        "trip_time": get_trip_duration(state["trip_start_time"]),
+        "trip_start": state["trip_start_time"],  # lets push clients tick the clock locally
+        "status": state["driver_status"],
+        "message": state["ai_message"],
+        "weather": state["weather_info"],
+        "traffic": state["traffic_info"],
+        "location": state["location"],
+        "is_speaking": state["is_speaking"] , # <--- NEW: Send flag to React
+        "emergency_status": state["emergency_status"],
+        "emergency_countdown": state["emergency_countdown"],
+        "whatsapp_sender": state["whatsapp_sender"]
     }
-
-def set_weather_data(weather_text):
-    DASHBOARD_STATE["weather_info"] = weather_text
\ No newline at end of file
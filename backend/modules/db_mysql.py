@@ -1,8 +1,17 @@
 import mysql.connector
 import json
 import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from .local_store import LocalStore, COLUMNS
+from .profile_cache import ProfileCache
+from .passwords import hash_password, is_hashed, needs_rehash, verify_many, rehash_in_background, LoginThrottle
+
 load_dotenv()
 
 # --- CONFIGURATION ---
@@ -11,6 +20,15 @@ DB_USER = os.getenv("DB_USER", "root")
 DB_PASS = os.getenv("DB_PASS")
 DB_NAME = os.getenv("DB_NAME", "smart_drive_db")
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))   # max wait for a free connection
+HEALTH_CHECK_AFTER = 30.0                                     # ping connections idle longer than this
+
+DB_SYNC_INTERVAL = float(os.getenv("DB_SYNC_INTERVAL", "10"))  # seconds between outbox pushes / remote pulls
+DB_SYNC_MAX_BACKOFF = 300.0
+DB_SYNC_BATCH = 500
+DB_OFFLINE = os.getenv("DB_OFFLINE", "0") == "1"              # never contact MySQL (simulates the server being down)
+
 
 def get_connection():
     try:
@@ -18,7 +36,9 @@ def get_connection():
             host=DB_HOST,
             user=DB_USER,
             password=DB_PASS,
-            database=DB_NAME
+            database=DB_NAME,
+            connection_timeout=5,
+            autocommit=True  # pooled connections must not hold a stale read snapshot
         )
         return conn
     except mysql.connector.Error as err:
@@ -26,117 +46,562 @@ def get_connection():
         return None
 
 
-def save_driver_to_db(driver_id, data):
-    """Saves driver info to MySQL. Returns True on success, False on failure."""
-    conn = get_connection()
-    if not conn: return False
+# --- CONNECTION POOL ---
+class _PooledConnection:
+    """A live connection plus its prepared statements (reused across checkouts)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = {}
+        self.last_used = time.time()
+
+    def cursor(self, sql):
+        """Prepared cursor for this statement; prepared once per connection."""
+        cursor = self.statements.get(sql)
+        if cursor is None:
+            cursor = self.conn.cursor(prepared=True)
+            self.statements[sql] = cursor
+        return cursor
+
+    def close(self):
+        self.statements.clear()
+        try:
+            self.conn.close()
+        except mysql.connector.Error:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()     # most recently used first: fewer idle pings
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {"checkouts": 0, "waited": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+                       "timeouts": 0, "created": 0, "reconnects": 0, "discarded": 0, "in_use": 0}
+
+    @contextmanager
+    def connection(self):
+        """Checks out a healthy connection; yields None if none is available in time."""
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                print("❌ DB pool exhausted (timed out waiting for a connection).")
+                yield None
+                return
+            waited = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self._stats["waited"] += 1
+                self._stats["wait_ms_total"] += waited
+                self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+
+        pooled = None
+        try:
+            pooled = self._take()
+            if pooled is None:
+                yield None
+                return
+            with self._lock:
+                self._stats["checkouts"] += 1
+                self._stats["in_use"] += 1
+            try:
+                yield pooled
+            except (mysql.connector.OperationalError, mysql.connector.InterfaceError):
+                # Connection-level failure: don't hand this one out again
+                pooled.close()
+                with self._lock:
+                    self._stats["discarded"] += 1
+                pooled = None
+                raise
+            finally:
+                with self._lock:
+                    self._stats["in_use"] -= 1
+        finally:
+            if pooled is not None:
+                pooled.last_used = time.time()
+                self._idle.put(pooled)
+            self._slots.release()
+
+    def _take(self):
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            conn = get_connection()
+            if conn is None:
+                return None
+            with self._lock:
+                self._stats["created"] += 1
+            return _PooledConnection(conn)
+
+        if time.time() - pooled.last_used > HEALTH_CHECK_AFTER:
+            try:
+                pooled.conn.ping(reconnect=False)
+            except mysql.connector.Error:
+                pooled.close()
+                conn = get_connection()
+                if conn is None:
+                    return None
+                with self._lock:
+                    self._stats["reconnects"] += 1
+                pooled = _PooledConnection(conn)
+        return pooled
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["wait_ms_avg"] = round(stats["wait_ms_total"] / stats["waited"], 2) if stats["waited"] else 0.0
+        stats["wait_ms_total"] = round(stats["wait_ms_total"], 2)
+        stats["wait_ms_max"] = round(stats["wait_ms_max"], 2)
+        return stats
+
+
+_pool = ConnectionPool()
+
+
+_profile_cache = ProfileCache()
+
+
+def get_pool_stats():
+    """Checkout / wait / reconnect counters for the shared pool."""
+    return _pool.stats()
+
+
+def get_profile_cache_stats():
+    """Hit / miss / eviction counters for the driver profile cache."""
+    return _profile_cache.stats()
+
+
+def _fetch(sql, params, one=False):
+    """Runs a SELECT on a pooled connection and returns dict rows (None on DB failure)."""
+    with _pool.connection() as pooled:
+        if pooled is None:
+            return None
+        cursor = pooled.cursor(sql)
+        cursor.execute(sql, params)
+        columns = cursor.column_names
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if one:
+        return rows[0] if rows else None
+    return rows
+
+
+# --- SCHEMA ---
+_schema_ready = False
+_schema_warning = None   # set if the change_seq triggers couldn't be created
+_schema_lock = threading.Lock()
 
-    cursor = conn.cursor()
 
-    # Convert dictionary to JSON string for storage
-    contacts_json = json.dumps(data['trusted_contacts'])
-    
-    # Default values if keys are missing (for backward compatibility)
-    driver_type = data.get('driver_type', 'Private')
+def normalize_username(name):
+    """Login key: case- and whitespace-insensitive full name."""
+    return " ".join((name or "").split()).lower()
+
+
+def _stored_password(data):
     password = data.get('password', '1234')
+    return password if is_hashed(password) else hash_password(password)
+
+
+def _add_column_if_missing(cursor, column, definition):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.COLUMNS "
+                   "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'drivers' AND COLUMN_NAME = %s", (column,))
+    if cursor.fetchone()[0] == 0:
+        print(f"🔧 Adding '{column}' column to drivers table...")
+        cursor.execute(f"ALTER TABLE drivers ADD COLUMN {column} {definition}")
+
+
+def _add_index_if_missing(cursor, index, column):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.STATISTICS "
+                   "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'drivers' AND INDEX_NAME = %s", (index,))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"CREATE INDEX {index} ON drivers ({column})")
+        print(f"🔧 Created index {index}.")
+
 
-    sql = """
-    INSERT INTO drivers (driver_ref_id, full_name, emergency_name, emergency_number, email_receiver, trusted_contacts, driver_type, password)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE
-    full_name=%s, emergency_name=%s, emergency_number=%s, email_receiver=%s, trusted_contacts=%s, driver_type=%s, password=%s
+def _ensure_change_seq(cursor):
     """
+    Server-assigned change sequence: a `change_seq` column plus a one-row
+    counter. Pushes take the next value inside their transaction; the
+    counter row stays locked until the push commits, so sequence order is
+    commit order and the pull cursor never skips a row.
+    """
+    _add_column_if_missing(cursor, "change_seq", "BIGINT NOT NULL DEFAULT 0")
+    cursor.execute("CREATE TABLE IF NOT EXISTS drivers_change_seq (value BIGINT NOT NULL)")
+    cursor.execute("INSERT INTO drivers_change_seq (value) SELECT 0 FROM DUAL "
+                   "WHERE NOT EXISTS (SELECT 1 FROM drivers_change_seq)")
+    _add_index_if_missing(cursor, "idx_drivers_change_seq", "change_seq")
 
-    vals = (
-        driver_id, data['name'], data['emergency_contact_name'],
-        data['emergency_contact_number'], data['email_receiver'], contacts_json, driver_type, password,
-        data['name'], data['emergency_contact_name'],
-        data['emergency_contact_number'], data['email_receiver'], contacts_json, driver_type, password
-    )
 
+def _ensure_change_seq_triggers(cursor):
+    """
+    Triggers that give edits made directly on the server (admin tools, SQL)
+    a change_seq too. Needs the TRIGGER privilege (and SUPER or
+    log_bin_trust_function_creators with binary logging). Without them
+    vehicles still sync each other's pushes, but miss direct edits.
+    """
+    global _schema_warning
     try:
-        cursor.execute(sql, vals)
-        conn.commit()
-        print(f"✅ Driver '{data['name']}' saved to Database!")
+        for event in ("INSERT", "UPDATE"):
+            trigger = f"drivers_change_seq_{event.lower()}"
+            cursor.execute("SELECT COUNT(*) FROM information_schema.TRIGGERS "
+                           "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = %s", (trigger,))
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(f"CREATE TRIGGER {trigger} BEFORE {event} ON drivers FOR EACH ROW BEGIN "
+                               f"UPDATE drivers_change_seq SET value = LAST_INSERT_ID(value + 1); "
+                               f"SET NEW.change_seq = LAST_INSERT_ID(); END")
+                print(f"🔧 Created trigger {trigger}.")
+        _schema_warning = None
+    except mysql.connector.Error as err:
+        _schema_warning = f"change_seq triggers missing, direct server edits won't sync: {err}"
+        print(f"⚠️ {_schema_warning}")
+
+
+def ensure_schema():
+    """
+    Adds the indexed `username`, `updated_at` and `change_seq` columns to an
+    existing drivers table and backfills them. Runs once per process; cheap no-op afterwards.
+    Returns False if MySQL can't be reached; schema errors are raised as-is.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return True
+    with _schema_lock:
+        if _schema_ready:
+            return True
+        with _pool.connection() as pooled:
+            if pooled is None:
+                return False
+            cursor = pooled.conn.cursor()
+            try:
+                _add_column_if_missing(cursor, "username", "VARCHAR(100) NULL")
+                _add_column_if_missing(cursor, "updated_at", "DOUBLE NULL")
+
+                cursor.execute("SELECT driver_ref_id, full_name FROM drivers WHERE username IS NULL")
+                missing = [(normalize_username(name), ref_id) for ref_id, name in cursor.fetchall()]
+                for i in range(0, len(missing), 1000):
+                    cursor.executemany("UPDATE drivers SET username = %s WHERE driver_ref_id = %s", missing[i:i + 1000])
+                if missing:
+                    print(f"🔧 Backfilled username for {len(missing)} driver(s).")
+                cursor.execute("UPDATE drivers SET updated_at = UNIX_TIMESTAMP() WHERE updated_at IS NULL")
+
+                _add_index_if_missing(cursor, "idx_drivers_username", "username")
+                _add_index_if_missing(cursor, "idx_drivers_updated_at", "updated_at")
+                _ensure_change_seq(cursor)
+                _ensure_change_seq_triggers(cursor)
+            except mysql.connector.Error as err:
+                print(f"❌ Schema Check Error: {err}")
+                raise
+            finally:
+                cursor.close()
+        _schema_ready = True
         return True
+
+
+# --- LOCAL STORE (primary read path on the vehicle) ---
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def _store():
+    """The local SQLite store; opening it also starts the background sync thread."""
+    global _store_instance
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = LocalStore()
+                threading.Thread(target=_sync_loop, daemon=True).start()
+    return _store_instance
+
+
+def _driver_row(driver_id, data):
+    return {
+        "driver_ref_id": driver_id,
+        "full_name": data['name'],
+        "emergency_name": data['emergency_contact_name'],
+        "emergency_number": data['emergency_contact_number'],
+        "email_receiver": data['email_receiver'],
+        "trusted_contacts": json.dumps(data['trusted_contacts']),
+        "driver_type": data.get('driver_type', 'Private'),
+        "password": _stored_password(data),
+        "username": normalize_username(data['name']),
+    }
+
+
+def _fetch_remote(sql, params):
+    """MySQL read used to fill local misses. None if MySQL is unreachable or disabled."""
+    if DB_OFFLINE or _sync_status["online"] is False:
+        return None  # known to be down: don't hold the caller for a connect timeout
+    try:
+        return _fetch(sql, params)
     except mysql.connector.Error as err:
+        print(f"⚠️ Remote Lookup Error: {err}")
+        return None
+
+
+def save_driver_to_db(driver_id, data):
+    """Saves driver info locally and queues it for MySQL. Returns True on success, False on failure."""
+    try:
+        _store().upsert_drivers([_driver_row(driver_id, data)])
+    except sqlite3.Error as err:
         print(f"❌ Save Error: {err}")
         return False
-    finally:
-        cursor.close()
-        conn.close()
+    _profile_cache.invalidate(driver_id)
+    sync_now()
+    print(f"✅ Driver '{data['name']}' saved to Database!")
+    return True
 
 
-def get_driver_profile(driver_ref_id):
-    """Fetches full profile by ID"""
-    conn = get_connection()
-    if not conn: return None
+def save_drivers_bulk(drivers, chunk_size=500):
+    """
+    Upserts many drivers, one local transaction per chunk; the sync thread
+    pushes them to MySQL in batches.
+    drivers: [(driver_id, data)] in the save_driver_to_db() format.
+    Returns the list of driver ids that were saved.
+    Passwords should already be hashed (hashing 100ms each here would serialize the import).
+    """
+    saved = []
+    for i in range(0, len(drivers), chunk_size):
+        chunk = drivers[i:i + chunk_size]
+        try:
+            _store().upsert_drivers([_driver_row(driver_id, data) for driver_id, data in chunk])
+        except sqlite3.Error as err:
+            print(f"❌ Bulk save error (rows {i}-{i + len(chunk) - 1}): {err}")
+            continue
+        for driver_id, _ in chunk:
+            _profile_cache.invalidate(driver_id)
+        saved.extend(driver_id for driver_id, _ in chunk)
+    sync_now()
+    return saved
 
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM drivers WHERE driver_ref_id = %s", (driver_ref_id,))
-    row = cursor.fetchone()
 
-    cursor.close()
-    conn.close()
+def _row_to_profile(row):
+    return {
+        "id": row['driver_ref_id'],  # <---
+        "name": row['full_name'],
+        "emergency_contact_name": row['emergency_name'],
+        "emergency_contact_number": row['emergency_number'],
+        "email_receiver": row['email_receiver'],
+        "trusted_contacts": json.loads(row['trusted_contacts']),
+        "driver_type": row.get('driver_type', 'Private')
+    }
 
 
+def _load_driver_row(driver_ref_id):
+    """Local row, falling back to MySQL (and keeping a local copy) on a miss."""
+    row = _store().get_driver(driver_ref_id)
+    if row is None:
+        rows = _fetch_remote("SELECT * FROM drivers WHERE driver_ref_id = %s", (driver_ref_id,))
+        if rows:
+            _store().apply_remote(rows)
+            row = _store().get_driver(driver_ref_id)
+    return row
+
+
+def get_driver_profile(driver_ref_id):
+    """Fetches full profile by ID (profile cache -> local store -> MySQL)"""
+    cached, fresh, version = _profile_cache.get(driver_ref_id)
+    if fresh:
+        return cached
+
+    try:
+        row = _load_driver_row(driver_ref_id)
+    except sqlite3.Error as err:
+        print(f"❌ Profile Lookup Error: {err}")
+        if cached:
+            _profile_cache.note_stale_served()  # an expired profile beats no profile
+        return cached
+
     if row:
-        return {
-            "id": row['driver_ref_id'],  # <---
-            "name": row['full_name'],
-            "emergency_contact_name": row['emergency_name'],
-            "emergency_contact_number": row['emergency_number'],
-            "email_receiver": row['email_receiver'],
-            "trusted_contacts": json.loads(row['trusted_contacts']),
-            "driver_type": row.get('driver_type', 'Private'),
-            "password": row.get('password', '1234')
-        }
+        profile = _row_to_profile(row)
+        _profile_cache.put(driver_ref_id, profile, version)
+        return profile
+    _profile_cache.invalidate(driver_ref_id)
     return None
 
-def validate_login(driver_name, password):
-    """Validates password for a given driver name (approximate match)"""
-    conn = get_connection()
-    if not conn: return None
-
-    cursor = conn.cursor(dictionary=True)
-    # Simple search by name
-    cursor.execute("SELECT * FROM drivers WHERE full_name LIKE %s", (f"%{driver_name}%",))
-    rows = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-
-    for row in rows:
-
-        if row:
-            return {
-                "id": row['driver_ref_id'],  # <---
-                "name": row['full_name'],
-                "emergency_contact_name": row['emergency_name'],
-                "emergency_contact_number": row['emergency_number'],
-                "email_receiver": row['email_receiver'],
-                "trusted_contacts": json.loads(row['trusted_contacts']),
-                "driver_type": row.get('driver_type', 'Private'),
-                "password": row.get('password', '1234')
-            }
+# --- LOGIN ---
+_throttle = LoginThrottle()
 
-    return None
+
+def authenticate(driver_name, password):
+    """
+    Exact (normalized) name lookup on the indexed username column, then
+    password verification on the bounded verify pool.
+    Returns (profile or None, status, retry_after) where status is one of
+    "ok", "invalid", "throttled", "busy", "error".
+    """
+    account = normalize_username(driver_name)
+    if not account or not password:
+        return None, "invalid", 0
+
+    wait = _throttle.retry_after(account)
+    if wait > 0:
+        return None, "throttled", wait
+
+    try:
+        rows = _store().find_by_username(account)
+    except sqlite3.Error as err:
+        print(f"❌ Login Lookup Error: {err}")
+        return None, "error", 0
+
+    # Unknown names and legacy rows cost one full hash too, so names can't be probed by latency
+    match = verify_many(password, [row.get('password') for row in rows])
+
+    if match is None:
+        return None, "busy", 1
+    if match < 0:
+        _throttle.record_failure(account)
+        if not rows and _sync_status["online"] is not False:
+            # Maybe registered on another vehicle and not pulled yet. The sync
+            # thread fetches it; the login path never waits on MySQL.
+            sync_now()
+        return None, "invalid", 0
+
+    row = rows[match]
+    _throttle.record_success(account)
+    if needs_rehash(row.get('password')):
+        # Legacy plaintext (or old iteration count): upgrade now that we know the password,
+        # on the verify pool and after this login has answered
+        def store_upgrade(new_hash):
+            _store().update_fields(row['driver_ref_id'], password=new_hash)
+            sync_now()
+
+        rehash_in_background(password, store_upgrade)
+    return _row_to_profile(row), "ok", 0
+
+
+def validate_login(driver_name, password):
+    """Returns the driver's profile if the name and password match, else None."""
+    return authenticate(driver_name, password)[0]
 
 
 def update_driver_contacts(driver_id, trusted_contacts):
     """Updates contacts using the unique driver_ref_id to prevent duplicate name conflicts."""
-    conn = get_connection()
-    if not conn: return False
-
-    cursor = conn.cursor()
     contacts_json = json.dumps(trusted_contacts)
 
-    # 🔒 100% Bulletproof: Targeting the exact unique ID!
-    sql = "UPDATE drivers SET trusted_contacts = %s WHERE driver_ref_id = %s"
+    try:
+        # 🔒 100% Bulletproof: Targeting the exact unique ID!
+        if _load_driver_row(driver_id) is None:
+            return False
+        _store().update_fields(driver_id, trusted_contacts=contacts_json)
+    except sqlite3.Error as err:
+        print(f"❌ Contacts Update Error: {err}")
+        return False
+    _profile_cache.invalidate(driver_id)
+    sync_now()
+    return True
+
+
+# --- WRITE-BEHIND SYNC ---
+_sync_wake = threading.Event()
+_sync_status = {"online": None, "last_push": None, "last_pull": None,
+                "pushed": 0, "pulled": 0, "last_error": None}
+
+
+def sync_now():
+    """Asks the sync thread to push / pull right away instead of at the next interval."""
+    _sync_wake.set()
 
+
+def get_sync_status():
+    status = dict(_sync_status)
+    status["offline_mode"] = DB_OFFLINE
+    status["schema_warning"] = _schema_warning
     try:
-        cursor.execute(sql, (contacts_json, driver_id))
-        conn.commit()
-        return True
-    except mysql.connector.Error as err:
-        return False
\ No newline at end of file
+        status["outbox"] = _store().outbox_size()
+        status["local_drivers"] = _store().count()
+    except sqlite3.Error as err:
+        status["local_error"] = str(err)
+    return status
+
+
+def _push_pending():
+    """Sends queued local changes to MySQL. Newer server rows win (last-writer-wins on updated_at)."""
+    # Column order matters: updated_at must be assigned last so the IF()s see the old value
+    updates = ", ".join(f"{c} = IF(VALUES(updated_at) >= COALESCE(updated_at, 0), VALUES({c}), {c})"
+                        for c in COLUMNS[1:-1])
+    sql = (f"INSERT INTO drivers ({', '.join(COLUMNS)}, change_seq) VALUES ({', '.join(['%s'] * (len(COLUMNS) + 1))}) "
+           f"ON DUPLICATE KEY UPDATE {updates}, "
+           f"updated_at = GREATEST(COALESCE(updated_at, 0), VALUES(updated_at)), "
+           f"change_seq = VALUES(change_seq)")
+
+    pushed = 0
+    while True:
+        batch = _store().pending(DB_SYNC_BATCH)
+        if not batch:
+            return pushed
+        with _pool.connection() as pooled:
+            if pooled is None:
+                raise ConnectionError("MySQL unreachable")
+            cursor = pooled.conn.cursor()
+            try:
+                pooled.conn.start_transaction()
+                # One sequence value per batch (ties are broken by id); the counter row
+                # stays locked until commit. The triggers, where present, override it.
+                cursor.execute("UPDATE drivers_change_seq SET value = LAST_INSERT_ID(value + 1)")
+                cursor.execute("SELECT LAST_INSERT_ID()")
+                change_seq = cursor.fetchone()[0]
+                cursor.executemany(sql, [tuple(row[c] for c in COLUMNS) + (change_seq,) for _, row in batch])
+                pooled.conn.commit()
+            except mysql.connector.Error:
+                pooled.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        _store().ack([(row["driver_ref_id"], seq) for seq, row in batch])
+        pushed += len(batch)
+
+
+def _pull_changes():
+    """
+    Fetches rows changed on the server since the last pull. The cursor is the
+    server's change_seq (keyset paging on change_seq, id), never a vehicle's
+    clock, so rows pushed late by an offline vehicle and direct server edits
+    are still picked up.
+    """
+    store = _store()
+    pulled = 0
+    while True:
+        since = int(store.get_state("pull_change_seq", -1))
+        last_id = store.get_state("pull_driver_ref_id", "")
+        rows = _fetch("SELECT * FROM drivers WHERE change_seq > %s OR (change_seq = %s AND driver_ref_id > %s) "
+                      "ORDER BY change_seq, driver_ref_id LIMIT %s", (since, since, last_id, DB_SYNC_BATCH))
+        if rows is None:
+            raise ConnectionError("MySQL unreachable")
+        if not rows:
+            return pulled
+        for driver_id in store.apply_remote(rows):
+            _profile_cache.invalidate(driver_id)
+        store.set_state("pull_change_seq", rows[-1]["change_seq"])
+        store.set_state("pull_driver_ref_id", rows[-1]["driver_ref_id"])
+        pulled += len(rows)
+
+
+def _sync_loop():
+    delay = 0  # first sync right away
+    while True:
+        _sync_wake.wait(delay)
+        _sync_wake.clear()
+        if DB_OFFLINE:
+            delay = DB_SYNC_INTERVAL
+            continue
+        try:
+            if not ensure_schema():
+                raise ConnectionError("MySQL unreachable")
+            pushed = _push_pending()
+            pulled = _pull_changes()
+            now = time.time()
+            if _sync_status["online"] is False:
+                print("✅ MySQL reachable again, local changes synced.")
+            _sync_status.update({"online": True, "last_push": now, "last_pull": now, "last_error": None})
+            _sync_status["pushed"] += pushed
+            _sync_status["pulled"] += pulled
+            delay = DB_SYNC_INTERVAL
+        except (mysql.connector.Error, ConnectionError, sqlite3.Error) as err:
+            if _sync_status["online"] is not False:
+                print(f"⚠️ MySQL sync paused, working from the local store: {err}")
+            _sync_status.update({"online": False, "last_error": str(err)})
+            delay = min(max(delay, DB_SYNC_INTERVAL) * 2, DB_SYNC_MAX_BACKOFF)
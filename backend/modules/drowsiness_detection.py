@@ -25,11 +25,32 @@ EYE_CLOSED_TIME = 2.0      # seconds (microsleep)
 YAWN_TIME = 1.5            # seconds
 
 # ---------------- STATE ----------------
-eye_closed_start = None
-yawn_start = None
-fatigue_score = 0
+class DrowsinessState:
+    """Per-stream detector state (one instance per camera / replay stream)."""
 
-ear_buffer = deque(maxlen=5)  # smoothing window
+    def __init__(self):
+        self.eye_closed_start = None
+        self.yawn_start = None
+        self.fatigue_score = 0
+        self.ear_buffer = deque(maxlen=5)  # smoothing window
+
+        # Last raw measurements (read by the adaptive rate controller)
+        self.last_ear = None
+        self.last_mar = None
+        self.last_landmarks = None
+
+    def get_last_signals(self):
+        """Returns the raw signals of the last processed frame (None when no face)."""
+        return {
+            "ear": self.last_ear,
+            "mar": self.last_mar,
+            "landmarks": self.last_landmarks,
+            "timer_active": self.eye_closed_start is not None or self.yawn_start is not None,
+        }
+
+
+# State used when callers don't pass their own (single camera setups)
+_default_state = DrowsinessState()
 
 # ---------------- HELPERS ----------------
 def eye_aspect_ratio(eye):
@@ -65,8 +86,9 @@ def enhance_image(frame):
     return enhanced_frame
 
 # ---------------- MAIN FUNCTION ----------------
-def detect_drowsiness(frame):
-    global eye_closed_start, yawn_start, fatigue_score
+def detect_drowsiness(frame, state=None):
+    if state is None:
+        state = _default_state
 
     # 1. Enhance image for better detection in varying light
     enhanced_frame = enhance_image(frame)
@@ -77,6 +99,9 @@ def detect_drowsiness(frame):
     drowsy_level = 0
     now = time.time()
 
+    if len(rects) == 0:
+        state.last_ear = state.last_mar = state.last_landmarks = None
+
     for rect in rects:
         shape = predictor(gray, rect)
         coords = np.array([(shape.part(i).x, shape.part(i).y) for i in range(68)])
@@ -88,40 +113,42 @@ def detect_drowsiness(frame):
         ear = (eye_aspect_ratio(leftEye) + eye_aspect_ratio(rightEye)) / 2.0
         mar = mouth_aspect_ratio(mouth)
 
+        state.last_ear, state.last_mar, state.last_landmarks = ear, mar, coords
+
         # ---------- SMOOTH EAR ----------
-        ear_buffer.append(ear)
-        ear_avg = sum(ear_buffer) / len(ear_buffer)
+        state.ear_buffer.append(ear)
+        ear_avg = sum(state.ear_buffer) / len(state.ear_buffer)
 
         # ---------- EYE CLOSURE (TIME BASED) ----------
         if ear_avg < EYE_AR_THRESH:
-            if eye_closed_start is None:
-                eye_closed_start = now
-            elif now - eye_closed_start >= EYE_CLOSED_TIME:
-                fatigue_score += 2
-                eye_closed_start = now  # reset
+            if state.eye_closed_start is None:
+                state.eye_closed_start = now
+            elif now - state.eye_closed_start >= EYE_CLOSED_TIME:
+                state.fatigue_score += 2
+                state.eye_closed_start = now  # reset
         else:
-            eye_closed_start = None
+            state.eye_closed_start = None
 
         # ---------- YAWNING (TIME BASED) ----------
         if mar > MOUTH_AR_THRESH:
-            if yawn_start is None:
-                yawn_start = now
-            elif now - yawn_start >= YAWN_TIME:
-                fatigue_score += 1
-                yawn_start = now
+            if state.yawn_start is None:
+                state.yawn_start = now
+            elif now - state.yawn_start >= YAWN_TIME:
+                state.fatigue_score += 1
+                state.yawn_start = now
         else:
-            yawn_start = None
+            state.yawn_start = None
 
         # ---------- RECOVERY ----------
         if ear_avg > EYE_AR_THRESH and mar < MOUTH_AR_THRESH:
-            fatigue_score = max(0, fatigue_score - 1)
+            state.fatigue_score = max(0, state.fatigue_score - 1)
 
         # ---------- LEVEL ----------
-        if fatigue_score >= 5:
+        if state.fatigue_score >= 5:
             drowsy_level = 3
-        elif fatigue_score >= 3:
+        elif state.fatigue_score >= 3:
             drowsy_level = 2
-        elif fatigue_score >= 1:
+        elif state.fatigue_score >= 1:
             drowsy_level = 1
         else:
             drowsy_level = 0
@@ -131,7 +158,12 @@ def detect_drowsiness(frame):
         # cv2.drawContours(frame, [cv2.convexHull(rightEye)], -1, (0, 255, 0), 1)
         # cv2.drawContours(frame, [cv2.convexHull(mouth)], -1, (0, 255, 255), 1)
 
-        # cv2.putText(frame, f"Fatigue: {fatigue_score}", (10, 30),
+        # cv2.putText(frame, f"Fatigue: {state.fatigue_score}", (10, 30),
         #             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
     return frame, drowsy_level
+
+
+def get_last_signals(state=None):
+    """Returns the raw signals of the last processed frame (None when no face)."""
+    return (state or _default_state).get_last_signals()
@@ -1,6 +1,7 @@
 from datetime import datetime
 import os
 import time
+import threading
 import smtplib
 from email.message import EmailMessage
 from dotenv import load_dotenv
@@ -9,11 +10,16 @@ import cv2
 import requests
 from twilio.rest import Client
 
-from .voice_assistant import speak, listen_voice, classify_response
+from .voice_assistant import speak, listen_voice, classify_response, CRITICAL
+from .voice_assistant import (PHRASE_ARE_YOU_OK, PHRASE_RESPOND_AGAIN, PHRASE_SAFE, PHRASE_NOT_WELL, PHRASE_WONT_CALL,
+                              PHRASE_NO_CONFIRMATION, PHRASE_ABORTED_TOUCH, PHRASE_ABORTED_VOICE,
+                              PHRASE_RECORDING, PHRASE_VIDEO_RECORDED, PHRASE_EMAIL_SENT,
+                              PHRASE_SENDING_WHATSAPP, PHRASE_ALERTS_SENT)
 from .api_services import get_user_location
 from .camera_manager import save_latest_frame
+from .camera_broker import open_camera
 
-from .dashboard_data import set_emergency_state, DASHBOARD_STATE
+from .dashboard_data import set_emergency_state, tick_emergency_countdown, DASHBOARD_STATE
 from .voice_assistant import start_listening_thread, get_latest_command
 
 
@@ -55,7 +61,7 @@ def get_ngrok_url():
 
 def record_emergency_video(cap):
     """Records 5 seconds of video, aborts instantly if trip ends."""
-    speak("Recording evidence.")
+    speak(PHRASE_RECORDING, CRITICAL)
 
     filename = os.path.abspath("emergency_clip.mp4")
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
@@ -72,7 +78,7 @@ def record_emergency_video(cap):
     finally:
         out.release()
         time.sleep(1)
-        speak("Video recorded.")
+        speak(PHRASE_VIDEO_RECORDED, CRITICAL)
 
     return filename
 
@@ -109,7 +115,7 @@ def send_email_alert(city, lat, lon):
         with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(EMAIL_SENDER, EMAIL_PASSWORD)
             server.send_message(msg)
-        speak("Email Sent.")
+        speak(PHRASE_EMAIL_SENT, CRITICAL)
     except Exception as e:
         print(f"❌ Email Failed: {e}")
 
@@ -137,7 +143,7 @@ def send_whatsapp_alert(city, lat, lon, video_url=None, image_url=None):
         emergency_contact_number = raw_number if raw_number.startswith("whatsapp:") else f"whatsapp:{raw_number}"
 
     try:
-        speak("Sending Evidences on WhatsApp...")
+        speak(PHRASE_SENDING_WHATSAPP, CRITICAL)
         client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
 
         maps_link = f"https://www.google.com/maps?q={lat},{lon}"
@@ -183,7 +189,7 @@ def trigger_full_alert(cap):
     send_email_alert(city, lat, lon)
     send_whatsapp_alert(city, lat, lon, video_link, image_link)
 
-    speak("Emergency alerts sent. Uploading data...")
+    speak(PHRASE_ALERTS_SENT, CRITICAL)
     print("⏳ KEEPING SERVER ALIVE FOR 40 SECONDS...")
 
     # Replace time.sleep(40) with a loop that checks the Kill Switch every second!
@@ -196,7 +202,8 @@ def trigger_full_alert(cap):
 
 def grace_period_countdown(cap, contact_name):
     """The final 10-second warning before sending data. Can be cancelled by UI or Voice."""
-    speak(f"Dispatching emergency protocols to {contact_name} in 10 seconds. Press the screen or say Cancel to abort.")
+    # The 10 seconds start once the driver has heard the warning
+    speak(f"Dispatching emergency protocols to {contact_name} in 10 seconds. Press the screen or say Cancel to abort.", CRITICAL).wait()
     set_emergency_state(status="COUNTDOWN", countdown=10)
 
     # Start listening for voice cancellation in the background
@@ -205,18 +212,18 @@ def grace_period_countdown(cap, contact_name):
     for i in range(10, -1, -1):
         # 1. Check if user clicked the Circular React Button
         if DASHBOARD_STATE.get("emergency_status") == "NONE":
-            speak("Emergency aborted by driver.")
+            speak(PHRASE_ABORTED_TOUCH, CRITICAL)
             return
 
         # 2. Check if user said "Cancel", "No", or "Stop"
         cmd = get_latest_command()
         if cmd in ["no", "cancel", "stop", "safe"]:
             set_emergency_state("NONE", None)
-            speak("Emergency aborted by voice command.")
+            speak(PHRASE_ABORTED_VOICE, CRITICAL)
             return
 
-        # Update the UI timer
-        set_emergency_state(status="COUNTDOWN", countdown=i)
+        # Update the UI timer (never overwrites a cancel from the UI)
+        tick_emergency_countdown(i)
         time.sleep(1)
 
     # 3. If timer hits 0 and wasn't cancelled, send the alerts!
@@ -231,7 +238,7 @@ def handle_emergency(cap):
 
     set_emergency_state(status="CONVERSATION", countdown=None)
 
-    speak("Are you okay? Please respond.")
+    speak(PHRASE_ARE_YOU_OK, CRITICAL).wait()
 
     attempts = 0
     max_attempts = 3
@@ -244,13 +251,13 @@ def handle_emergency(cap):
             decision = classify_response(response)
 
             if decision == "yes":
-                speak("Okay, you are safe.")
+                speak(PHRASE_SAFE, CRITICAL)
                 set_emergency_state("NONE", None)
                 return
 
             elif decision == "no":
-                speak("You said you are not well.")
-                speak(f"Can I call {emergency_contact_name}? Please say yes or no.")
+                speak(PHRASE_NOT_WELL, CRITICAL)
+                speak(f"Can I call {emergency_contact_name}? Please say yes or no.", CRITICAL).wait()
 
                 confirm_start = time.time()
                 while time.time() - confirm_start < 5:
@@ -258,21 +265,50 @@ def handle_emergency(cap):
                     confirm_decision = classify_response(confirm_response)
 
                     if confirm_decision == "yes":
-                        speak(f"Calling {emergency_contact_name}.")
+                        speak(f"Calling {emergency_contact_name}.", CRITICAL)
                         grace_period_countdown(cap, emergency_contact_name)
                         return
 
                     elif confirm_decision == "no":
-                        speak("Okay, I will not call anyone. Please drive safely.")
+                        speak(PHRASE_WONT_CALL, CRITICAL)
                         return
 
-                speak("No confirmation received. Calling emergency contact for safety.")
+                speak(PHRASE_NO_CONFIRMATION, CRITICAL)
                 grace_period_countdown(cap, emergency_contact_name)
                 return
 
         attempts += 1
         if attempts < max_attempts:
-            speak("No response detected. Please respond again.")
+            speak(PHRASE_RESPOND_AGAIN, CRITICAL).wait()
 
-    speak(f"No response detected. Calling {emergency_contact_name}.")
-    grace_period_countdown(cap, emergency_contact_name)
\ No newline at end of file
+    speak(f"No response detected. Calling {emergency_contact_name}.", CRITICAL)
+    grace_period_countdown(cap, emergency_contact_name)
+
+# ------------------ BACKGROUND EMERGENCY FLOW ------------------
+_emergency_thread = None
+
+
+def emergency_active():
+    return _emergency_thread is not None and _emergency_thread.is_alive()
+
+
+def start_emergency():
+    """
+    Runs handle_emergency() on its own thread with its own camera subscription,
+    so the monitoring loop keeps processing frames during the conversation.
+    Returns False if an emergency is already in progress.
+    """
+    global _emergency_thread
+    if emergency_active():
+        return False
+
+    def run():
+        cap = open_camera()
+        try:
+            handle_emergency(cap)
+        finally:
+            cap.release()
+
+    _emergency_thread = threading.Thread(target=run, daemon=True)
+    _emergency_thread.start()
+    return True
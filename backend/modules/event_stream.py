@@ -0,0 +1,99 @@
+"""
+Change-driven responses for StateStore-backed state (dashboard, scan sessions, sys_state).
+Everything here runs on the server's event loop: a waiting client is a parked
+coroutine, not a thread.
+
+Server-sent events: a stream sends the full state once, then only the keys
+that changed. It wakes as soon as a writer publishes, waits a few
+milliseconds so a burst of updates goes out as one message, and sends a
+heartbeat comment when idle so proxies and the browser keep the connection open.
+
+Conditional GET: the state version is the ETag, so an unchanged poll is a
+304 without building the JSON. With ?wait=<seconds> the request blocks until
+the version moves past the client's ETag (long-poll).
+"""
+import asyncio
+import json
+import os
+import time
+
+from quart import Response, jsonify, request
+
+# ---------------- CONFIG ----------------
+COALESCE_WINDOW = 0.03     # seconds to let a burst of updates land in one message
+HEARTBEAT_INTERVAL = 15.0  # idle keep-alive
+RESYNC_INTERVAL = 1.0      # re-check state with no notification (unversioned fields, e.g. music)
+MAX_WAIT = 30.0            # long-poll cap (seconds)
+
+_BOOT_ID = f"{os.getpid():x}{int(time.time()) % 100000:x}"  # versions restart with the process
+
+
+def sse_message(data, event=None):
+    text = f"event: {event}\n" if event else ""
+    return (text + f"data: {json.dumps(data, separators=(',', ':'))}\n\n").encode()
+
+
+async def stream_changes(snapshot, store, is_finished=None):
+    """
+    Async generator of SSE messages for a StateStore.
+    snapshot() -> dict (the client's view of the store's state).
+    is_finished(state) ends the stream after the state that satisfies it was sent.
+    """
+    version = store.get_version()
+    last = snapshot()
+    yield sse_message(last, "snapshot")
+    last_sent = time.time()
+
+    while not (is_finished and is_finished(last)):
+        new_version = await store.wait_for_change_async(version, RESYNC_INTERVAL)
+        if new_version != version:
+            await asyncio.sleep(COALESCE_WINDOW)
+            new_version = store.get_version()
+        version = new_version
+
+        current = snapshot()
+        changed = {k: v for k, v in current.items() if last.get(k) != v}
+        now = time.time()
+        if changed:
+            last = current
+            last_sent = now
+            yield sse_message(changed)
+        elif now - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = now
+            yield b": heartbeat\n\n"
+
+
+def sse_response(generator):
+    return Response(generator, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # don't let a reverse proxy buffer the stream
+    })
+
+
+# ---------------- CONDITIONAL GET ----------------
+def _etag(version, extra_tag):
+    return f'"{_BOOT_ID}-{version}{extra_tag() if extra_tag else ""}"'
+
+
+async def conditional_json(build, store, extra_tag=None):
+    """
+    JSON response with an ETag. If-None-Match on the current version gives a
+    304 and build() is never called. extra_tag() folds unversioned inputs into
+    the ETag (e.g. the music flag).
+    """
+    client_tag = request.headers.get("If-None-Match")
+    wait = min(max(request.args.get("wait", 0.0, type=float), 0.0), MAX_WAIT)
+    deadline = time.time() + wait
+
+    version = store.get_version()
+    etag = _etag(version, extra_tag)
+    while etag == client_tag and time.time() < deadline:
+        version = await store.wait_for_change_async(version, min(RESYNC_INTERVAL, deadline - time.time()))
+        etag = _etag(version, extra_tag)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag == client_tag:
+        return Response("", status=304, headers=headers)
+    response = jsonify(build())
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,81 @@
+"""
+Face enrollment.
+Turns a burst of captured frames into face embeddings at registration time,
+so login never has to decode or encode enrollment images. Encoding runs on a
+small worker pool (off the request / camera thread); captures without a
+usable, consistent face are rejected before anything is written.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .face_index import get_face_index
+
+# ---------------- CONFIG ----------------
+ENROLL_FRAMES = 5            # frames captured per enrollment
+MIN_EMBEDDINGS = 2           # usable encodings required to accept a capture
+ENCODE_SCALE = 0.5           # encode on a half-size frame (matches the login scan)
+CONSISTENCY_DISTANCE = 0.45  # encodings farther than this from the median are dropped
+FACES_DIR = "known_faces"
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="enroll")
+
+
+def _sharpness(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.Laplacian(gray, cv2.CV_64F).var()
+
+
+def encode_frames(frames):
+    """
+    Returns a (n, 128) float32 array of consistent encodings from the frames
+    (at most one face per frame, the largest). Empty if nothing is usable.
+    """
+    import face_recognition
+
+    encodings = []
+    for frame in frames:
+        small = cv2.resize(frame, (0, 0), fx=ENCODE_SCALE, fy=ENCODE_SCALE)
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        locations = face_recognition.face_locations(rgb)
+        if not locations:
+            continue
+        largest = max(locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]))
+        found = face_recognition.face_encodings(rgb, [largest])
+        if found:
+            encodings.append(found[0])
+
+    if not encodings:
+        return np.zeros((0, 128), dtype=np.float32)
+
+    # Drop outliers (someone walking past, a blurred turn of the head)
+    encodings = np.asarray(encodings, dtype=np.float32)
+    center = np.median(encodings, axis=0)
+    keep = np.linalg.norm(encodings - center, axis=1) <= CONSISTENCY_DISTANCE
+    return encodings[keep]
+
+
+def enroll(driver_id, frames, faces_dir=FACES_DIR):
+    """
+    Encodes the frames and, if enough usable encodings were found, saves the
+    sharpest frame to known_faces/<driver_id>.jpg and writes the embeddings
+    straight into the face index. Returns (success, message).
+    """
+    embeddings = encode_frames(frames)
+    if len(embeddings) < MIN_EMBEDDINGS:
+        return False, "No clear face found. Look straight at the camera and try again."
+
+    os.makedirs(faces_dir, exist_ok=True)
+    full_path = os.path.join(faces_dir, f"{driver_id}.jpg")
+    cv2.imwrite(full_path, max(frames, key=_sharpness))
+
+    get_face_index(sync=False).add_embeddings(full_path, driver_id, embeddings)
+    print(f"✅ Enrolled {driver_id} ({len(embeddings)} embedding(s)).")
+    return True, "Face registered successfully!"
+
+
+def enroll_async(driver_id, frames, faces_dir=FACES_DIR):
+    """Runs enroll() on the worker pool. Returns a Future of (success, message)."""
+    return _executor.submit(enroll, driver_id, list(frames), faces_dir)
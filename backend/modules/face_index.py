@@ -0,0 +1,274 @@
+"""
+Persistent face-embedding index.
+Embeddings of the images in known_faces/ are kept in a float32 .npy matrix
+plus a JSON manifest (row -> driver id, file -> mtime/size/hash). The matrix
+is memory-mapped, and only new or changed images are re-encoded.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+FACES_DIR = "known_faces"
+INDEX_DIR = "face_index"
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_DIM = 128
+IMAGE_EXTS = (".jpg", ".png")
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode_image(path):
+    """Returns the first face encoding found in an image, or None."""
+    import face_recognition
+
+    img = face_recognition.load_image_file(path)
+    encodings = face_recognition.face_encodings(img)
+    return encodings[0] if encodings else None
+
+
+class FaceIndex:
+    def __init__(self, faces_dir=FACES_DIR, index_dir=INDEX_DIR):
+        self.faces_dir = faces_dir
+        self.index_dir = index_dir
+        self.manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+
+        self._lock = threading.RLock()
+        self.embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.ids = []
+        self.sources = {}        # source key -> {"driver_id", "mtime", "size", "sha1", "rows": [start, count]}
+        self.generation = 0
+        self._manifest_mtime = None
+        self._refreshed = False  # a file signature changed without re-encoding
+
+    # ---------------- PUBLIC API ----------------
+    def get(self):
+        """Returns (embeddings matrix, row ids). Cheap; call sync() to pick up changes."""
+        with self._lock:
+            return self.embeddings, self.ids
+
+    def sync(self):
+        """
+        Brings the index up to date with known_faces/.
+        Reloads if another process rewrote the index, then re-encodes only the
+        images whose size/mtime (and hash) changed. Every file is stat'ed on
+        each call: a photo overwritten in place doesn't change the folder's
+        mtime, and a stat per file is cheap next to one encoding.
+        """
+        with self._lock:
+            self._reload_if_changed()
+
+            if not os.path.isdir(self.faces_dir):
+                return False
+
+            self._refreshed = False
+            changed = self._scan()
+            if changed or self._refreshed:
+                self._save()
+            return changed
+
+    def update_file(self, path):
+        """Re-indexes a single image right after it was written."""
+        with self._lock:
+            self._reload_if_changed()
+            key = os.path.basename(path)
+            driver_id = os.path.splitext(key)[0]
+            if self._index_file(key, path, driver_id):
+                self._save()
+
+    def add_embeddings(self, path, driver_id, embeddings):
+        """
+        Stores embeddings computed at enrollment time for an image that was
+        just written. The file signature is recorded too, so sync() treats
+        the image as already indexed and never re-encodes it.
+        """
+        self.add_many([(path, driver_id, embeddings)])
+
+    def add_many(self, entries):
+        """Bulk form of add_embeddings(): [(path, driver_id, embeddings)], one rewrite."""
+        with self._lock:
+            self._reload_if_changed()
+            for path, driver_id, embeddings in entries:
+                st = os.stat(path)
+                self.sources[os.path.basename(path)] = {
+                    "driver_id": driver_id,
+                    "mtime": st.st_mtime,
+                    "size": st.st_size,
+                    "sha1": _file_sha1(path),
+                    "pending": np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM).tolist(),
+                }
+            self._rebuild_matrix()
+            self._save()
+
+    # ---------------- SCANNING ----------------
+    def _scan(self):
+        seen = set()
+        changed = False
+        count = 0
+
+        for filename in os.listdir(self.faces_dir):
+            if not filename.lower().endswith(IMAGE_EXTS):
+                continue
+            seen.add(filename)
+            path = os.path.join(self.faces_dir, filename)
+            driver_id = os.path.splitext(filename)[0]  # arman_shaikh.jpg -> arman_shaikh
+            if self._index_file(filename, path, driver_id, rewrite=False):
+                changed = True
+                count += 1
+
+        for key in [k for k in self.sources if k not in seen]:
+            del self.sources[key]
+            changed = True
+
+        if changed:
+            self._rebuild_matrix()
+            print(f"✅ Face index updated ({count} image(s) re-encoded, {len(self.ids)} embedding(s)).")
+        return changed
+
+    def _index_file(self, key, path, driver_id, rewrite=True):
+        """Returns True if the entry for this file changed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+
+        entry = self.sources.get(key)
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            return False
+
+        sha1 = _file_sha1(path)
+        if entry and entry["sha1"] == sha1:
+            # Touched but identical: refresh the signature, keep the embedding
+            entry["mtime"], entry["size"] = st.st_mtime, st.st_size
+            self._refreshed = True
+            return False
+
+        try:
+            encoding = _encode_image(path)
+        except Exception as e:
+            print(f"Skipping {key}: {e}")
+            encoding = None
+
+        new_entry = {
+            "driver_id": driver_id,
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "sha1": sha1,
+            "pending": [] if encoding is None else [np.asarray(encoding, dtype=np.float32).tolist()],
+        }
+        self.sources[key] = new_entry
+        if rewrite:
+            self._rebuild_matrix()
+        return True
+
+    def _rebuild_matrix(self):
+        """Packs kept rows and newly encoded rows into one contiguous matrix."""
+        blocks, ids = [], []
+        start = 0
+        for key, entry in self.sources.items():
+            if "pending" in entry:
+                rows = np.asarray(entry.pop("pending"), dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+            else:
+                s, n = entry["rows"]
+                rows = np.asarray(self.embeddings[s:s + n], dtype=np.float32)
+            entry["rows"] = [start, len(rows)]
+            start += len(rows)
+            blocks.append(rows)
+            ids.extend([entry["driver_id"]] * len(rows))
+
+        self.embeddings = np.concatenate(blocks) if blocks else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.ids = ids
+
+    # ---------------- PERSISTENCE ----------------
+    def _save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.generation += 1
+        embeddings_file = f"embeddings_{self.generation}_{os.getpid()}.npy"
+
+        # New generation file instead of overwriting: the old one may still be
+        # memory-mapped (here or in another process), which Windows refuses to replace.
+        np.save(os.path.join(self.index_dir, embeddings_file),
+                np.ascontiguousarray(self.embeddings, dtype=np.float32))
+
+        manifest = {
+            "generation": self.generation,
+            "embeddings_file": embeddings_file,
+            "ids": self.ids,
+            "sources": self.sources,
+        }
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        self._open_matrix(manifest)
+        self._manifest_mtime = os.stat(self.manifest_path).st_mtime
+        self._remove_old_generations(embeddings_file)
+
+    def _remove_old_generations(self, keep):
+        for filename in os.listdir(self.index_dir):
+            if filename.startswith("embeddings_") and filename.endswith(".npy") and filename != keep:
+                try:
+                    os.remove(os.path.join(self.index_dir, filename))
+                except OSError:
+                    pass  # still mapped somewhere; removed on a later save
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            self._open_matrix(manifest)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Face index unreadable, rebuilding: {e}")
+            self.sources, self.ids = {}, []
+            self.embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+            self._manifest_mtime = mtime
+            return
+
+        self.generation = manifest["generation"]
+        self.ids = manifest["ids"]
+        self.sources = manifest["sources"]
+        self._manifest_mtime = mtime
+
+    def _open_matrix(self, manifest):
+        path = os.path.join(self.index_dir, manifest["embeddings_file"])
+        if len(manifest["ids"]) == 0:
+            self.embeddings = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        else:
+            self.embeddings = np.load(path, mmap_mode="r")
+
+
+# ---------------- SHARED INSTANCE ----------------
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_face_index(sync=True):
+    """
+    Process-wide index, loaded once and kept in sync incrementally.
+    Writers that bring their own embeddings (enrollment, bulk import) pass
+    sync=False: their new photos would otherwise be re-encoded by sync()
+    before add_many() records them.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FaceIndex()
+        if sync:
+            _index.sync()
+        return _index
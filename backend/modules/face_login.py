@@ -1,12 +1,12 @@
-import face_recognition
 import cv2
 import os
 import time
-import numpy as np
 
 from modules.db_mysql import get_driver_profile
-
-FACES_DIR = "known_faces"
+from modules.face_index import get_face_index, FACES_DIR
+from modules.face_matcher import get_face_matcher
+from modules.face_stream import StreamingRecognizer
+from modules.camera_broker import open_camera
 
 # Default "Guest" Profile (Fallback if face not recognized)
 GUEST_PROFILE = {
@@ -19,32 +19,15 @@ GUEST_PROFILE = {
 
 
 def load_known_faces():
-    """Loads all .jpg files from known_faces/ and encodes them."""
-    known_encodings = []
-    known_ids = []
-
+    """
+    Returns (encodings matrix, driver ids) from the persistent face index.
+    Only new or changed images in known_faces/ are encoded.
+    """
     if not os.path.exists(FACES_DIR):
         print("⚠️ No known_faces folder found.")
         return [], []
 
-    print("⏳ Loading known drivers...")
-    count = 0
-    for filename in os.listdir(FACES_DIR):
-        if filename.endswith(".jpg") or filename.endswith(".png"):
-            path = os.path.join(FACES_DIR, filename)
-            driver_id = os.path.splitext(filename)[0]  # arman_shaikh.jpg -> arman_shaikh
-
-            try:
-                img = face_recognition.load_image_file(path)
-                encodings = face_recognition.face_encodings(img)
-                if encodings:
-                    known_encodings.append(encodings[0])
-                    known_ids.append(driver_id)
-                    count += 1
-            except Exception as e:
-                print(f"Skipping {filename}: {e}")
-
-    print(f"✅ Loaded {count} face(s).")
+    known_encodings, known_ids = get_face_index().get()
     return known_encodings, known_ids
 
 # Share the latest frame with the API server so the frontend can see it
@@ -56,12 +39,9 @@ def recognize_driver():
     (Headless version - no cv2.imshow popups to freeze the server)
     """
     global latest_scan_frame
-    known_encodings, known_ids = load_known_faces()
-
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    if not cap.isOpened():
-        cap = cv2.VideoCapture(0)
+    matcher = get_face_matcher()
 
+    cap = open_camera()
     if not cap.isOpened():
         print("❌ Could not open camera for face login.")
         return None
@@ -70,6 +50,7 @@ def recognize_driver():
 
     start_time = time.time()
     detected_id = None
+    recognizer = StreamingRecognizer(matcher)
 
     while (time.time() - start_time) < 8:  # Try for 8 seconds
         ret, frame = cap.read()
@@ -79,42 +60,20 @@ def recognize_driver():
             
         frame = cv2.flip(frame, 1)
 
-        # Resize for faster processing
-        small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-
-        # Detect faces in current frame
-        face_locs = face_recognition.face_locations(rgb_small_frame)
-        face_encs = face_recognition.face_encodings(rgb_small_frame, face_locs)
-
-        for (top, right, bottom, left) in face_locs:
-            # Scale back up for drawing on original frame
-            top *= 4
-            right *= 4
-            bottom *= 4
-            left *= 4
-            cv2.rectangle(frame, (left, top), (right, bottom), (0, 255, 0), 2)
-            
-        latest_scan_frame = frame.copy()
+        # Cheap detection every frame, encoding only on stable/sharp/frontal faces
+        detected_id, box = recognizer.feed(frame)
 
-        for face_encoding in face_encs:
-            # Compare with known faces
-            if not known_encodings:
-                break
+        if box is not None:
+            x, y, w, h = box
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
 
-            matches = face_recognition.compare_faces(known_encodings, face_encoding, tolerance=0.5)
-            face_distances = face_recognition.face_distance(known_encodings, face_encoding)
-
-            if len(face_distances) > 0:
-                best_match_index = np.argmin(face_distances)
-                if matches[best_match_index]:
-                    detected_id = known_ids[best_match_index]
-                    break
+        latest_scan_frame = frame.copy()
 
         if detected_id:
             break
 
     cap.release()
+    print(f"📊 Face scan: {recognizer.stats()}")
 
     if detected_id:
         print(f"✅ FACE RECOGNIZED: {detected_id}")
@@ -0,0 +1,167 @@
+"""
+Vectorized face matcher.
+Matches 128-d face encodings against the whole roster with one matrix
+product over a contiguous float32 matrix. Drivers may have several
+embeddings (the closest one counts). Large rosters can use an approximate
+IVF mode (k-means buckets, only the nearest buckets are searched).
+"""
+import threading
+
+import numpy as np
+
+# ---------------- CONFIG ----------------
+MATCH_TOLERANCE = 0.5        # same threshold face_recognition.compare_faces used
+ANN_MIN_ROWS = 20000         # switch to approximate search above this many embeddings
+ANN_PROBES = 8               # buckets searched per query
+KMEANS_ITERS = 10
+
+
+class FaceMatcher:
+    def __init__(self, embeddings, ids, ann=None, nprobe=ANN_PROBES):
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, 128)
+        ids = np.asarray(ids)
+
+        # Group rows by driver so per-driver minima are one reduceat call
+        order = np.argsort(ids, kind="stable")
+        self.matrix = np.ascontiguousarray(embeddings[order])
+        row_ids = ids[order]
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        if len(row_ids):
+            self.driver_ids, self.group_starts = np.unique(row_ids, return_index=True)
+        else:
+            self.driver_ids = np.array([], dtype=object)
+            self.group_starts = np.array([], dtype=np.int64)
+        self.row_driver = np.repeat(np.arange(len(self.driver_ids)),
+                                    np.diff(np.append(self.group_starts, len(row_ids))))
+
+        self.ann = (len(self.matrix) >= ANN_MIN_ROWS) if ann is None else ann
+        self.nprobe = nprobe
+        self.centroids = None
+        self.buckets = None
+        if self.ann and len(self.matrix) > 0:
+            self._build_ivf()
+
+    def __len__(self):
+        return len(self.driver_ids)
+
+    # ---------------- EXACT SEARCH ----------------
+    def distances(self, queries):
+        """Euclidean distances (Q, N rows) via |q|^2 + |x|^2 - 2 q.x"""
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, 128)
+        q_norms = np.einsum("ij,ij->i", q, q)
+        d2 = q_norms[:, None] + self.sq_norms[None, :] - 2.0 * (q @ self.matrix.T)
+        np.maximum(d2, 0.0, out=d2)
+        return np.sqrt(d2)
+
+    def _driver_distances(self, queries):
+        """Per-driver minimum distance, shape (Q, drivers)."""
+        return np.minimum.reduceat(self.distances(queries), self.group_starts, axis=1)
+
+    # ---------------- PUBLIC API ----------------
+    def match(self, query, k=3, tolerance=MATCH_TOLERANCE):
+        """
+        Top-k drivers for one encoding, closest first:
+        [{"driver_id", "distance", "margin", "match"}]
+        margin is the gap to the next-best driver (large = unambiguous).
+        """
+        return self.match_many([query], k, tolerance)[0]
+
+    def match_many(self, queries, k=3, tolerance=MATCH_TOLERANCE):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, 128)
+        if len(self.driver_ids) == 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.ann:
+            return [self._match_ann(q, k, tolerance) for q in queries]
+
+        per_driver = self._driver_distances(queries)
+        return [self._top_k(row, np.arange(len(self.driver_ids)), k, tolerance) for row in per_driver]
+
+    def best(self, query, tolerance=MATCH_TOLERANCE):
+        """(driver_id, distance, margin) of the closest driver within tolerance, else None."""
+        top = self.match(query, k=2, tolerance=tolerance)
+        if top and top[0]["match"]:
+            return top[0]["driver_id"], top[0]["distance"], top[0]["margin"]
+        return None
+
+    def _top_k(self, dists, driver_idx, k, tolerance):
+        k_eff = min(k + 1, len(dists))  # one extra to compute the last margin
+        top = np.argpartition(dists, k_eff - 1)[:k_eff] if k_eff < len(dists) else np.arange(len(dists))
+        top = top[np.argsort(dists[top])]
+
+        results = []
+        for i, idx in enumerate(top[:k]):
+            dist = float(dists[idx])
+            next_dist = float(dists[top[i + 1]]) if i + 1 < len(top) else float("inf")
+            results.append({
+                "driver_id": str(self.driver_ids[driver_idx[idx]]),
+                "distance": dist,
+                "margin": next_dist - dist,
+                "match": dist <= tolerance,
+            })
+        return results
+
+    # ---------------- APPROXIMATE SEARCH (IVF) ----------------
+    def _build_ivf(self):
+        n = len(self.matrix)
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        centroids = self.matrix[rng.choice(n, nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERS):
+            assign = self._nearest_centroid(self.matrix, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.matrix)
+            counts = np.bincount(assign, minlength=nlist)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+        assign = self._nearest_centroid(self.matrix, centroids)
+        self.centroids = centroids
+        self.buckets = [np.flatnonzero(assign == c) for c in range(nlist)]
+
+    @staticmethod
+    def _nearest_centroid(points, centroids):
+        c_norms = np.einsum("ij,ij->i", centroids, centroids)
+        # |p|^2 is constant per point, so it doesn't change the argmin
+        return np.argmin(c_norms[None, :] - 2.0 * (points @ centroids.T), axis=1)
+
+    def _match_ann(self, query, k, tolerance):
+        c_dist = np.einsum("ij,ij->i", self.centroids, self.centroids) - 2.0 * (self.centroids @ query)
+        probes = np.argsort(c_dist)[:self.nprobe]
+        rows = np.concatenate([self.buckets[c] for c in probes])
+        if len(rows) == 0:
+            return []
+
+        sub = self.matrix[rows]
+        d2 = float(query @ query) + self.sq_norms[rows] - 2.0 * (sub @ query)
+        dists = np.sqrt(np.maximum(d2, 0.0))
+
+        # Per-driver minimum among the candidate rows
+        drivers = self.row_driver[rows]
+        order = np.lexsort((dists, drivers))
+        drivers, dists = drivers[order], dists[order]
+        first = np.ones(len(drivers), dtype=bool)
+        first[1:] = drivers[1:] != drivers[:-1]
+        return self._top_k(dists[first], drivers[first], k, tolerance)
+
+
+# ---------------- SHARED INSTANCE ----------------
+_matcher = None
+_matcher_generation = None
+_matcher_lock = threading.Lock()
+
+
+def get_face_matcher():
+    """Matcher over the persistent face index, rebuilt only when the index changes."""
+    global _matcher, _matcher_generation
+    from .face_index import get_face_index
+
+    index = get_face_index()
+    with _matcher_lock:
+        if _matcher is None or _matcher_generation != index.generation:
+            embeddings, ids = index.get()
+            _matcher = FaceMatcher(embeddings, ids)
+            _matcher_generation = index.generation
+        return _matcher
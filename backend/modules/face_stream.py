@@ -0,0 +1,156 @@
+"""
+Streaming face recognizer for the login scan.
+Every frame gets a cheap Haar detection; the expensive 128-d encoding is only
+computed once the face is stable, sharp and frontal. Matches are accumulated
+as votes across frames and the scan ends as soon as one driver clearly wins.
+"""
+import time
+
+import cv2
+import numpy as np
+import face_recognition
+
+from .face_matcher import MATCH_TOLERANCE
+
+# ---------------- CONFIG ----------------
+DETECT_SCALE = 0.25        # detection runs on a quarter-size grayscale frame
+ENCODE_SCALE = 0.5         # encodings use a half-size frame (better detail)
+MIN_FACE_PX = 24           # minimum face width on the detection frame
+
+STABLE_IOU = 0.7           # box overlap with the previous frame
+STABLE_FRAMES = 2          # consecutive stable frames before encoding
+SHARPNESS_MIN = 60.0       # variance of Laplacian on the face crop
+FRONTAL_TOLERANCE = 0.15   # nose position between the eyes (0.5 = centered)
+
+VOTES_REQUIRED = 2         # agreeing encodings needed for a normal match
+STRONG_DISTANCE = 0.35     # a single very close, unambiguous match is enough
+STRONG_MARGIN = 0.1
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+class StreamingRecognizer:
+    def __init__(self, matcher, tolerance=MATCH_TOLERANCE):
+        self.matcher = matcher
+        self.tolerance = tolerance
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+        self.prev_box = None
+        self.stable_count = 0
+        self.votes = {}
+
+        self.frames = 0
+        self.encodings = 0
+        self.started = time.time()
+
+    def feed(self, frame):
+        """
+        Processes one BGR frame. Returns (driver_id or None, face box in
+        full-frame coordinates or None) so the caller can draw feedback.
+        """
+        self.frames += 1
+        box = self._detect(frame)
+        if box is None:
+            self.prev_box = None
+            self.stable_count = 0
+            return None, None
+
+        full_box = tuple(int(v / DETECT_SCALE) for v in box)
+
+        if self.prev_box is not None and _iou(box, self.prev_box) >= STABLE_IOU:
+            self.stable_count += 1
+        else:
+            self.stable_count = 0
+        self.prev_box = box
+
+        if self.stable_count < STABLE_FRAMES or len(self.matcher) == 0:
+            return None, full_box
+
+        # Work on the half-size frame for the quality gates and the encoding
+        small = cv2.resize(frame, (0, 0), fx=ENCODE_SCALE, fy=ENCODE_SCALE)
+        scale = ENCODE_SCALE / DETECT_SCALE
+        x, y, w, h = (int(v * scale) for v in box)
+        location = (y, x + w, y + h, x)  # face_recognition's (top, right, bottom, left)
+
+        if not self._is_sharp(small, x, y, w, h):
+            return None, full_box
+
+        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        if not self._is_frontal(rgb, location):
+            return None, full_box
+
+        encodings = face_recognition.face_encodings(rgb, [location])
+        self.encodings += 1
+        if not encodings:
+            return None, full_box
+
+        return self._vote(encodings[0]), full_box
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "encodings": self.encodings,
+            "elapsed": round(time.time() - self.started, 2),
+            "votes": dict(self.votes),
+        }
+
+    # ---------------- GATES ----------------
+    def _detect(self, frame):
+        small = cv2.resize(frame, (0, 0), fx=DETECT_SCALE, fy=DETECT_SCALE)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, 1.1, 4, minSize=(MIN_FACE_PX, MIN_FACE_PX))
+        if len(faces) == 0:
+            return None
+        # The driver is the largest face in view
+        return tuple(max(faces, key=lambda f: f[2] * f[3]))
+
+    @staticmethod
+    def _is_sharp(frame, x, y, w, h):
+        crop = frame[max(0, y):y + h, max(0, x):x + w]
+        if crop.size == 0:
+            return False
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        return cv2.Laplacian(gray, cv2.CV_64F).var() >= SHARPNESS_MIN
+
+    @staticmethod
+    def _is_frontal(rgb, location):
+        landmarks = face_recognition.face_landmarks(rgb, [location], model="small")
+        if not landmarks:
+            return False
+        points = landmarks[0]
+        left_eye = np.mean(points["left_eye"], axis=0)
+        right_eye = np.mean(points["right_eye"], axis=0)
+        nose = np.asarray(points["nose_tip"][0], dtype=float)
+
+        eye_span = right_eye[0] - left_eye[0]
+        if abs(eye_span) < 1:
+            return False
+        ratio = (nose[0] - left_eye[0]) / eye_span
+        return abs(ratio - 0.5) <= FRONTAL_TOLERANCE
+
+    # ---------------- VOTING ----------------
+    def _vote(self, encoding):
+        candidates = self.matcher.match(encoding, k=2, tolerance=self.tolerance)
+        if not candidates or not candidates[0]["match"]:
+            return None
+
+        best = candidates[0]
+        driver_id = best["driver_id"]
+        self.votes[driver_id] = self.votes.get(driver_id, 0) + 1
+
+        if best["distance"] <= STRONG_DISTANCE and best["margin"] >= STRONG_MARGIN:
+            return driver_id
+
+        ranked = sorted(self.votes.values(), reverse=True)
+        runner_up = ranked[1] if len(ranked) > 1 else 0
+        if self.votes[driver_id] >= VOTES_REQUIRED and self.votes[driver_id] - runner_up >= VOTES_REQUIRED:
+            return driver_id
+        return None
@@ -0,0 +1,263 @@
+"""
+Fleet ingest engine.
+Frames pushed by remote vehicles are queued per vehicle and analyzed by a
+fixed worker pool that shares the detector models (and the YOLO batcher).
+Each vehicle keeps its own StreamSession, so its frames are processed in
+order by one worker at a time.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from .stream_session import StreamSession
+from .inference_batcher import PhoneBatcher
+
+# ---------------- CONFIG ----------------
+QUEUE_DEPTH = 2             # frames buffered per vehicle before we push back
+MAX_TOTAL_QUEUED = 64       # global cap across all vehicles
+VEHICLE_IDLE_TIMEOUT = 60   # seconds without frames before a vehicle is evicted
+
+ALERT_COOLDOWN = 10         # seconds between repeated alerts of the same type
+DISTRACTION_TIME = 4        # seconds of head turned before alerting
+
+
+class VehicleChannel:
+    def __init__(self, vehicle_id, batcher):
+        self.vehicle_id = vehicle_id
+        self.session = StreamSession(vehicle_id, phone_batcher=batcher)
+        self.frames = deque()
+        self.scheduled = False
+        self.lock = threading.Lock()
+
+        self.alerts = deque(maxlen=50)
+        self.last_alert = {}
+        self.distraction_start = None
+        self.levels = None
+
+        self.last_seen = time.time()
+        self.received = 0
+        self.processed = 0
+        self.rejected = 0
+
+    def raise_alert(self, kind, message, now):
+        if now - self.last_alert.get(kind, 0) < ALERT_COOLDOWN:
+            return
+        self.last_alert[kind] = now
+        self.alerts.append({"type": kind, "message": message, "time": now})
+
+    def pop_alerts(self):
+        with self.lock:
+            alerts = list(self.alerts)
+            self.alerts.clear()
+        return alerts
+
+
+class FleetIngest:
+    def __init__(self, workers=None, queue_depth=QUEUE_DEPTH, batching=True):
+        self.workers = workers or os.cpu_count() or 2
+        self.queue_depth = queue_depth
+        # Vehicles register as streams, but only the workers call detect()
+        self.batcher = PhoneBatcher(max_callers=self.workers) if batching else None
+
+        self._vehicles = {}
+        self._vehicles_lock = threading.Lock()
+        self._ready = queue.Queue()
+        self._total_queued = 0
+        self._queued_lock = threading.Lock()
+        self._running = True
+
+        # Throughput accounting for the vehicles-per-core report
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._window_start = time.time()
+        self._window_cpu = time.process_time()
+        self._window_processed = 0
+        self._last_report = {}
+
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True, name=f"fleet-worker-{i}")
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+        threading.Thread(target=self._reaper, daemon=True).start()
+        print(f"🚌 Fleet ingest ready with {self.workers} worker(s)")
+
+    # ---------------- INGEST ----------------
+    def submit(self, vehicle_id, jpeg_bytes):
+        """
+        Queues one compressed frame for a vehicle.
+        Returns (accepted, alerts). accepted is False when the vehicle (or the
+        whole server) is behind and the client should back off.
+        """
+        channel = self._get_channel(vehicle_id)
+        channel.last_seen = time.time()
+
+        with channel.lock:
+            channel.received += 1
+            with self._queued_lock:
+                accepted = len(channel.frames) < self.queue_depth and self._total_queued < MAX_TOTAL_QUEUED
+                if accepted:
+                    self._total_queued += 1
+
+            if not accepted:
+                channel.rejected += 1
+            else:
+                channel.frames.append(jpeg_bytes)
+                if not channel.scheduled:
+                    channel.scheduled = True
+                    self._ready.put(channel)
+
+        return accepted, channel.pop_alerts()
+
+    def get_alerts(self, vehicle_id):
+        with self._vehicles_lock:
+            channel = self._vehicles.get(vehicle_id)
+        return channel.pop_alerts() if channel else []
+
+    def get_vehicle_status(self, vehicle_id):
+        with self._vehicles_lock:
+            channel = self._vehicles.get(vehicle_id)
+        if not channel:
+            return None
+        return {
+            "vehicle_id": vehicle_id,
+            "levels": channel.levels,
+            "received": channel.received,
+            "processed": channel.processed,
+            "rejected": channel.rejected,
+            "queued": len(channel.frames),
+        }
+
+    def stop(self):
+        self._running = False
+        for _ in self._threads:
+            self._ready.put(None)
+        if self.batcher:
+            self.batcher.stop()
+
+    # ---------------- WORKERS ----------------
+    def _get_channel(self, vehicle_id):
+        with self._vehicles_lock:
+            channel = self._vehicles.get(vehicle_id)
+            if channel is None:
+                channel = VehicleChannel(vehicle_id, self.batcher)
+                self._vehicles[vehicle_id] = channel
+                if self.batcher:
+                    self.batcher.register_stream()
+                print(f"🚌 Vehicle '{vehicle_id}' connected")
+            return channel
+
+    def _worker(self):
+        while self._running:
+            channel = self._ready.get()
+            if channel is None:
+                break
+
+            with channel.lock:
+                jpeg_bytes = channel.frames.popleft() if channel.frames else None
+            if jpeg_bytes is not None:
+                with self._queued_lock:
+                    self._total_queued -= 1
+                try:
+                    self._process(channel, jpeg_bytes)
+                except Exception as e:
+                    print(f"⚠️ Fleet worker error ({channel.vehicle_id}): {e}")
+
+            # Re-schedule while the vehicle still has frames, so one worker at
+            # a time owns it and frame order is preserved.
+            with channel.lock:
+                if channel.frames:
+                    self._ready.put(channel)
+                else:
+                    channel.scheduled = False
+
+    def _process(self, channel, jpeg_bytes):
+        frame = cv2.imdecode(np.frombuffer(jpeg_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return
+
+        _, drowsy_level, head_pose_level, phone_level = channel.session.process(
+            frame, hold_full_rate=channel.distraction_start is not None
+        )
+        now = time.time()
+
+        with channel.lock:
+            channel.levels = {"drowsy": drowsy_level, "head_pose": head_pose_level, "phone": phone_level}
+            channel.processed += 1
+
+            if phone_level > 0:
+                channel.raise_alert("PHONE", "Phone usage detected.", now)
+            if drowsy_level >= 2:
+                channel.raise_alert("DROWSY", "Drowsiness detected.", now)
+            if head_pose_level >= 1:
+                if channel.distraction_start is None:
+                    channel.distraction_start = now
+                elif now - channel.distraction_start > DISTRACTION_TIME:
+                    channel.raise_alert("DISTRACTED", "Driver distracted.", now)
+            else:
+                channel.distraction_start = None
+
+        with self._stats_lock:
+            self._processed += 1
+
+    def _reaper(self):
+        """Evicts vehicles that stopped sending frames."""
+        while self._running:
+            time.sleep(VEHICLE_IDLE_TIMEOUT / 4)
+            cutoff = time.time() - VEHICLE_IDLE_TIMEOUT
+            with self._vehicles_lock:
+                stale = [vid for vid, ch in self._vehicles.items() if ch.last_seen < cutoff and not ch.scheduled]
+                for vid in stale:
+                    del self._vehicles[vid]
+                    if self.batcher:
+                        self.batcher.unregister_stream()
+            for vid in stale:
+                print(f"🚌 Vehicle '{vid}' timed out")
+
+    # ---------------- STATS ----------------
+    def stats(self, target_fps=None):
+        """
+        Throughput since the previous call. With target_fps (frames per second
+        each vehicle sends) it also reports sustained vehicles per CPU core.
+        """
+        now = time.time()
+        cpu_now = time.process_time()
+
+        with self._stats_lock:
+            wall = now - self._window_start
+            if wall >= 1.0 or not self._last_report:
+                processed = self._processed - self._window_processed
+                cpu = cpu_now - self._window_cpu
+                processed_fps = processed / wall if wall > 0 else 0.0
+                cores_used = cpu / wall if wall > 0 else 0.0
+
+                self._last_report = {
+                    "processed_fps": round(processed_fps, 2),
+                    "cpu_cores_used": round(cores_used, 2),
+                    "window_seconds": round(wall, 2),
+                }
+                self._window_start = now
+                self._window_cpu = cpu_now
+                self._window_processed = self._processed
+
+            report = dict(self._last_report)
+
+        with self._vehicles_lock:
+            report["active_vehicles"] = len(self._vehicles)
+            report["rejected_frames"] = sum(ch.rejected for ch in self._vehicles.values())
+        report["queued_frames"] = self._total_queued
+        report["workers"] = self.workers
+        report["cpu_count"] = os.cpu_count()
+
+        if target_fps and report["cpu_cores_used"] > 0:
+            sustained_vehicles = report["processed_fps"] / target_fps
+            report["vehicles_per_core"] = round(sustained_vehicles / report["cpu_cores_used"], 2)
+        if self.batcher:
+            report["batcher"] = self.batcher.stats()
+        return report
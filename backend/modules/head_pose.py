@@ -22,16 +22,32 @@ MODEL_POINTS = np.array([
 
 # ---------------- STATE ----------------
 CALIBRATION_FRAMES = 30
-calib_count = 0
-base_yaw = 0
-base_pitch = 0
+
+
+class HeadPoseState:
+    """Per-stream calibration baseline and last pose."""
+
+    def __init__(self):
+        self.calib_count = 0
+        self.base_yaw = 0
+        self.base_pitch = 0
+
+        # Last relative angles (None while calibrating or when no face is visible)
+        self.last_yaw = None
+        self.last_pitch = None
+
+
+# State used when callers don't pass their own (single camera setups)
+_default_state = HeadPoseState()
 
 # ---------------- MAIN FUNCTION ----------------
-def detect_head_pose(frame):
-    global calib_count, base_yaw, base_pitch
+def detect_head_pose(frame, state=None):
+    if state is None:
+        state = _default_state
 
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     faces = detector(gray)
+    state.last_yaw = state.last_pitch = None
     head_pose_level = 0  # 0=forward, 1=side, 2=down
 
     for face in faces:
@@ -73,19 +89,20 @@ def detect_head_pose(frame):
         yaw = angles[1]
 
         # -------- CALIBRATION --------
-        if calib_count < CALIBRATION_FRAMES:
-            base_yaw += yaw
-            base_pitch += pitch
-            calib_count += 1
+        if state.calib_count < CALIBRATION_FRAMES:
+            state.base_yaw += yaw
+            state.base_pitch += pitch
+            state.calib_count += 1
             cv2.putText(frame, "Calibrating... Look forward",
                         (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
             return frame, 0
 
-        avg_yaw = base_yaw / CALIBRATION_FRAMES
-        avg_pitch = base_pitch / CALIBRATION_FRAMES
+        avg_yaw = state.base_yaw / CALIBRATION_FRAMES
+        avg_pitch = state.base_pitch / CALIBRATION_FRAMES
 
         rel_yaw = yaw - avg_yaw
         rel_pitch = pitch - avg_pitch
+        state.last_yaw, state.last_pitch = rel_yaw, rel_pitch
 
         direction = "Forward"
 
@@ -104,3 +121,9 @@ def detect_head_pose(frame):
         #             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
 
     return frame, head_pose_level
+
+
+def get_last_pose(state=None):
+    """Returns (yaw, pitch) relative to the calibrated baseline, or (None, None)."""
+    state = state or _default_state
+    return state.last_yaw, state.last_pitch
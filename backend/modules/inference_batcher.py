@@ -0,0 +1,143 @@
+"""
+Cross-stream batched YOLO inference.
+Stream threads submit frames; a single worker gathers the frames that arrive
+within a short window and runs one batched forward pass for all of them.
+"""
+import threading
+import time
+from collections import deque
+
+from .phone_detection import predict_phone_batch, apply_phone_results
+
+# ---------------- CONFIG ----------------
+BATCH_WINDOW = 0.015   # seconds to wait for other streams after the first frame
+MAX_BATCH = 8
+
+
+class _Request:
+    __slots__ = ("frame", "result", "error", "done")
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class PhoneBatcher:
+    def __init__(self, window=BATCH_WINDOW, max_batch=MAX_BATCH, max_callers=None):
+        self.window = window
+        self.max_batch = max_batch
+        # Most threads that can be inside detect() at once (a worker pool size).
+        # A batch can't grow past it, however many streams are registered.
+        self.max_callers = max_callers
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._active_streams = 0
+        self._running = True
+
+        # Stats
+        self.batches = 0
+        self.frames = 0
+        self.infer_time = 0.0
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    # ---------------- STREAM REGISTRATION ----------------
+    def register_stream(self):
+        """Streams register so a full batch can be flushed without waiting out the window."""
+        with self._cond:
+            self._active_streams += 1
+
+    def unregister_stream(self):
+        with self._cond:
+            self._active_streams = max(0, self._active_streams - 1)
+            self._cond.notify()
+
+    # ---------------- PUBLIC API ----------------
+    def detect(self, frame, state=None):
+        """Blocking drop-in for detect_phone(frame, state)."""
+        req = _Request(frame)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("PhoneBatcher stopped")  # the worker won't drain it any more
+            self._pending.append(req)
+            self._cond.notify()
+        req.done.wait()
+
+        if req.error is not None:
+            raise req.error
+        return apply_phone_results(frame, [req.result], state)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def stats(self):
+        avg_batch = self.frames / self.batches if self.batches else 0.0
+        per_frame_ms = 1000.0 * self.infer_time / self.frames if self.frames else 0.0
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": round(avg_batch, 2),
+            "infer_ms_per_frame": round(per_frame_ms, 2),
+        }
+
+    # ---------------- WORKER ----------------
+    def _collect_batch(self):
+        with self._cond:
+            while self._running and not self._pending:
+                self._cond.wait()
+            if not self._running:
+                return None
+
+            # Latency cap: wait at most `window` after the first frame, and not
+            # at all once every active stream has a frame queued.
+            deadline = time.time() + self.window
+            while self._running:
+                target = min(self.max_batch, max(1, self._active_streams))
+                if self.max_callers:
+                    target = min(target, self.max_callers)
+                if len(self._pending) >= target:
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                batch.append(self._pending.popleft())
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                break
+
+            start = time.time()
+            try:
+                results = predict_phone_batch([req.frame for req in batch])
+                for req, result in zip(batch, results):
+                    req.result = result
+            except Exception as e:
+                for req in batch:
+                    req.error = e
+            self.infer_time += time.time() - start
+            self.batches += 1
+            self.frames += len(batch)
+
+            for req in batch:
+                req.done.set()
+
+        # Release anyone still waiting after stop()
+        with self._cond:
+            leftover = list(self._pending)
+            self._pending.clear()
+        for req in leftover:
+            req.error = RuntimeError("PhoneBatcher stopped")
+            req.done.set()
@@ -0,0 +1,166 @@
+"""
+Local embedded driver store.
+SQLite (WAL mode) copy of the drivers table that serves every profile read
+on the vehicle, so login works without the central MySQL server. Local
+writes are recorded in an outbox in the same transaction; db_mysql's sync
+thread pushes the outbox to MySQL in batches and pulls remote changes back.
+Conflicts with unpushed local changes are last-writer-wins on updated_at
+(the vehicle's clock); what to pull is tracked by the server's change_seq.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", "local_store.db")
+
+COLUMNS = ("driver_ref_id", "full_name", "emergency_name", "emergency_number", "email_receiver",
+           "trusted_contacts", "driver_type", "password", "username", "updated_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drivers (
+    driver_ref_id TEXT PRIMARY KEY,
+    full_name TEXT,
+    emergency_name TEXT,
+    emergency_number TEXT,
+    email_receiver TEXT,
+    trusted_contacts TEXT,
+    driver_type TEXT DEFAULT 'Private',
+    password TEXT,
+    username TEXT,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_local_drivers_username ON drivers (username);
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    driver_ref_id TEXT NOT NULL,
+    queued_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class LocalStore:
+    def __init__(self, path=LOCAL_DB_PATH):
+        self.path = path
+        self._local = threading.local()     # sqlite connections are per thread
+        self._write_lock = threading.Lock()  # one writer at a time (WAL allows concurrent readers)
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------- READS ----------------
+    def get_driver(self, driver_ref_id):
+        row = self._conn().execute("SELECT * FROM drivers WHERE driver_ref_id = ?", (driver_ref_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_by_username(self, username, limit=20):
+        rows = self._conn().execute("SELECT * FROM drivers WHERE username = ? LIMIT ?", (username, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM drivers").fetchone()[0]
+
+    # ---------------- LOCAL WRITES (queued for sync) ----------------
+    def upsert_drivers(self, rows):
+        """rows: dicts with COLUMNS (updated_at is stamped here). One transaction + outbox entries."""
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for row in rows:
+                    values = [row.get(c) for c in COLUMNS[:-1]] + [now]
+                    conn.execute(f"INSERT OR REPLACE INTO drivers ({', '.join(COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(COLUMNS))})", values)
+                    conn.execute("INSERT INTO outbox (driver_ref_id, queued_at) VALUES (?, ?)",
+                                 (row["driver_ref_id"], now))
+        return now
+
+    def update_fields(self, driver_ref_id, **fields):
+        """Partial update of one driver. Returns False if the driver isn't stored locally."""
+        now = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                cur = conn.execute(f"UPDATE drivers SET {assignments}, updated_at = ? WHERE driver_ref_id = ?",
+                                   (*fields.values(), now, driver_ref_id))
+                if cur.rowcount == 0:
+                    return False
+                conn.execute("INSERT INTO outbox (driver_ref_id, queued_at) VALUES (?, ?)", (driver_ref_id, now))
+        return True
+
+    # ---------------- SYNC SUPPORT ----------------
+    def pending(self, limit=500):
+        """Oldest queued changes, coalesced per driver: [(last seq, current local row)]."""
+        rows = self._conn().execute(
+            "SELECT driver_ref_id, MAX(seq) AS seq FROM outbox GROUP BY driver_ref_id ORDER BY MIN(seq) LIMIT ?",
+            (limit,)).fetchall()
+        batch = []
+        for r in rows:
+            driver = self.get_driver(r["driver_ref_id"])
+            if driver is not None:
+                batch.append((r["seq"], driver))
+            else:
+                self.ack([(r["driver_ref_id"], r["seq"])])
+        return batch
+
+    def ack(self, pushed):
+        """pushed: [(driver_ref_id, seq)]. Entries queued after the push stay in the outbox."""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("DELETE FROM outbox WHERE driver_ref_id = ? AND seq <= ?", pushed)
+
+    def outbox_size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def apply_remote(self, rows):
+        """
+        Stores rows pulled from MySQL. A local row with no unpushed change is
+        simply replaced (the server copy already includes it, plus any edit
+        made on the server directly); one still in the outbox is last-writer-wins
+        on updated_at. Returns the ids changed.
+        """
+        changed = []
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for row in rows:
+                    values = [v.decode() if isinstance(v, (bytes, bytearray)) else v
+                              for v in (row.get(c) for c in COLUMNS)]
+                    values[-1] = float(values[-1] or 0)
+                    cur = conn.execute(
+                        f"INSERT INTO drivers ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                        f"ON CONFLICT(driver_ref_id) DO UPDATE SET "
+                        + ", ".join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+                        + " WHERE excluded.updated_at > drivers.updated_at"
+                          " OR NOT EXISTS (SELECT 1 FROM outbox WHERE outbox.driver_ref_id = drivers.driver_ref_id)",
+                        values)
+                    if cur.rowcount:
+                        changed.append(row["driver_ref_id"])
+        return changed
+
+    def get_state(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_state(self, key, value):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
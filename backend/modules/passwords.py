@@ -0,0 +1,172 @@
+"""
+Password hashing and login throttling.
+Passwords are stored as salted PBKDF2-SHA256 hashes. Verification runs on a
+small bounded pool so a burst of logins can't pin every Flask thread on
+hashing, and failed attempts are throttled per account.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------- CONFIG ----------------
+HASH_SCHEME = "pbkdf2_sha256"
+HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "200000"))
+SALT_BYTES = 16
+
+VERIFY_WORKERS = max(2, (os.cpu_count() or 2) // 2)
+VERIFY_MAX_PENDING = 64          # queued + running verifications before logins are refused
+
+MAX_FAILED_ATTEMPTS = 5          # failures allowed inside the window
+FAILURE_WINDOW = 15 * 60
+LOCKOUT_BASE = 30                # first lockout (seconds), doubles per extra failure
+LOCKOUT_MAX = 15 * 60
+
+
+# ---------------- HASHING ----------------
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def hash_password(password, iterations=HASH_ITERATIONS):
+    """Returns 'pbkdf2_sha256$<iterations>$<salt>$<hash>'."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(HASH_SCHEME + "$")
+
+
+def verify_password(password, stored):
+    """Constant-time check against a hash (or a legacy plaintext value)."""
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), str(stored).encode("utf-8"))
+    try:
+        _, iterations, salt, expected = stored.split("$")
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"),
+                                     base64.b64decode(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, base64.b64decode(expected))
+
+
+def needs_rehash(stored):
+    """Plaintext or weaker-than-current hashes get upgraded after a successful login."""
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split("$")[1]) < HASH_ITERATIONS
+    except (IndexError, ValueError):
+        return True
+
+
+# ---------------- BOUNDED VERIFY POOL ----------------
+_verify_pool = ThreadPoolExecutor(max_workers=VERIFY_WORKERS, thread_name_prefix="pwverify")
+_verify_slots = threading.BoundedSemaphore(VERIFY_MAX_PENDING)
+_dummy_hash = None
+_dummy_lock = threading.Lock()
+
+
+def _get_dummy_hash():
+    global _dummy_hash
+    with _dummy_lock:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(secrets.token_hex(8))
+        return _dummy_hash
+
+
+_verify_pool.submit(_get_dummy_hash)  # ready before the first login needs it
+
+
+def _verify_full_cost(password, stored):
+    """
+    verify_password() that always costs at least one full-strength hash, so
+    unknown names and legacy plaintext / low-iteration rows answer in about
+    the same time as a current hash.
+    """
+    if not stored or needs_rehash(stored):
+        verify_password(password, _get_dummy_hash())
+    return verify_password(password, stored)
+
+
+def verify_many(password, stored_hashes):
+    """
+    Verifies the password against each candidate hash on the verify pool.
+    An empty candidate list (unknown name) still costs one hash.
+    Returns the index of the first match, -1 for no match, or None if the
+    pool is saturated (caller should answer 503 instead of queueing forever).
+    """
+    candidates = list(stored_hashes) or [None]
+    if not _verify_slots.acquire(blocking=False):
+        return None
+    try:
+        future = _verify_pool.submit(
+            lambda: next((i for i, h in enumerate(candidates) if _verify_full_cost(password, h)), -1))
+        return future.result()
+    finally:
+        _verify_slots.release()
+
+
+def rehash_in_background(password, on_hashed):
+    """
+    Hashes the password on the verify pool and calls on_hashed(new_hash)
+    there, so a login upgrading a legacy row doesn't pay for a second hash.
+    Returns False (upgrade skipped until the next login) if the pool is saturated.
+    """
+    if not _verify_slots.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            on_hashed(hash_password(password))
+        except Exception as e:
+            print(f"⚠️ Password upgrade failed: {e}")
+        finally:
+            _verify_slots.release()
+
+    _verify_pool.submit(run)
+    return True
+
+
+# ---------------- PER-ACCOUNT THROTTLING ----------------
+class LoginThrottle:
+    def __init__(self):
+        self._failures = {}      # account -> [timestamps of recent failures]
+        self._locked_until = {}
+        self._lock = threading.Lock()
+
+    def retry_after(self, account):
+        """Seconds until this account may try again (0 = allowed)."""
+        with self._lock:
+            return max(0.0, self._locked_until.get(account, 0) - time.time())
+
+    def record_failure(self, account):
+        now = time.time()
+        with self._lock:
+            recent = [t for t in self._failures.get(account, []) if now - t < FAILURE_WINDOW]
+            recent.append(now)
+            self._failures[account] = recent
+            excess = len(recent) - MAX_FAILED_ATTEMPTS
+            if excess >= 0:
+                self._locked_until[account] = now + min(LOCKOUT_MAX, LOCKOUT_BASE * (2 ** excess))
+            if len(self._failures) > 10000:
+                self._prune(now)
+
+    def record_success(self, account):
+        with self._lock:
+            self._failures.pop(account, None)
+            self._locked_until.pop(account, None)
+
+    def _prune(self, now):
+        for account in [a for a, ts in self._failures.items() if now - ts[-1] > FAILURE_WINDOW]:
+            del self._failures[account]
+        for account in [a for a, t in self._locked_until.items() if t < now]:
+            del self._locked_until[account]
@@ -1,5 +1,6 @@
 import cv2
 import os
+import threading
 from ultralytics import YOLO
 
 # ---------------- PATH ----------------
@@ -7,21 +8,47 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "yolov8n.pt")
 
 model = YOLO(MODEL_PATH)
+model_lock = threading.Lock()  # the YOLO predictor is shared by all streams
 
 # ---------------- CONFIG ----------------
 PHONE_LIMIT = 20  # frames (~1 sec at 20fps)
 
 # ---------------- STATE ----------------
-phone_counter = 0
+class PhoneState:
+    """Per-stream consecutive-detection counter."""
+
+    def __init__(self):
+        self.phone_counter = 0
+        self.last_confidence = 0.0  # best "cell phone" score of the last pass
+
+
+# State used when callers don't pass their own (single camera setups)
+_default_state = PhoneState()
 
 # ---------------- MAIN FUNCTION ----------------
-def detect_phone(frame):
-    global phone_counter
+def detect_phone(frame, state=None):
+    with model_lock:
+        results = list(model(frame, stream=True, verbose=False))
+
+    return apply_phone_results(frame, results, state)
 
-    results = model(frame, stream=True, verbose=False)
+
+def predict_phone_batch(frames):
+    """Raw YOLO results for a list of frames (one forward pass)."""
+    if not frames:
+        return []
+    with model_lock:
+        return list(model(list(frames), verbose=False))
+
+
+def apply_phone_results(frame, results, state=None):
+    """Draws phone boxes and updates the stream's counter from YOLO results."""
+    if state is None:
+        state = _default_state
 
     phone_detected = False
     phone_level = 0  # 0=no phone, 1=detected, 2=long usage
+    best_conf = 0.0
 
     for r in results:
         for box in r.boxes:
@@ -30,18 +57,20 @@ def detect_phone(frame):
 
             if label == "cell phone":
                 phone_detected = True
+                best_conf = max(best_conf, float(box.conf[0]))
 
                 x1, y1, x2, y2 = map(int, box.xyxy[0])
                 cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
                 cv2.putText(frame, "PHONE", (x1, y1 - 10),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
 
+    state.last_confidence = best_conf
     if phone_detected:
-        phone_counter += 1
+        state.phone_counter += 1
     else:
-        phone_counter = 0
+        state.phone_counter = 0
 
-    if phone_counter > PHONE_LIMIT:
+    if state.phone_counter > PHONE_LIMIT:
         phone_level = 2
     elif phone_detected:
         phone_level = 1
@@ -49,4 +78,3 @@ def detect_phone(frame):
         phone_level = 0
 
     return frame, phone_level
-
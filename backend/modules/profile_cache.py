@@ -0,0 +1,81 @@
+"""
+In-process driver profile cache.
+TTL + size-bounded LRU keyed by driver_ref_id. Writes in db_mysql invalidate
+entries (write-through), and expired entries are kept around so a lookup can
+still be answered while the database is briefly unreachable.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ---------------- CONFIG ----------------
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1024"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))   # seconds
+
+
+class ProfileCache:
+    def __init__(self, max_size=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (stored_at, profile)
+        self._versions = {}             # key -> invalidation counter
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stale_served": 0,
+                       "evictions": 0, "invalidations": 0}
+
+    def get(self, key):
+        """
+        Returns (profile copy or None, fresh, version). An expired profile is
+        still returned (fresh=False) so the caller can fall back to it.
+        Pass version to put() so a fetch that raced a write is not cached.
+        """
+        with self._lock:
+            version = self._versions.get(key, 0)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None, False, version
+
+            stored_at, profile = entry
+            self._entries.move_to_end(key)
+            fresh = time.time() - stored_at < self.ttl
+            self._stats["hits" if fresh else "expired"] += 1
+        return copy.deepcopy(profile), fresh, version
+
+    def put(self, key, profile, version=None):
+        with self._lock:
+            if version is not None and version != self._versions.get(key, 0):
+                return  # invalidated while the caller was reading the DB
+            self._entries[key] = (time.time(), copy.deepcopy(profile))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def note_stale_served(self):
+        with self._lock:
+            self._stats["stale_served"] += 1
+
+    def clear(self):
+        with self._lock:
+            for key in self._entries:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["expired"]
+        stats["max_size"] = self.max_size
+        stats["ttl"] = self.ttl
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,135 @@
+"""
+Recent per-frame driver signals for charting.
+A fixed-size NumPy ring buffer holds the last few minutes of EAR, MAR,
+yaw/pitch, fatigue score and phone confidence, one row per processed frame.
+Appending is a couple of array writes; nothing is allocated per frame.
+
+series() cuts a time window out of the ring and reduces each signal to a
+fixed number of points with Largest-Triangle-Three-Buckets (LTTB), which
+keeps peaks and dips (a blink, a head turn) that plain decimation would drop.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+# ---------------- CONFIG ----------------
+HISTORY_SECONDS = float(os.getenv("SIGNAL_HISTORY_SECONDS", "600"))
+HISTORY_FPS = 30                                   # sizing only; slower cameras just cover more time
+CAPACITY = int(HISTORY_SECONDS * HISTORY_FPS)      # 18000 rows, ~560 KB
+MAX_POINTS = 2000
+
+SIGNALS = ("ear", "mar", "yaw", "pitch", "fatigue", "phone_conf")
+
+NAN = float("nan")
+
+
+def _nan_if_none(value):
+    return NAN if value is None else float(value)
+
+
+# ---------------- DOWNSAMPLING ----------------
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets. Returns the indices of the kept points (first and last always kept)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    # bucket i covers [starts[i], starts[i + 1]); the last start is n - 1 (the final point)
+    starts = (np.floor(np.arange(threshold - 1) * every) + 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    # each bucket's "next bucket average", computed for all buckets at once
+    bounds = np.append(starts, n)
+    sizes = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / sizes
+    avg_y = np.add.reduceat(y, bounds[:-1]) / sizes
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = starts[i], starts[i + 1]
+        # twice the triangle area (previous pick, candidate, next bucket's average); the factor doesn't matter
+        xa, ya = x[a], y[a]
+        area = np.abs((xa - avg_x[i + 1]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (avg_y[i + 1] - ya))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+class SignalHistory:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(SIGNALS)), np.nan, dtype=np.float32)
+        self._count = 0   # rows ever written; the next row goes to _count % capacity
+        self._lock = threading.Lock()
+
+    def append(self, now, ear, mar, yaw, pitch, fatigue, phone_conf):
+        with self._lock:
+            i = self._count % self.capacity
+            self._t[i] = now
+            self._values[i] = (ear, mar, yaw, pitch, fatigue, phone_conf)
+            self._count += 1
+
+    def record(self, session, now=None):
+        """Appends a StreamSession's latest signals (None -> NaN, e.g. no face)."""
+        drowsiness, head_pose = session.drowsiness, session.head_pose
+        self.append(
+            time.time() if now is None else now,
+            _nan_if_none(drowsiness.last_ear), _nan_if_none(drowsiness.last_mar),
+            _nan_if_none(head_pose.last_yaw), _nan_if_none(head_pose.last_pitch),
+            float(drowsiness.fatigue_score), float(session.phone.last_confidence),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._count = 0
+
+    def window(self, seconds, now=None):
+        """Copies of (t, values) for the rows of the last `seconds`, oldest first."""
+        with self._lock:
+            count = min(self._count, self.capacity)
+            end = self._count % self.capacity
+            if count < self.capacity:
+                t, values = self._t[:count].copy(), self._values[:count].copy()
+            else:
+                t = np.concatenate((self._t[end:], self._t[:end]))
+                values = np.concatenate((self._values[end:], self._values[:end]))
+        now = time.time() if now is None else now
+        start = np.searchsorted(t, now - seconds)
+        return t[start:], values[start:]
+
+    def series(self, seconds, points, now=None):
+        """
+        ({signal: {"t": [...], "v": [...]}}, rows in the window) for the last
+        `seconds`, each signal reduced to at most `points` samples. Frames
+        without a value (NaN, e.g. no face) are left out of that signal.
+        """
+        t, values = self.window(seconds, now)
+        result = {}
+        for column, name in enumerate(SIGNALS):
+            y = values[:, column]
+            valid = ~np.isnan(y)
+            ts, ys = t[valid], y[valid].astype(np.float64)
+            if len(ts):
+                # relative times keep the triangle areas well conditioned
+                keep = lttb(ts - ts[-1], ys, points)
+                ts, ys = ts[keep], ys[keep]
+            result[name] = {"t": np.round(ts, 3).tolist(), "v": np.round(ys, 4).tolist()}
+        return result, len(t)
+
+
+# ---------------- SHARED INSTANCE ----------------
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_signal_history():
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = SignalHistory()
+        return _history
@@ -0,0 +1,129 @@
+"""
+Copy-on-write state container.
+Readers get an immutable snapshot (MappingProxyType) with a plain attribute
+read, no lock. Writers copy the current dict, apply their changes and publish
+the new snapshot in one assignment under a lock, so a reader never sees a
+half-applied update. Every published change bumps the version, which drives
+the ETags, long-polls and push streams (modules/event_stream.py).
+
+    store.set(status="DROWSY", message="Wake up")    # one version
+    with store.batch():                               # several setters, one version
+        update_status(...)
+        set_ai_message(...)
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+
+_MISSING = object()
+
+
+class StateStore:
+    def __init__(self, initial):
+        # (version, snapshot) is swapped as one object so the pair is always consistent
+        self._current = (0, MappingProxyType(dict(initial)))
+        self._changed = threading.Condition()
+        self._async_waiters = set()  # (loop, future) of coroutines waiting for a change
+        self._batch = threading.local()
+
+    # ---------------- READS (lock-free) ----------------
+    def snapshot(self):
+        return self._current[1]
+
+    def versioned_snapshot(self):
+        return self._current
+
+    def get_version(self):
+        return self._current[0]
+
+    def get(self, key, default=None):
+        return self._current[1].get(key, default)
+
+    def __getitem__(self, key):
+        return self._current[1][key]
+
+    # ---------------- WRITES ----------------
+    def set(self, **fields):
+        """Publishes the fields that differ from the current snapshot. Returns True if anything changed."""
+        pending = getattr(self._batch, "pending", None)
+        if pending is not None:
+            pending.update(fields)
+            return True
+        return self.update(lambda state: fields)
+
+    def update(self, compute):
+        """
+        compute(snapshot) -> dict of changes, run under the write lock (for
+        read-modify-write, e.g. "clear the toast only if it is still this one").
+        """
+        with self._changed:
+            version, state = self._current
+            changes = {k: v for k, v in (compute(state) or {}).items() if state.get(k, _MISSING) != v}
+            if not changes:
+                return False
+            new_state = dict(state)
+            new_state.update(changes)
+            self._publish(version, new_state)
+            return True
+
+    def remove(self, *keys):
+        """Drops keys (e.g. expired sessions) in one published version."""
+        with self._changed:
+            version, state = self._current
+            if not any(k in state for k in keys):
+                return False
+            self._publish(version, {k: v for k, v in state.items() if k not in keys})
+            return True
+
+    def _publish(self, version, new_state):
+        # caller holds self._changed
+        self._current = (version + 1, MappingProxyType(new_state))
+        self._changed.notify_all()
+        for loop, future in self._async_waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        self._async_waiters.clear()
+
+    @contextmanager
+    def batch(self):
+        """Groups every set() made by this thread inside the block into one published version."""
+        if getattr(self._batch, "pending", None) is not None:
+            yield self  # nested: the outer batch publishes
+            return
+        self._batch.pending = {}
+        try:
+            yield self
+        finally:
+            pending, self._batch.pending = self._batch.pending, None
+            if pending:
+                self.update(lambda state: pending)
+
+    # ---------------- WAITING ----------------
+    def wait_for_change(self, version, timeout):
+        """Blocks until the version moves past `version` or the timeout expires. Returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._current[0] != version, timeout)
+            return self._current[0]
+
+    async def wait_for_change_async(self, version, timeout):
+        """Same as wait_for_change, but parks the coroutine instead of a thread."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._changed:
+            if self._current[0] != version:
+                return self._current[0]
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._changed:
+                self._async_waiters.discard(waiter)
+        return self._current[0]
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,166 @@
+"""
+Multi-stream multiplexer.
+Runs several frame sources (driver cam, second cabin cam, replay files)
+through the shared detector models, each with its own StreamSession.
+"""
+import threading
+import time
+import cv2
+
+from .stream_session import StreamSession
+from .inference_batcher import PhoneBatcher
+
+
+class FrameSource:
+    """
+    Wraps a camera index or a video file.
+    Replay files are paced at their native FPS unless realtime=False.
+    """
+
+    def __init__(self, source, loop=False, realtime=True):
+        self.source = source
+        self.loop = loop
+        self.is_file = isinstance(source, str) and not source.isdigit()
+        self.realtime = realtime and self.is_file
+
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        self.cap = cv2.VideoCapture(source)
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+        self._next_frame_time = time.time()
+
+    def is_open(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        """Returns the next frame, or None when the source is exhausted."""
+        if self.realtime:
+            delay = self._next_frame_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_time = max(self._next_frame_time, time.time() - 1.0) + self.frame_interval
+
+        ret, frame = self.cap.read()
+        if not ret and self.is_file and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class StreamMultiplexer:
+    def __init__(self, on_result=None, batching=True):
+        """
+        on_result(stream_id, frame, levels) is called from the stream's worker
+        thread after every processed frame.
+        With batching, phone detection for all streams goes through one
+        PhoneBatcher so YOLO sees a batch instead of single frames.
+        """
+        self.on_result = on_result
+        self.batcher = PhoneBatcher() if batching else None
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def add_stream(self, stream_id, source, loop=False, realtime=True, adaptive=True):
+        """Opens a source and starts processing it. Returns its StreamSession."""
+        with self._lock:
+            if stream_id in self._streams:
+                raise ValueError(f"Stream '{stream_id}' already exists")
+
+            frame_source = FrameSource(source, loop=loop, realtime=realtime)
+            if not frame_source.is_open():
+                raise RuntimeError(f"Could not open source {source!r}")
+
+            stream = {
+                "session": StreamSession(stream_id, adaptive=adaptive, phone_batcher=self.batcher),
+                "source": frame_source,
+                "active": True,
+                "levels": None,
+                "fps": 0.0,
+            }
+            stream["thread"] = threading.Thread(target=self._run_stream, args=(stream_id, stream), daemon=True)
+            self._streams[stream_id] = stream
+
+        stream["thread"].start()
+        print(f"🎥 Stream '{stream_id}' started ({source})")
+        return stream["session"]
+
+    def remove_stream(self, stream_id):
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+        if stream:
+            stream["active"] = False
+            stream["thread"].join(timeout=2)
+
+    def stop(self):
+        for stream_id in list(self._streams):
+            self.remove_stream(stream_id)
+        if self.batcher:
+            self.batcher.stop()
+
+    def wait(self):
+        """Blocks until every (non-looping) source has been fully processed."""
+        for stream in list(self._streams.values()):
+            stream["thread"].join()
+
+    def get_status(self):
+        with self._lock:
+            status = {
+                stream_id: {
+                    "levels": stream["levels"],
+                    "fps": round(stream["fps"], 1),
+                    **stream["session"].stats(),
+                }
+                for stream_id, stream in self._streams.items()
+            }
+        if self.batcher:
+            status["_batcher"] = self.batcher.stats()
+        return status
+
+    def _run_stream(self, stream_id, stream):
+        session = stream["session"]
+        source = stream["source"]
+        last = time.time()
+        if self.batcher:
+            self.batcher.register_stream()
+
+        try:
+            while stream["active"]:
+                frame = source.read()
+                if frame is None:
+                    if source.is_file:
+                        break
+                    time.sleep(0.05)
+                    continue
+
+                frame, drowsy_level, head_pose_level, phone_level = session.process(frame)
+                levels = {
+                    "drowsy": drowsy_level,
+                    "head_pose": head_pose_level,
+                    "phone": phone_level,
+                }
+                stream["levels"] = levels
+
+                now = time.time()
+                dt = now - last
+                last = now
+                if dt > 0:
+                    stream["fps"] = 0.9 * stream["fps"] + 0.1 * (1.0 / dt)
+
+                if self.on_result:
+                    try:
+                        self.on_result(stream_id, frame, levels)
+                    except Exception as e:
+                        print(f"⚠️ Stream '{stream_id}' callback error: {e}")
+        except Exception as e:
+            print(f"⚠️ Stream '{stream_id}' error: {e}")
+        finally:
+            if self.batcher:
+                self.batcher.unregister_stream()
+            source.release()
+            stream["active"] = False
+            print(f"🛑 Stream '{stream_id}' finished.")
@@ -0,0 +1,65 @@
+"""
+Per-stream monitoring session.
+Bundles the detector state of one camera / replay stream so several streams
+can run through the same (module level) model instances.
+"""
+from .drowsiness_detection import DrowsinessState, detect_drowsiness
+from .head_pose import HeadPoseState, detect_head_pose
+from .phone_detection import PhoneState, detect_phone
+from .adaptive_rate import AdaptiveRateController
+
+
+class StreamSession:
+    def __init__(self, stream_id="driver", adaptive=True, phone_batcher=None):
+        self.stream_id = stream_id
+        self.phone_batcher = phone_batcher
+        self.drowsiness = DrowsinessState()
+        self.head_pose = HeadPoseState()
+        self.phone = PhoneState()
+        self.rate = AdaptiveRateController() if adaptive else None
+
+        # Last detector results (held between passes when the rate is lowered)
+        self.drowsy_level = 0
+        self.head_pose_level = 0
+        self.phone_level = 0
+        self.frames = 0
+        self.last_ran = False  # detectors ran on the last frame (vs. held results)
+
+    def process(self, frame, hold_full_rate=False):
+        """
+        Runs the detectors on one frame of this stream.
+        hold_full_rate lets the caller keep full rate for its own timers
+        (distraction countdown, pending voice prompt, ...).
+        Returns (frame, drowsy_level, head_pose_level, phone_level).
+        """
+        self.frames += 1
+        self.last_ran = self.rate is None or self.rate.should_run()
+
+        if self.last_ran:
+            frame, self.drowsy_level = detect_drowsiness(frame, self.drowsiness)
+            frame, self.head_pose_level = detect_head_pose(frame, self.head_pose)
+            if self.phone_batcher is not None:
+                frame, self.phone_level = self.phone_batcher.detect(frame, self.phone)
+            else:
+                frame, self.phone_level = detect_phone(frame, self.phone)
+            self._update_rate(hold_full_rate)
+
+        return frame, self.drowsy_level, self.head_pose_level, self.phone_level
+
+    def _update_rate(self, hold_full_rate):
+        if self.rate is None:
+            return
+        signals = self.drowsiness.get_last_signals()
+        alert_active = (
+            hold_full_rate
+            or self.drowsy_level > 0 or self.head_pose_level > 0 or self.phone_level > 0
+            or signals["timer_active"]
+        )
+        self.rate.update(signals["landmarks"], signals["ear"],
+                         self.head_pose.last_yaw, self.head_pose.last_pitch, alert_active)
+
+    def stats(self):
+        data = {"stream_id": self.stream_id, "frames": self.frames}
+        if self.rate is not None:
+            data["rate"] = self.rate.stats()
+        return data
@@ -0,0 +1,220 @@
+"""
+Trip telemetry recorder.
+Samples the per-frame driver signals (EAR, MAR, yaw/pitch, fatigue, phone)
+at a fixed rate into 24-byte NumPy records. The monitoring loop only appends
+a tuple to a deque; a background thread writes the records into rotating,
+memory-mapped .npy segments under trips/<trip_id>/.
+
+At 10 Hz a 10-hour trip is 360k records, about 8.6 MB on disk.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ---------------- CONFIG ----------------
+TRIPS_DIR = os.getenv("TELEMETRY_DIR", "trips")
+SAMPLE_HZ = float(os.getenv("TELEMETRY_HZ", "10"))
+SEGMENT_RECORDS = 36000        # one hour per segment at 10 Hz (~860 KB)
+FLUSH_INTERVAL = 0.5           # writer wake-up period (seconds)
+SYNC_INTERVAL = 5.0            # flush to disk + update trip.json this often
+MAX_PENDING = 10000            # drop the oldest samples if the writer falls behind
+
+RECORD_DTYPE = np.dtype([
+    ("t", "<f8"),              # epoch seconds
+    ("ear", "<f2"),            # NaN when no face
+    ("mar", "<f2"),
+    ("yaw", "<f2"),            # degrees, relative to calibration
+    ("pitch", "<f2"),
+    ("fatigue", "<u2"),
+    ("phone_conf", "<f2"),     # best "cell phone" confidence, 0 if none
+    ("drowsy", "u1"),          # detector levels (0/1/2)
+    ("head", "u1"),
+    ("phone", "u1"),
+    ("flags", "u1"),
+])
+
+# flags bits
+FLAG_FACE = 1          # face visible
+FLAG_FRESH = 2         # detectors ran on this frame (not a held result)
+FLAG_VOICE_ALERT = 4   # a spoken warning was issued since the previous sample
+FLAG_EMERGENCY = 8     # emergency flow triggered since the previous sample
+
+NAN = float("nan")
+
+
+def _nan_if_none(value):
+    return NAN if value is None else float(value)
+
+
+class TelemetryRecorder:
+    def __init__(self, trip_id=None, driver_id=None, root=TRIPS_DIR,
+                 sample_hz=SAMPLE_HZ, segment_records=SEGMENT_RECORDS):
+        self.trip_id = trip_id or time.strftime("%Y%m%d_%H%M%S") + (f"_{driver_id}" if driver_id else "")
+        self.driver_id = driver_id
+        self.dir = os.path.join(root, self.trip_id)
+        self.interval = 1.0 / sample_hz if sample_hz > 0 else 0.0
+        self.sample_hz = sample_hz
+        self.segment_records = segment_records
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._pending = deque(maxlen=MAX_PENDING)
+        self._events = 0
+        self._next_sample = 0.0
+        self._dropped = 0
+
+        self._segment = None
+        self._segment_counts = []
+        self._records = 0
+        self._started = time.time()
+        self._last_sync = 0.0
+
+        self._wake = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._write_meta(final=False)
+        print(f"📼 Telemetry recording trip {self.trip_id}")
+
+    # ---------------- HOT PATH (monitoring loop) ----------------
+    def mark(self, flag):
+        """Attaches an event flag (voice alert, emergency) to the next sample."""
+        self._events |= flag
+
+    def sample(self, session, now=None):
+        """Records the session's latest signals if a sample is due. Costs a few microseconds."""
+        now = time.time() if now is None else now
+        if now < self._next_sample:
+            return False
+        self._next_sample = now + self.interval
+
+        drowsiness, head_pose = session.drowsiness, session.head_pose
+        flags = self._events
+        self._events = 0
+        if drowsiness.last_ear is not None:
+            flags |= FLAG_FACE
+        if session.last_ran:
+            flags |= FLAG_FRESH
+
+        if len(self._pending) == self._pending.maxlen:
+            self._dropped += 1
+        self._pending.append((
+            now,
+            _nan_if_none(drowsiness.last_ear), _nan_if_none(drowsiness.last_mar),
+            _nan_if_none(head_pose.last_yaw), _nan_if_none(head_pose.last_pitch),
+            min(int(drowsiness.fatigue_score), 65535),
+            float(session.phone.last_confidence),
+            session.drowsy_level, session.head_pose_level, session.phone_level,
+            flags,
+        ))
+        return True
+
+    # ---------------- WRITER THREAD ----------------
+    def _run(self):
+        while self._running:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+        self._sync()
+
+    def _drain(self):
+        if not self._pending:
+            return
+        items = []
+        while self._pending:
+            items.append(self._pending.popleft())
+        records = np.array(items, dtype=RECORD_DTYPE)
+
+        offset = 0
+        while offset < len(records):
+            if self._segment is None or self._segment_counts[-1] == self.segment_records:
+                self._open_segment()
+            count = self._segment_counts[-1]
+            take = min(len(records) - offset, self.segment_records - count)
+            self._segment[count:count + take] = records[offset:offset + take]
+            self._segment_counts[-1] += take
+            offset += take
+        self._records += len(records)
+
+        if time.time() - self._last_sync >= SYNC_INTERVAL:
+            self._sync()
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.flush()
+        path = os.path.join(self.dir, f"seg_{len(self._segment_counts):05d}.npy")
+        # Pre-sized file, filled in place; trip.json says how many rows are valid
+        self._segment = np.lib.format.open_memmap(path, mode="w+", dtype=RECORD_DTYPE,
+                                                  shape=(self.segment_records,))
+        self._segment_counts.append(0)
+
+    def _sync(self):
+        if self._segment is not None:
+            self._segment.flush()
+        self._write_meta(final=not self._running)
+        self._last_sync = time.time()
+
+    def _write_meta(self, final):
+        meta = {
+            "trip_id": self.trip_id,
+            "driver_id": self.driver_id,
+            "start": self._started,
+            "end": time.time() if final else None,
+            "sample_hz": self.sample_hz,
+            "records": self._records,
+            "segment_counts": self._segment_counts,
+            "dropped": self._dropped,
+            "dtype": RECORD_DTYPE.descr,
+        }
+        tmp_path = os.path.join(self.dir, "trip.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.dir, "trip.json"))
+
+    # ---------------- LIFECYCLE ----------------
+    def close(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._segment = None
+        print(f"📼 Telemetry saved: {self._records} samples in {self.dir}")
+
+    def stats(self):
+        return {
+            "trip_id": self.trip_id,
+            "records": self._records,
+            "pending": len(self._pending),
+            "dropped": self._dropped,
+            "segments": len(self._segment_counts),
+            "bytes": self._records * RECORD_DTYPE.itemsize,
+        }
+
+
+# ---------------- READING ----------------
+def read_trip_meta(trip_id, root=TRIPS_DIR):
+    with open(os.path.join(root, trip_id, "trip.json"), "r") as f:
+        return json.load(f)
+
+
+def load_trip(trip_id, root=TRIPS_DIR, start_record=0):
+    """Returns the trip's valid records (from start_record on) as one structured array."""
+    meta = read_trip_meta(trip_id, root)
+    parts, base = [], 0
+    for i, count in enumerate(meta["segment_counts"]):
+        if base + count > start_record:
+            seg = np.load(os.path.join(root, trip_id, f"seg_{i:05d}.npy"), mmap_mode="r")
+            parts.append(np.array(seg[max(0, start_record - base):count]))
+        base += count
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+
+
+def list_trips(root=TRIPS_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root, d, "trip.json")))
@@ -0,0 +1,308 @@
+"""
+Trip analytics.
+Folds recorded trip telemetry into per-minute, per-hour and per-trip rollups
+(SQLite) as the samples arrive. Only the records added since the last pass
+are read, and the API answers from the rollup tables without touching the
+raw samples, so queries stay in the millisecond range over a year of trips.
+
+Rollups:
+  trips         one row per trip: totals and event counts
+  trip_minutes  per trip and minute: samples, eyes-closed samples, seconds per state
+  driver_hours  per driver and clock hour: same counters (PERCLOS by hour of day)
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .telemetry import TRIPS_DIR, FLAG_EMERGENCY, FLAG_FACE, FLAG_VOICE_ALERT, list_trips, load_trip, read_trip_meta
+
+# ---------------- CONFIG ----------------
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", "trip_analytics.db")
+UPDATE_INTERVAL = 30.0        # background pass over the trips folder (seconds)
+EYE_CLOSED_EAR = 0.21         # same as drowsiness_detection.EYE_AR_THRESH
+MAX_SAMPLE_GAP = 1.0          # longer gaps (pauses, camera loss) are not counted as time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    trip_id TEXT PRIMARY KEY,
+    driver_id TEXT,
+    start REAL,
+    last_sample REAL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    samples INTEGER NOT NULL DEFAULT 0,
+    face_samples INTEGER NOT NULL DEFAULT 0,
+    closed_samples INTEGER NOT NULL DEFAULT 0,
+    seconds REAL NOT NULL DEFAULT 0,
+    drowsy_s REAL NOT NULL DEFAULT 0,
+    distracted_s REAL NOT NULL DEFAULT 0,
+    phone_s REAL NOT NULL DEFAULT 0,
+    drowsy_events INTEGER NOT NULL DEFAULT 0,
+    distraction_events INTEGER NOT NULL DEFAULT 0,
+    phone_events INTEGER NOT NULL DEFAULT 0,
+    voice_alerts INTEGER NOT NULL DEFAULT 0,
+    emergencies INTEGER NOT NULL DEFAULT 0,
+    prev_t REAL,
+    prev_drowsy INTEGER NOT NULL DEFAULT 0,
+    prev_head INTEGER NOT NULL DEFAULT 0,
+    prev_phone INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_trips_driver ON trips (driver_id, start);
+
+CREATE TABLE IF NOT EXISTS trip_minutes (
+    trip_id TEXT NOT NULL,
+    minute INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    face_samples INTEGER NOT NULL,
+    closed_samples INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    drowsy_s REAL NOT NULL,
+    distracted_s REAL NOT NULL,
+    phone_s REAL NOT NULL,
+    PRIMARY KEY (trip_id, minute)
+);
+
+CREATE TABLE IF NOT EXISTS driver_hours (
+    driver_id TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    face_samples INTEGER NOT NULL,
+    closed_samples INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    drowsy_s REAL NOT NULL,
+    distracted_s REAL NOT NULL,
+    phone_s REAL NOT NULL,
+    PRIMARY KEY (driver_id, hour)
+);
+"""
+
+BUCKET_COLUMNS = ("samples", "face_samples", "closed_samples", "seconds", "drowsy_s", "distracted_s", "phone_s")
+
+
+def _rising_edges(active, previous):
+    """Number of False->True transitions, continuing from the previous batch's last state."""
+    if len(active) == 0:
+        return 0
+    before = np.concatenate(([bool(previous)], active[:-1]))
+    return int(np.count_nonzero(active & ~before))
+
+
+def _perclos(face_samples, closed_samples):
+    return round(100.0 * closed_samples / face_samples, 2) if face_samples else None
+
+
+class TripAnalytics:
+    def __init__(self, db_path=ANALYTICS_DB_PATH, trips_dir=TRIPS_DIR):
+        self.db_path = db_path
+        self.trips_dir = trips_dir
+        self._local = threading.local()
+        self._ingest_lock = threading.Lock()
+        with self._ingest_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------- INGEST ----------------
+    def ingest(self, trip_id):
+        """Folds the trip's new samples into the rollups. Returns the number of samples added."""
+        with self._ingest_lock:
+            try:
+                meta = read_trip_meta(trip_id, self.trips_dir)
+            except (OSError, ValueError):
+                return 0
+
+            conn = self._conn()
+            row = conn.execute("SELECT * FROM trips WHERE trip_id = ?", (trip_id,)).fetchone()
+            processed = row["processed"] if row else 0
+            if meta["records"] <= processed:
+                return 0
+
+            records = load_trip(trip_id, self.trips_dir, start_record=processed)
+            if len(records) == 0:
+                return 0
+            driver_id = meta.get("driver_id") or "unknown"
+            prev = dict(row) if row else {"prev_t": None, "prev_drowsy": 0, "prev_head": 0, "prev_phone": 0}
+
+            t = records["t"]
+            # Time each sample stands for: gap to the previous sample, capped
+            dt = np.diff(t, prepend=prev["prev_t"] if prev["prev_t"] is not None else t[0])
+            if prev["prev_t"] is None and len(dt):
+                dt[0] = 1.0 / meta["sample_hz"] if meta.get("sample_hz") else 0.0
+            dt = np.where((dt > 0) & (dt <= MAX_SAMPLE_GAP), dt, 0.0)
+
+            face = (records["flags"] & FLAG_FACE) > 0
+            closed = face & (records["ear"].astype(np.float32) < EYE_CLOSED_EAR)
+            drowsy = records["drowsy"] >= 2
+            distracted = records["head"] >= 1
+            phone = records["phone"] >= 1
+
+            columns = {
+                "samples": np.ones(len(t)),
+                "face_samples": face.astype(np.float64),
+                "closed_samples": closed.astype(np.float64),
+                "seconds": dt,
+                "drowsy_s": dt * drowsy,
+                "distracted_s": dt * distracted,
+                "phone_s": dt * phone,
+            }
+
+            with conn:
+                self._add_buckets(conn, "trip_minutes", "trip_id", trip_id, (t // 60).astype(np.int64), columns)
+                self._add_buckets(conn, "driver_hours", "driver_id", driver_id, (t // 3600).astype(np.int64), columns)
+
+                totals = {name: float(values.sum()) for name, values in columns.items()}
+                conn.execute("""
+                    INSERT INTO trips (trip_id, driver_id, start) VALUES (?, ?, ?)
+                    ON CONFLICT(trip_id) DO NOTHING""", (trip_id, driver_id, meta.get("start")))
+                conn.execute("""
+                    UPDATE trips SET
+                        last_sample = ?, processed = processed + ?,
+                        samples = samples + ?, face_samples = face_samples + ?, closed_samples = closed_samples + ?,
+                        seconds = seconds + ?, drowsy_s = drowsy_s + ?, distracted_s = distracted_s + ?, phone_s = phone_s + ?,
+                        drowsy_events = drowsy_events + ?, distraction_events = distraction_events + ?,
+                        phone_events = phone_events + ?, voice_alerts = voice_alerts + ?, emergencies = emergencies + ?,
+                        prev_t = ?, prev_drowsy = ?, prev_head = ?, prev_phone = ?
+                    WHERE trip_id = ?""", (
+                    float(t[-1]), len(records),
+                    int(totals["samples"]), int(totals["face_samples"]), int(totals["closed_samples"]),
+                    totals["seconds"], totals["drowsy_s"], totals["distracted_s"], totals["phone_s"],
+                    _rising_edges(drowsy, prev["prev_drowsy"]), _rising_edges(distracted, prev["prev_head"]),
+                    _rising_edges(phone, prev["prev_phone"]),
+                    int(np.count_nonzero(records["flags"] & FLAG_VOICE_ALERT)),
+                    int(np.count_nonzero(records["flags"] & FLAG_EMERGENCY)),
+                    float(t[-1]), int(drowsy[-1]), int(distracted[-1]), int(phone[-1]),
+                    trip_id))
+            return len(records)
+
+    @staticmethod
+    def _add_buckets(conn, table, key_column, key, buckets, columns):
+        """Sums each column per bucket (records are time-ordered) and adds it to the table."""
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        sums = {name: np.add.reduceat(values, starts) for name, values in columns.items()}
+        rows = [
+            (key, int(buckets[s]), *(float(sums[name][i]) for name in BUCKET_COLUMNS))
+            for i, s in enumerate(starts)
+        ]
+        bucket_column = "minute" if table == "trip_minutes" else "hour"
+        conn.executemany(f"""
+            INSERT INTO {table} ({key_column}, {bucket_column}, {', '.join(BUCKET_COLUMNS)})
+            VALUES (?, ?, {', '.join('?' * len(BUCKET_COLUMNS))})
+            ON CONFLICT({key_column}, {bucket_column}) DO UPDATE SET """
+            + ", ".join(f"{c} = {c} + excluded.{c}" for c in BUCKET_COLUMNS), rows)
+
+    def ingest_all(self):
+        return sum(self.ingest(trip_id) for trip_id in list_trips(self.trips_dir))
+
+    # ---------------- QUERIES ----------------
+    def trip_summary(self, trip_id):
+        self.ingest(trip_id)  # cheap when nothing new was recorded
+        conn = self._conn()
+        row = conn.execute("SELECT * FROM trips WHERE trip_id = ?", (trip_id,)).fetchone()
+        if row is None:
+            return None
+
+        hours = conn.execute("""
+            SELECT minute / 60 AS hour, SUM(face_samples) AS face, SUM(closed_samples) AS closed
+            FROM trip_minutes WHERE trip_id = ? GROUP BY minute / 60 ORDER BY hour""", (trip_id,)).fetchall()
+        return {
+            "trip_id": trip_id,
+            "driver_id": row["driver_id"],
+            "start": row["start"],
+            "last_sample": row["last_sample"],
+            "driving_minutes": round(row["seconds"] / 60.0, 2),
+            "minutes_drowsy": round(row["drowsy_s"] / 60.0, 2),
+            "minutes_distracted": round(row["distracted_s"] / 60.0, 2),
+            "phone_use_seconds": round(row["phone_s"], 1),
+            "drowsy_events": row["drowsy_events"],
+            "distraction_events": row["distraction_events"],
+            "phone_events": row["phone_events"],
+            "voice_alerts": row["voice_alerts"],
+            "emergencies": row["emergencies"],
+            "perclos": _perclos(row["face_samples"], row["closed_samples"]),
+            "perclos_by_hour": [
+                {"hour_start": h["hour"] * 3600, "perclos": _perclos(h["face"], h["closed"])} for h in hours
+            ],
+        }
+
+    def driver_stats(self, driver_id, since=None):
+        """Totals over the driver's trips (optionally since an epoch time) and PERCLOS by hour of day."""
+        conn = self._conn()
+        since = since or 0
+        totals = conn.execute("""
+            SELECT COUNT(*) AS trips, SUM(seconds) AS seconds, SUM(drowsy_s) AS drowsy_s,
+                   SUM(distracted_s) AS distracted_s, SUM(phone_s) AS phone_s,
+                   SUM(drowsy_events) AS drowsy_events, SUM(distraction_events) AS distraction_events,
+                   SUM(phone_events) AS phone_events, SUM(voice_alerts) AS voice_alerts,
+                   SUM(emergencies) AS emergencies, SUM(face_samples) AS face, SUM(closed_samples) AS closed
+            FROM trips WHERE driver_id = ? AND start >= ?""", (driver_id, since)).fetchone()
+        if not totals["trips"]:
+            return None
+
+        # Local hour of day (fixed offset of this machine's timezone)
+        offset = time.localtime().tm_gmtoff // 3600
+        by_hour = conn.execute("""
+            SELECT ((hour + ?) % 24 + 24) % 24 AS hod, SUM(face_samples) AS face, SUM(closed_samples) AS closed,
+                   SUM(seconds) AS seconds
+            FROM driver_hours WHERE driver_id = ? AND hour >= ? GROUP BY hod ORDER BY hod""",
+            (offset, driver_id, int(since // 3600))).fetchall()
+
+        return {
+            "driver_id": driver_id,
+            "trips": totals["trips"],
+            "driving_hours": round((totals["seconds"] or 0) / 3600.0, 2),
+            "minutes_drowsy": round((totals["drowsy_s"] or 0) / 60.0, 2),
+            "minutes_distracted": round((totals["distracted_s"] or 0) / 60.0, 2),
+            "phone_use_seconds": round(totals["phone_s"] or 0, 1),
+            "drowsy_events": totals["drowsy_events"],
+            "distraction_events": totals["distraction_events"],
+            "phone_events": totals["phone_events"],
+            "voice_alerts": totals["voice_alerts"],
+            "emergencies": totals["emergencies"],
+            "perclos": _perclos(totals["face"], totals["closed"]),
+            "perclos_by_hour_of_day": [
+                {"hour": h["hod"], "perclos": _perclos(h["face"], h["closed"]),
+                 "driving_minutes": round(h["seconds"] / 60.0, 1)} for h in by_hour
+            ],
+        }
+
+    def recent_trips(self, driver_id, limit=20):
+        rows = self._conn().execute(
+            "SELECT trip_id FROM trips WHERE driver_id = ? ORDER BY start DESC LIMIT ?", (driver_id, limit)).fetchall()
+        return [r["trip_id"] for r in rows]
+
+
+# ---------------- SHARED INSTANCE ----------------
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_trip_analytics():
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = TripAnalytics()
+        return _analytics
+
+
+def start_analytics_updater(interval=UPDATE_INTERVAL):
+    """Background pass that keeps the rollups current while trips are recorded."""
+    def loop():
+        while True:
+            try:
+                get_trip_analytics().ingest_all()
+            except Exception as e:
+                print(f"⚠️ Trip analytics update failed: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=loop, daemon=True).start()
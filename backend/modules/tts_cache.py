@@ -0,0 +1,240 @@
+"""
+Disk cache for synthesized speech.
+edge-tts audio (MP3) is stored under tts_cache/<sha256>.mp3, keyed by the
+text plus every voice parameter, so changing the voice never plays stale
+audio. The cache is an LRU bounded by total size (TTS_CACHE_MB): a hit is a
+local file read instead of a network round-trip, and the least recently
+spoken phrases are evicted first. File mtimes carry the recency across restarts.
+
+Long texts (trip updates, WhatsApp messages) are synthesized sentence by
+sentence: iter_audio() yields the first sentence as soon as it is ready and
+synthesizes the rest while it plays. Audio never touches a temp file.
+
+    audio = get_tts_cache().get_audio("Keep your eyes on the road.", VOICE)
+    for audio in get_tts_cache().iter_audio(long_text, VOICE, cache=False): ...
+
+One-off text (names, messages, trip updates) is passed with cache=False: it
+would only evict alert phrases and drag the hit rate down.
+"""
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+
+import edge_tts
+
+# ---------------- CONFIG ----------------
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+MAX_BYTES = int(float(os.getenv("TTS_CACHE_MB", "50")) * 1024 * 1024)  # ~3000 short phrases
+PIPELINE_MIN_CHARS = 100   # shorter texts (all alerts) are one piece, one cache entry
+MIN_PIECE_CHARS = 40       # fragments like "Okay." are merged into the next sentence
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def cache_key(text, voice):
+    params = "|".join(f"{name}={voice[name]}" for name in sorted(voice))
+    return hashlib.sha256(f"{params}\n{text}".encode("utf-8")).hexdigest()
+
+
+def split_sentences(text):
+    """Pieces to synthesize separately: the whole text if short, else sentences of MIN_PIECE_CHARS or more."""
+    if len(text) <= PIPELINE_MIN_CHARS:
+        return [text]
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= MIN_PIECE_CHARS:
+            pieces.append(current)
+            current = ""
+    if current:
+        if pieces:
+            pieces[-1] = f"{pieces[-1]} {current}"
+        else:
+            pieces.append(current)
+    return pieces
+
+
+async def _synthesize(text, voice):
+    # edge-tts streams MP3 chunks; they are gathered in memory, no temp file
+    communicate = edge_tts.Communicate(text, **voice)
+    chunks = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            chunks.append(chunk["data"])
+    return b"".join(chunks)
+
+
+def synthesize(text, voice):
+    """Synthesizes `text` over the network (blocking). Returns MP3 bytes."""
+    return asyncio.run(_synthesize(text, voice))
+
+
+class TTSCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.root, key + ".mp3")
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # interrupted write
+            elif name.endswith(".mp3"):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        # caller holds self._lock
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # ---------------- LOOKUP ----------------
+    def get(self, text, voice):
+        """Cached audio bytes, or None. Counts towards the hit rate."""
+        key = cache_key(text, voice)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self._path(key))  # recency survives a restart
+        except OSError:
+            with self._lock:
+                self._bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, text, voice, audio):
+        if not audio:
+            return
+        key = cache_key(text, voice)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, path)  # readers never see a half-written file
+        with self._lock:
+            self._bytes += len(audio) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self._evict()
+
+    def get_audio(self, text, voice, cache=True):
+        """Audio for `text`: from the cache, else synthesized and stored. cache=False bypasses the cache."""
+        if not cache:
+            return synthesize(text, voice)
+        audio = self.get(text, voice)
+        if audio is None:
+            audio = synthesize(text, voice)
+            self.put(text, voice, audio)
+        return audio
+
+    def iter_audio(self, text, voice, cache=True):
+        """
+        Yields the audio of `text` piece by piece (split_sentences). The next
+        pieces are synthesized on a helper thread while the caller plays the
+        current one. Closing the generator early (an interruption) stops it.
+        """
+        pieces = split_sentences(text)
+        if len(pieces) == 1:
+            yield self.get_audio(text, voice, cache)
+            return
+
+        ready = queue.Queue()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for piece in pieces:
+                    if stop.is_set():
+                        return
+                    ready.put(self.get_audio(piece, voice, cache))
+            except Exception as e:
+                ready.put(e)
+            finally:
+                ready.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                audio = ready.get()
+                if audio is None:
+                    return
+                if isinstance(audio, Exception):
+                    raise audio
+                yield audio
+        finally:
+            stop.set()
+
+    def prewarm(self, phrases, voice):
+        """Synthesizes the phrases that aren't cached yet (not counted in the hit rate)."""
+        added = 0
+        for text in phrases:
+            if cache_key(text, voice) in self:
+                continue
+            try:
+                self.put(text, voice, synthesize(text, voice))
+                added += 1
+            except Exception as e:
+                print(f"⚠️ TTS pre-warm failed for '{text}': {e}")
+        print(f"🔊 TTS cache ready: {len(phrases)} alert phrases ({added} synthesized), "
+              f"{len(self._entries)} entries")
+        return added
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "size_mb": round(self._bytes / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            }
+
+
+# ---------------- SHARED INSTANCE ----------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
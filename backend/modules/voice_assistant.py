@@ -7,11 +7,12 @@ import threading
 import time
 import os
 import random
-import edge_tts
-import asyncio
+import io
+import heapq
+import itertools
 from .dashboard_data import set_speaking_state
+from .tts_cache import get_tts_cache
 
-speak_lock = threading.Lock()
 mic_lock = threading.Lock() # To prevent collision between background listener and system alerts
 
 # Initialize Pygame Mixer for Music
@@ -23,6 +24,8 @@ except Exception as e:
 # Global Music State
 MUSIC_PLAYING = False
 SONG_QUEUE = []
+_music_intro = None  # SpeechHandle of "Playing music."; the first song waits for it
+_music_lock = threading.Lock()  # one song start at a time
 
 # Global Voice Command State (Async)
 LATEST_VOICE_COMMAND = None
@@ -38,38 +41,195 @@ def is_music_active():
 def load_songs():
     global SONG_QUEUE
 
-def speak(text):
-    with speak_lock:
-        print("AI Voice:", text)
+# The Final Tuned Voice Configuration (part of the TTS cache key)
+VOICE = {
+    "voice": "en-GB-RyanNeural",  # British Male
+    "rate": "+2%",                # Calm and steady pacing
+    "volume": "+120%",            # Confident volume
+    "pitch": "-12Hz",             # Slightly deepened for the Iron Man effect
+}
+
+# Fixed phrases spoken by the monitoring loops and the emergency flow. Call
+# sites use these constants so the spoken text always matches the cache entry.
+PHRASE_EYES_ON_ROAD = "Keep your eyes on the road."
+PHRASE_TIRED = "You seem tired. Stay alert."
+PHRASE_PHONE = "Do not use phone while driving."
+PHRASE_OFFER_SONG = "You seem very tired. Would you like me to play a song for you?"
+PHRASE_PULL_OVER = "Okay. Please pull over if you are tired."
+PHRASE_NO_RESPONSE = "No response. Calling emergency contact."
+PHRASE_ARE_YOU_OK = "Are you okay? Please respond."
+PHRASE_RESPOND_AGAIN = "No response detected. Please respond again."
+PHRASE_SAFE = "Okay, you are safe."
+PHRASE_NOT_WELL = "You said you are not well."
+PHRASE_WONT_CALL = "Okay, I will not call anyone. Please drive safely."
+PHRASE_NO_CONFIRMATION = "No confirmation received. Calling emergency contact for safety."
+PHRASE_ABORTED_TOUCH = "Emergency aborted by driver."
+PHRASE_ABORTED_VOICE = "Emergency aborted by voice command."
+PHRASE_RECORDING = "Recording evidence."
+PHRASE_VIDEO_RECORDED = "Video recorded."
+PHRASE_EMAIL_SENT = "Email Sent."
+PHRASE_SENDING_WHATSAPP = "Sending Evidences on WhatsApp..."
+PHRASE_ALERTS_SENT = "Emergency alerts sent. Uploading data..."
+PHRASE_PLAYING_MUSIC = "Playing music."
+PHRASE_MUSIC_STOPPED = "Music stopped."
+
+# Synthesized once at startup so the first alert plays from the disk cache.
+# Only these are cached: one-off text (names, messages, trip updates) is
+# synthesized directly and never counted in the hit rate.
+ALERT_PHRASES = (
+    PHRASE_EYES_ON_ROAD, PHRASE_TIRED, PHRASE_PHONE, PHRASE_OFFER_SONG, PHRASE_PULL_OVER,
+    PHRASE_NO_RESPONSE, PHRASE_ARE_YOU_OK, PHRASE_RESPOND_AGAIN, PHRASE_SAFE, PHRASE_NOT_WELL,
+    PHRASE_WONT_CALL, PHRASE_NO_CONFIRMATION, PHRASE_ABORTED_TOUCH, PHRASE_ABORTED_VOICE,
+    PHRASE_RECORDING, PHRASE_VIDEO_RECORDED, PHRASE_EMAIL_SENT, PHRASE_SENDING_WHATSAPP,
+    PHRASE_ALERTS_SENT, PHRASE_PLAYING_MUSIC, PHRASE_MUSIC_STOPPED,
+)
+_CACHED_PHRASES = frozenset(ALERT_PHRASES)
+
+
+def prewarm_tts():
+    """Fills the TTS cache with ALERT_PHRASES on a background thread."""
+    threading.Thread(target=get_tts_cache().prewarm, args=(ALERT_PHRASES, VOICE), daemon=True).start()
+
+
+def get_tts_stats():
+    return get_tts_cache().stats()
+
+
+# ---------------- SPEECH QUEUE ----------------
+# speak() only enqueues: one worker thread synthesizes and plays, so the
+# camera loops never wait on audio. Lower number = more urgent.
+CRITICAL = 0   # emergency flow
+WARNING = 1    # safety alerts
+INFO = 2       # confirmations, messages from contacts
+CHATTER = 3    # trip updates
+
+# Seconds an item may wait in the queue before it is dropped as stale (None = never)
+MAX_AGE = {CRITICAL: None, WARNING: 5, INFO: 60, CHATTER: 30}
+SPEECH_POLL = 0.05  # playback check interval; bounds preemption latency
+
+_speech_queue = []  # heap of (priority, seq, handle)
+_speech_cond = threading.Condition()
+_speech_seq = itertools.count()
+_speech_worker = None
+_current_speech = None
+
+
+class SpeechHandle:
+    """Returned by speak(). wait() blocks until the text was spoken, dropped or interrupted."""
+
+    def __init__(self, text, priority, deadline):
+        self.text = text
+        self.priority = priority
+        self.deadline = deadline
+        self.status = "queued"  # queued, speaking, spoken, interrupted, dropped, failed
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _finish(self, status):
+        self.status = status
+        self._done.set()
+
+
+def speak(text, priority=INFO, max_age=None):
+    """
+    Queues `text` and returns a SpeechHandle right away. Critical alerts and
+    warnings interrupt less urgent speech; identical queued text is spoken once.
+    """
+    global _speech_worker
+    max_age = MAX_AGE[priority] if max_age is None else max_age
+    handle = SpeechHandle(text, priority, time.time() + max_age if max_age else None)
+    with _speech_cond:
+        for _, _, queued in _speech_queue:
+            if queued.text == text and queued.priority <= priority:
+                return queued
+        heapq.heappush(_speech_queue, (priority, next(_speech_seq), handle))
+        if _speech_worker is None:
+            _speech_worker = threading.Thread(target=_speech_loop, daemon=True)
+            _speech_worker.start()
+        _speech_cond.notify()
+    return handle
+
+
+def is_speaking():
+    return _current_speech is not None
+
+
+def _preempted(handle):
+    with _speech_cond:
+        if not _speech_queue:
+            return False
+        urgent, _, head = _speech_queue[0]
+        if head.deadline and time.time() > head.deadline:
+            return False  # will be dropped, not worth cutting in for
+        return urgent < handle.priority and urgent <= WARNING
+
+
+def _speech_loop():
+    global _current_speech
+    while True:
+        with _speech_cond:
+            while not _speech_queue:
+                _speech_cond.wait()
+            _, _, handle = heapq.heappop(_speech_queue)
+            if handle.deadline and time.time() > handle.deadline:
+                print(f"🔇 Dropped stale speech: {handle.text}")
+                handle._finish("dropped")
+                continue
+            _current_speech = handle
         try:
-            set_speaking_state(True)
-
-            filename = f"temp_voice_{int(time.time())}.mp3"
+            _play_speech(handle)
+        finally:
+            with _speech_cond:
+                _current_speech = None
 
-            # The Final Tuned Voice Configuration
-            communicate = edge_tts.Communicate(
-                text,
-                "en-GB-RyanNeural",  # British Male
-                rate="+2%",          # Calm and steady pacing
-                volume="+120%",       # Confident volume
-                pitch="-12Hz"         # Slightly deepened for the Iron Man effect
-            )
-            asyncio.run(communicate.save(filename))
 
-            pygame.mixer.music.load(filename)
-            pygame.mixer.music.play()
+def _play_audio(audio, handle):
+    """Plays MP3 bytes from memory. Returns False if more urgent speech cut in."""
+    pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+    pygame.mixer.music.play()
+    try:
+        while pygame.mixer.music.get_busy():
+            if _preempted(handle):
+                pygame.mixer.music.stop()
+                return False
+            time.sleep(SPEECH_POLL)
+        return True
+    finally:
+        pygame.mixer.music.unload()
+
+
+def _play_speech(handle):
+    print("AI Voice:", handle.text)
+    handle.status = "speaking"
+    status = "spoken"
+    try:
+        set_speaking_state(True)
 
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
+        # Long texts play sentence by sentence while the rest is synthesized
+        pieces = get_tts_cache().iter_audio(handle.text, VOICE, cache=handle.text in _CACHED_PHRASES)
+        try:
+            for audio in pieces:
+                if _preempted(handle) or not _play_audio(audio, handle):
+                    status = "interrupted"
+                    print(f"⏭️ Interrupted: {handle.text}")
+                    break
+        finally:
+            pieces.close()
 
-            pygame.mixer.music.unload()
-            os.remove(filename)
+    except Exception as e:
+        print("Voice error:", e)
+        status = "failed"
+    finally:
+        # ---> NEW: TURN OFF DANCING BARS (Back to circles)
+        set_speaking_state(False)
+        handle._finish(status)
 
-        except Exception as e:
-            print("Voice error:", e)
-        finally:
-            # ---> NEW: TURN OFF DANCING BARS (Back to circles)
-            set_speaking_state(False)
 
 YES_WORDS = [
     "yes", "yeah", "yep", "yup", "ok", "okay", "sure", "alright",
@@ -147,10 +307,11 @@ def listen_voice(timeout=5):
 
 # ---------------- ASYNC LISTENING ----------------
 
-def start_listening_thread(timeout=5):
+def start_listening_thread(timeout=5, after=None):
     """
     Starts a background thread to listen for voice input.
     Does NOT block the main program.
+    after: a SpeechHandle (the question) to finish before the mic opens.
     """
     global IS_LISTENING, LATEST_VOICE_COMMAND
     
@@ -163,6 +324,8 @@ def start_listening_thread(timeout=5):
     def worker():
         global IS_LISTENING, LATEST_VOICE_COMMAND
         try:
+            if after is not None:
+                after.wait()
             response = listen_voice(timeout)
             LATEST_VOICE_COMMAND = classify_response(response)
         except Exception as e:
@@ -205,7 +368,7 @@ def play_local_music():
     """
     Starts playing music from the backend/songs directory using Pygame.
     """
-    global MUSIC_PLAYING
+    global MUSIC_PLAYING, _music_intro
     
     if not SONG_QUEUE:
         load_songs()
@@ -214,9 +377,17 @@ def play_local_music():
         speak("I did not find any songs in the songs folder.")
         return
 
+    # speak() returns at once and plays through the same mixer, so the first
+    # song must wait until the announcement is over
     MUSIC_PLAYING = True
-    speak("Playing music.")
-    play_next_song()
+    _music_intro = speak(PHRASE_PLAYING_MUSIC)
+    threading.Thread(target=_start_after_intro, args=(_music_intro,), daemon=True).start()
+
+def _start_after_intro(intro):
+    intro.wait()
+    with _music_lock:
+        if MUSIC_PLAYING and not pygame.mixer.music.get_busy():
+            play_next_song()
 
 def play_next_song():
     """
@@ -250,7 +421,7 @@ def stop_music():
     if MUSIC_PLAYING:
         MUSIC_PLAYING = False
         pygame.mixer.music.stop()
-        speak("Music stopped.")
+        speak(PHRASE_MUSIC_STOPPED)
 
 def check_music_queue():
     """
@@ -258,10 +429,11 @@ def check_music_queue():
     If finished, plays the next one.
     """
     global MUSIC_PLAYING
-    if MUSIC_PLAYING:
+    if MUSIC_PLAYING and not is_speaking() and (_music_intro is None or _music_intro.done):
         # get_busy() returns True if music is playing
-        if not pygame.mixer.music.get_busy():
-            play_next_song()
+        with _music_lock:
+            if not pygame.mixer.music.get_busy():
+                play_next_song()
 
 def play_spotify(query=""):
     """
@@ -270,7 +442,7 @@ def play_spotify(query=""):
     play_local_music()
 
 def read_message_from_image(image_path, sender="Arman"):
-    speak(f"{sender} sent you a message with an image. Would you like me to read it?")
+    speak(f"{sender} sent you a message with an image. Would you like me to read it?").wait()  # finish asking before the mic opens
 
     attempts = 0
     decision = "unknown"
@@ -280,12 +452,12 @@ def read_message_from_image(image_path, sender="Arman"):
         decision = classify_response(response)
 
         if decision == "unknown":
-            speak("Sorry, I did not hear you.")
+            speak("Sorry, I did not hear you.").wait()
             attempts += 1
 
     # If still unknown after 3 tries, fallback to keyboard
     if decision == "unknown":
-        speak("Please type yes or no.")
+        speak("Please type yes or no.").wait()
         try:
             response = input("Type yes or no: ").lower()
             decision = classify_response(response)
@@ -1,7 +1,8 @@
 import os
 import time
 import requests
-from flask import Flask, request
+from quart import Blueprint, request
+from quart.utils import run_sync
 from twilio.twiml.messaging_response import MessagingResponse
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -76,22 +77,22 @@ def analyze_image_with_gemini(image_url: str, max_retries: int = 2, delay: int =
     return "I am unable to analyze images right now, sir."
 
 
-def handle_whatsapp_message():
+def handle_whatsapp_message(values):
     """
     Processes incoming WhatsApp messages via Twilio webhook.
-    This is the main logic for the /whatsapp endpoint.
+    This is the main logic for the /whatsapp endpoint (values = the webhook form fields).
     """
-    incoming_msg = request.values.get('Body', '').lower()
-    from_number = request.values.get('From', '')
-    profile_name = request.values.get('ProfileName', 'the sender')
-    num_media = int(request.values.get('NumMedia', 0))
+    incoming_msg = values.get('Body', '').lower()
+    from_number = values.get('From', '')
+    profile_name = values.get('ProfileName', 'the sender')
+    num_media = int(values.get('NumMedia', 0))
 
     print(f"📩 Message from {profile_name} ({from_number})")
 
     # --- Image Handling ---
     if num_media > 0:
-        media_url = request.values.get('MediaUrl0')
-        media_type = request.values.get('MediaContentType0')
+        media_url = values.get('MediaUrl0')
+        media_type = values.get('MediaContentType0')
 
         if media_type and 'image' in media_type:
             speak(f"Message from {profile_name}. They sent a photo.")
@@ -109,18 +110,12 @@ def handle_whatsapp_message():
     return str(MessagingResponse())
 
 
-def start_whatsapp_server():
-    """
-    Starts a separate Flask server on port 5003 to handle WhatsApp webhooks.
-    This runs in a separate thread from the main application.
-    """
-    bot_app = Flask(__name__)
+# ---------------- WEBHOOK ("whatsapp" blueprint, served by server.py) ----------------
+bp = Blueprint("whatsapp", __name__)
 
-    @bot_app.route("/whatsapp", methods=['POST'])
-    def whatsapp_webhook():
-        return handle_whatsapp_message()
 
-    print("📞 WhatsApp Bot Server listening on port 5003")
-    # Note: Using 'werkzeug' reloader is not suitable for threaded production use.
-    # This is fine for this project's structure.
-    bot_app.run(port=5003, debug=False)
\ No newline at end of file
+@bp.route("/whatsapp", methods=['POST'])
+async def whatsapp_webhook():
+    values = await request.values
+    # Speech and image analysis block; keep them off the event loop
+    return await run_sync(handle_whatsapp_message)(values)
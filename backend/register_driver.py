@@ -5,6 +5,8 @@ import time
 import json
 from dotenv import load_dotenv
 from modules.db_mysql import save_driver_to_db
+from modules.face_enrollment import enroll_async, ENROLL_FRAMES
+from modules.camera_broker import open_camera
 
 load_dotenv()
 
@@ -100,19 +102,16 @@ def capture_face(driver_name):
     print("3. Press 's' to SAVE and finish.")
     print("4. Press 'q' to CANCEL.")
     
-    cap = cv2.VideoCapture(0)
+    cap = open_camera()
     if not cap.isOpened():
         print("❌ Error: Could not open camera.")
         return None
 
     face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
     
-    save_path = "known_faces"
-    if not os.path.exists(save_path):
-        os.makedirs(save_path)
-        
-    filename = f"{driver_name.lower().replace(' ', '_')}.jpg"
-    full_path = os.path.join(save_path, filename)
+    driver_id = driver_name.lower().replace(' ', '_')
+    filename = f"{driver_id}.jpg"
+    burst, last_grab = [], 0
     
     while True:
         ret, frame = cap.read()
@@ -120,6 +119,7 @@ def capture_face(driver_name):
         
         # Flip for mirror effect
         frame = cv2.flip(frame, 1)
+        clean = frame.copy()  # the guide box must not end up in the embedding
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         faces = face_cascade.detectMultiScale(gray, 1.1, 4)
         
@@ -139,16 +139,29 @@ def capture_face(driver_name):
                 face_detected = True
                 cv2.putText(frame, "PERFECT! Press 's'", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
+        # Collecting a burst after 's': one aligned frame every 0.2s
+        if burst:
+            if face_detected and len(burst) < ENROLL_FRAMES and time.time() - last_grab >= 0.2:
+                burst.append(clean)
+                last_grab = time.time()
+            if len(burst) >= ENROLL_FRAMES:
+                print("⏳ Computing face embeddings...")
+                success, message = enroll_async(driver_id, burst).result()
+                burst = []
+                if success:
+                    print(f"✅ Face saved to known_faces/{filename}")
+                    cap.release()
+                    cv2.destroyAllWindows()
+                    return filename
+                print(f"⚠️ {message}")
+        
         cv2.imshow("Face Registration", frame)
         
         key = cv2.waitKey(1) & 0xFF
-        if key == ord('s'):
+        if key == ord('s') and not burst:
             if face_detected:
-                cv2.imwrite(full_path, frame)
-                print(f"✅ Face saved to {full_path}")
-                cap.release()
-                cv2.destroyAllWindows()
-                return filename
+                print("📸 Hold still...")
+                burst, last_grab = [clean], time.time()
             else:
                 print("⚠️ Face not aligned or not detected. Please position inside the box.")
         elif key == ord('q'):
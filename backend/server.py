@@ -0,0 +1,109 @@
+"""
+Smart Drive Assistant - web server.
+One ASGI application (Quart on Hypercorn) for every HTTP route that used to
+be spread over four Flask dev servers (ports 5000-5003):
+
+    auth       api_server.py           login, registration, face scan, sys_state
+    core       web_main.py             monitoring start/stop, dashboard, trips, /video-feed
+    dashboard  modules/dashboard_api   desktop-mode dashboard (main.py)
+    whatsapp   modules/whatsapp_bot    Twilio webhook (/whatsapp)
+
+MJPEG, SSE and long-poll responses are async generators on the event loop,
+so an open viewer costs a parked coroutine instead of a thread. Blocking work
+(database, face recognition, speech) runs on a bounded worker thread pool, and
+modules/admission.py caps concurrent requests per route class (503 + Retry-After
+when a budget is full). Counters: GET /api/system/server-stats.
+
+Usage (from backend/):
+    python server.py                    # http://0.0.0.0:5000
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from quart import Quart, jsonify
+from quart_cors import cors
+
+from modules.admission import AdmissionMiddleware, WORKER_THREADS
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+PORT = int(os.getenv("SERVER_PORT", "5000"))
+
+ALL_PARTS = ("auth", "core", "dashboard", "whatsapp")
+
+
+def _blueprint(part):
+    # Imported on demand: desktop mode (main.py) only needs dashboard + whatsapp
+    if part == "auth":
+        from api_server import bp
+    elif part == "core":
+        from web_main import bp
+    elif part == "dashboard":
+        from modules.dashboard_api import bp
+    elif part == "whatsapp":
+        from modules.whatsapp_bot import bp
+    else:
+        raise ValueError(f"Unknown server part: {part}")
+    return bp
+
+
+def create_app(parts=ALL_PARTS):
+    app = Quart(__name__)
+    app.config["RESPONSE_TIMEOUT"] = None  # MJPEG / SSE responses are open-ended
+    for part in parts:
+        app.register_blueprint(_blueprint(part))
+    app = cors(app, allow_origin="*")
+    admission = AdmissionMiddleware(app.asgi_app)
+    app.asgi_app = admission
+
+    @app.before_serving
+    async def _bounded_worker_pool():
+        # run_sync() and sync views use the loop's default executor
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="sda-worker"))
+
+    @app.route('/api/system/server-stats', methods=['GET'])
+    async def server_stats():
+        return jsonify({"success": True, "workers": WORKER_THREADS, "budgets": admission.stats(),
+                        "threads": threading.active_count()})
+
+    return app
+
+
+def _config():
+    config = Config()
+    config.bind = [f"{HOST}:{PORT}"]
+    config.accesslog = None
+    config.backlog = 128            # pending connections beyond this are refused by the OS
+    config.keep_alive_timeout = 5   # idle keep-alive sockets don't linger
+    config.graceful_timeout = 3
+    return config
+
+
+def main():
+    print("=" * 50)
+    print(f"🚀 Smart Drive Assistant server on http://{HOST}:{PORT}")
+    print("=" * 50)
+    asyncio.run(serve(create_app(), _config()))
+
+
+def serve_in_background(parts=ALL_PARTS):
+    """Runs the server on its own thread and event loop (for main.py's desktop mode)."""
+    def run():
+        # No signal handlers off the main thread: the server lives as long as the process
+        asyncio.run(serve(create_app(parts), _config(), shutdown_trigger=lambda: asyncio.Future()))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,40 @@
 """
-Headless Backend Entry Point for Web UI
-Runs the Flask APIs and background AI without cv2.imshow popups.
+Headless Backend Entry Point for Web UI ("core" blueprint, served by server.py)
+Runs the system/dashboard APIs and background AI without cv2.imshow popups.
 """
+import asyncio
 import threading
 import time
 import cv2
 import os
-from flask import Flask, jsonify, Response, request
-from flask_cors import CORS
+from quart import Blueprint, jsonify, Response, request
 from dotenv import load_dotenv
 
 # Import modules
 from modules.shared_state import set_current_driver
-from modules.dashboard_data import init_trip, update_status, set_ai_message, get_dashboard_json
+from modules.dashboard_data import DASHBOARD_STATE, init_trip, update_status, set_ai_message, get_dashboard_json, batch_updates
+from modules.event_stream import stream_changes, sse_response, conditional_json
 from modules.camera_manager import update_frame, latest_frame
-from modules.drowsiness_detection import detect_drowsiness
-from modules.head_pose import detect_head_pose
-from modules.phone_detection import detect_phone
-from modules.voice_assistant import speak, start_listening_thread, get_latest_command, is_listening, play_local_music, stop_music, check_music_queue
-from modules.emergency import handle_emergency
+from modules.camera_broker import open_camera
+from modules.stream_session import StreamSession
+from modules.telemetry import TelemetryRecorder, FLAG_VOICE_ALERT, FLAG_EMERGENCY
+from modules.trip_analytics import get_trip_analytics, start_analytics_updater
+from modules.signal_history import get_signal_history, HISTORY_SECONDS, MAX_POINTS
+from modules.voice_assistant import speak, WARNING, CRITICAL, prewarm_tts, get_tts_stats, start_listening_thread, get_latest_command, is_listening, play_local_music, stop_music, check_music_queue
+from modules.voice_assistant import PHRASE_EYES_ON_ROAD, PHRASE_TIRED, PHRASE_PHONE, PHRASE_OFFER_SONG, PHRASE_PULL_OVER, PHRASE_NO_RESPONSE
+from modules.emergency import start_emergency, emergency_active
 from modules.api_services import start_trip_monitoring, stop_trip_monitoring
-from modules.whatsapp_bot import start_whatsapp_server
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint("core", __name__)
 
 # --- GLOBAL STATE ---
 SYSTEM_ACTIVE = False
 _camera_lock = threading.Lock()
 _latest_jpeg = None
 cap = None
+MJPEG_POLL_INTERVAL = 1 / 30  # how often a viewer checks for a new frame
 
 
 def ai_monitoring_loop(profile):
@@ -46,19 +49,15 @@ def ai_monitoring_loop(profile):
     os.environ["EMAIL_RECEIVER"] = profile.get("email_receiver", "")
 
     set_current_driver(profile)
-    init_trip()
-    set_ai_message(f"Welcome {profile['name']}. System Active.")
+    with batch_updates():
+        init_trip()
+        set_ai_message(f"Welcome {profile['name']}. System Active.")
     
     start_trip_monitoring()
     speak(f"Welcome {profile['name']}. Have a safe drive.")
 
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    if not cap.isOpened():
-        cap = cv2.VideoCapture(0)
-    
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
+    # Shared camera: already open if face login just used it
+    cap = open_camera()
 
     # Variables for logic
     drowsy_warning_count = 0
@@ -69,6 +68,12 @@ def ai_monitoring_loop(profile):
     waiting_for_music_response = False
     music_prompt_time = 0
 
+    # Detector state for the driver camera (adaptive detection rate)
+    session = StreamSession("driver")
+    recorder = TelemetryRecorder(driver_id=profile.get("id"))
+    history = get_signal_history()
+    history.clear()  # charts show this trip only
+
     while SYSTEM_ACTIVE:
         ret, frame = cap.read()
         if not ret:
@@ -79,9 +84,10 @@ def ai_monitoring_loop(profile):
         update_frame(frame) # Save raw frame for emergency
 
         # --- AI DETECTION ---
-        frame, drowsy_level = detect_drowsiness(frame)
-        frame, head_pose_level = detect_head_pose(frame)
-        frame, phone_detected = detect_phone(frame)
+        hold_full_rate = head_distraction_start is not None or waiting_for_music_response
+        frame, drowsy_level, head_pose_level, phone_detected = session.process(frame, hold_full_rate)
+        recorder.sample(session)
+        history.record(session)
 
         is_distracted = (head_pose_level >= 1)
         update_status(drowsy_level, is_distracted, phone_detected)
@@ -110,7 +116,7 @@ def ai_monitoring_loop(profile):
                 waiting_for_music_response = False
                 last_interaction_time = now
             elif cmd == "no":
-                speak("Okay. Please pull over if you are tired.")
+                speak(PHRASE_PULL_OVER, WARNING)
                 set_ai_message("Driver refused music.")
                 drowsy_warning_count = 0
                 last_drowsy_time = now
@@ -118,19 +124,22 @@ def ai_monitoring_loop(profile):
                 last_interaction_time = now
             elif not is_listening() and cmd is None:
                 if now - music_prompt_time > 8:
-                    speak("No response. Calling emergency.")
-                    handle_emergency(cap)
+                    speak(PHRASE_NO_RESPONSE, CRITICAL)
+                    recorder.mark(FLAG_EMERGENCY)
+                    start_emergency()  # runs on its own thread
                     waiting_for_music_response = False
                     drowsy_warning_count = 0
                     last_drowsy_time = now
                     last_interaction_time = now
 
-        if now - last_interaction_time < 10:
+        # The emergency conversation owns the voice channel until it ends
+        if emergency_active() or now - last_interaction_time < 10:
             continue
 
         # Phone
         if phone_detected:
-            speak("Do not use phone while driving.")
+            speak(PHRASE_PHONE, WARNING)
+            recorder.mark(FLAG_VOICE_ALERT)
             set_ai_message("Phone usage detected.")
             last_interaction_time = now
 
@@ -138,7 +147,8 @@ def ai_monitoring_loop(profile):
         if drowsy_level >= 2:
             # 1st Attempt
             if drowsy_warning_count == 0 and (now - last_drowsy_time > 10):
-                speak("You seem tired. Stay alert.")
+                speak(PHRASE_TIRED, WARNING)
+                recorder.mark(FLAG_VOICE_ALERT)
                 set_ai_message("Drowsiness detected.")
                 drowsy_warning_count = 1
                 last_drowsy_time = now
@@ -146,9 +156,9 @@ def ai_monitoring_loop(profile):
 
             # 2nd Attempt
             elif drowsy_warning_count == 1 and (now - last_drowsy_time > 10) and not waiting_for_music_response:
-                speak("Would you like a song")
+                prompt = speak(PHRASE_OFFER_SONG, WARNING)
                 set_ai_message("Offering music assistance.")
-                start_listening_thread(timeout=5)
+                start_listening_thread(timeout=5, after=prompt)
                 waiting_for_music_response = True
                 music_prompt_time = now
                 last_interaction_time = now
@@ -159,13 +169,15 @@ def ai_monitoring_loop(profile):
                 head_distraction_start = now
             elif now - head_distraction_start > 4:
                 if head_warning_count < 2:
-                    speak("Keep your eyes on the road.")
+                    speak(PHRASE_EYES_ON_ROAD, WARNING)
+                    recorder.mark(FLAG_VOICE_ALERT)
                     set_ai_message("Distraction detected.")
                     head_warning_count += 1
                     head_distraction_start = now
                     last_interaction_time = now
                 else:
-                    handle_emergency(cap)
+                    recorder.mark(FLAG_EMERGENCY)
+                    start_emergency()  # runs on its own thread
                     head_distraction_start = None
                     head_warning_count = 0
                     last_interaction_time = now
@@ -175,53 +187,82 @@ def ai_monitoring_loop(profile):
 
     if cap:
         cap.release()
+    recorder.close()
+    get_trip_analytics().ingest(recorder.trip_id)
+    print(f"📉 Detection rate: {session.stats()}")
+    print(f"🔊 TTS cache: {get_tts_stats()}")
     print("🛑 AI Core Stopped.")
 
 # --- API ENDPOINTS ---
 
-@app.route('/api/system/start', methods=['POST'])
-def start_system():
+@bp.route('/api/system/start', methods=['POST'])
+async def start_system():
     global SYSTEM_ACTIVE
-    data = request.get_json()
+    data = await request.get_json()
     if not data or 'driver' not in data:
         return jsonify({"success": False, "error": "No driver data provided"}), 400
 
     if not SYSTEM_ACTIVE:
         SYSTEM_ACTIVE = True
         threading.Thread(target=ai_monitoring_loop, args=(data['driver'],), daemon=True).start()
-        # Start WhatsApp Bot
-        threading.Thread(target=start_whatsapp_server, daemon=True).start()
+        # The WhatsApp webhook is always served by the combined server (/whatsapp)
 
     return jsonify({"success": True, "message": "System started"})
 
 
-@app.route('/api/system/stop', methods=['POST'])
-def stop_system():
-    global SYSTEM_ACTIVE
-    SYSTEM_ACTIVE = False
+def _stop_background_services():
     stop_trip_monitoring()
     stop_music()
+
+
+@bp.route('/api/system/stop', methods=['POST'])
+async def stop_system():
+    global SYSTEM_ACTIVE
+    SYSTEM_ACTIVE = False
+    # Both may speak a confirmation; don't hold the request (or the event loop) for it
+    threading.Thread(target=_stop_background_services, daemon=True).start()
     return jsonify({"success": True})
 
 
-@app.route('/api/system/emergency/cancel', methods=['POST'])
-def cancel_emergency_route():
+@bp.route('/api/system/emergency/cancel', methods=['POST'])
+async def cancel_emergency_route():
     from modules.dashboard_data import set_emergency_state
     set_emergency_state("NONE", None) # Instantly aborts the countdown loop!
     return jsonify({"success": True, "message": "Emergency Cancelled"})
 
 
 
-@app.route('/api/dashboard/status', methods=['GET'])
-def get_dashboard_status():
-    """Endpoint for React to poll real-time data."""
+@bp.route('/api/dashboard/status', methods=['GET'])
+async def get_dashboard_status():
+    """
+    Endpoint for React to poll real-time data.
+    Supports If-None-Match (304 when unchanged) and ?wait=<s> long-polling.
+    trip_time is not part of the ETag; clients tick it from trip_start.
+    """
+    from modules.voice_assistant import is_music_active
+
+    def build():
+        data = get_dashboard_json()
+        data["is_music_playing"] = is_music_active()  # Inject the flag!
+        return data
+
+    return await conditional_json(build, DASHBOARD_STATE, extra_tag=lambda: "m" if is_music_active() else "")
+
+
+@bp.route('/api/dashboard/events', methods=['GET'])
+async def dashboard_events():
+    """Push channel: full state once, then only the fields that changed."""
     from modules.voice_assistant import is_music_active
 
-    data = get_dashboard_json()
-    data["is_music_playing"] = is_music_active()  # Inject the flag!
-    return jsonify(data)
+    def snapshot():
+        data = get_dashboard_json()
+        del data["trip_time"]  # ticks every second; the client derives it from trip_start
+        data["is_music_playing"] = is_music_active()
+        return data
+
+    return sse_response(stream_changes(snapshot, DASHBOARD_STATE))
 
-@app.route('/api/system/music/toggle', methods=['POST'])
+@bp.route('/api/system/music/toggle', methods=['POST'])
 def toggle_music_route():
     from modules.voice_assistant import is_music_active, stop_music, play_local_music
     if is_music_active():
@@ -231,7 +272,7 @@ def toggle_music_route():
         play_local_music()
     return jsonify({"success": True})
 
-@app.route('/api/system/music/next', methods=['POST'])
+@bp.route('/api/system/music/next', methods=['POST'])
 def next_music_route():
     from modules.voice_assistant import is_music_active, play_local_music, play_next_song
     if not is_music_active():
@@ -239,28 +280,87 @@ def next_music_route():
     else:
         play_next_song()
     return jsonify({"success": True})
-def _generate_mjpeg():
-    """Yields JPEG frames for React."""
+
+
+# --- TRIP ANALYTICS (served from rollups) ---
+
+@bp.route('/api/trips/<trip_id>/summary', methods=['GET'])
+def trip_summary_route(trip_id):
+    summary = get_trip_analytics().trip_summary(trip_id)
+    if summary is None:
+        return jsonify({"success": False, "error": "Trip not found"}), 404
+    return jsonify(summary)
+
+
+@bp.route('/api/drivers/<driver_id>/stats', methods=['GET'])
+def driver_stats_route(driver_id):
+    days = request.args.get('days', type=float)
+    since = time.time() - days * 86400 if days else None
+    stats = get_trip_analytics().driver_stats(driver_id, since=since)
+    if stats is None:
+        return jsonify({"success": False, "error": "No trips recorded for this driver"}), 404
+    stats["recent_trips"] = get_trip_analytics().recent_trips(driver_id)
+    return jsonify(stats)
+
+
+@bp.route('/api/system/tts-stats', methods=['GET'])
+def tts_stats_route():
+    """Speech cache counters (hit rate, size)."""
+    return jsonify({"success": True, "tts_cache": get_tts_stats()})
+
+
+# --- SIGNAL HISTORY (downsampled for charts) ---
+
+def _parse_window(value):
+    """'300s', '5m' or '300' -> seconds."""
+    value = (value or "300s").strip().lower()
+    scale = {"s": 1, "m": 60}.get(value[-1:])
+    try:
+        seconds = float(value[:-1]) * scale if scale else float(value)
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+@bp.route('/api/signals', methods=['GET'])
+def signals_route():
+    window = _parse_window(request.args.get('window'))
+    if window is None:
+        return jsonify({"success": False, "error": "window must look like 300s, 5m or 300"}), 400
+    window = min(window, HISTORY_SECONDS)
+    points = min(max(request.args.get('points', 200, type=int), 3), MAX_POINTS)
+
+    series, samples = get_signal_history().series(window, points)
+    return jsonify({"success": True, "window": window, "points": points, "samples": samples,
+                    "signals": series})
+
+
+async def _generate_mjpeg():
+    """Yields each new JPEG frame for React (a viewer is a coroutine, not a thread)."""
+    last = None
     while True:
-        with _camera_lock:
-            frame_data = _latest_jpeg
-        
-        if frame_data:
+        frame_data = _latest_jpeg
+
+        if frame_data and frame_data is not last:
+            last = frame_data
             yield (
                 b'--frame\r\n'
                 b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n'
             )
-        else:
-            time.sleep(0.1)
+        await asyncio.sleep(MJPEG_POLL_INTERVAL)
 
-@app.route('/video-feed')
-def video_feed():
+@bp.route('/video-feed')
+async def video_feed():
     return Response(_generate_mjpeg(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@bp.before_app_serving
+async def _start_background_jobs():
+    start_analytics_updater()
+    prewarm_tts()
+
+
 if __name__ == '__main__':
-    print("=" * 50)
-    print("🚀 SDA Headless Core Starting...")
-    print("=" * 50)
-    # Note: We run on port 5002 to not conflict with api_server.py which handles login.
-    # In a real prod setup, these would be combined into one server.
-    app.run(host='0.0.0.0', port=5002, debug=False, threaded=True)
\ No newline at end of file
+    # These routes are now one blueprint of the combined server (port 5000).
+    print("ℹ️  web_main.py is served by server.py now; starting the combined server...")
+    from server import main
+    main()
\ No newline at end of file
@@ -20,7 +20,7 @@ export const AuthProvider = ({ children }) => {
     // Call this function to end the trip
     const logout = async () => {
         try {
-            // Tell the Port 5002 backend to stop the AI camera and background threads
+            // Tell the backend to stop the AI camera and background threads
             await systemAPI.stopSystem();
         } catch (error) {
             console.error("Error stopping the system during logout:", error);
@@ -8,6 +8,12 @@ import TacticalMap from '../components/TacticalMap';
 import MusicPlayer from '../components/MusicPlayer';
 import AttentionBar from '../components/AttentionBar';
 
+const formatTripTime = (tripStart) => {
+    const elapsed = Math.max(0, Math.floor(Date.now() / 1000 - tripStart));
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${pad(Math.floor(elapsed / 3600))}:${pad(Math.floor((elapsed % 3600) / 60))}:${pad(elapsed % 60)}`;
+};
+
 const Dashboard = () => {
     const { driver, logout } = useAuth();
     const navigate = useNavigate();
@@ -47,29 +53,58 @@ const Dashboard = () => {
 
     useEffect(() => {
         if (!isSystemActive) return;
-        const intervalId = setInterval(async () => {
-            try {
-                const data = await systemAPI.getDashboardStatus();
-                setDashboardData({
-                    status: data.status || 'UNKNOWN',
-                    trip_time: data.trip_time || '00:00:00',
-                    weather: data.weather || '--',
-                    location: data.location || '--',
-                    is_speaking: data.is_speaking || false,
-                    is_music_playing: data.is_music_playing || false,
-                    emergency_status: data.emergency_status || 'NONE',       // <--- NEW
-                    emergency_countdown: data.emergency_countdown !== null ? data.emergency_countdown : null ,// <--- NEW
-                    traffic: data.traffic || '--',
-                    whatsapp_sender: data.whatsapp_sender || null
-                });
-
-                if (data.is_music_playing && !showMusicWidget) {
-                    setShowMusicWidget(true);
+        let latest = {};
+        let polling = false;
+        let clockId = null;
+
+        const render = () => {
+            setDashboardData({
+                status: latest.status || 'UNKNOWN',
+                trip_time: latest.trip_start ? formatTripTime(latest.trip_start) : (latest.trip_time || '00:00:00'),
+                weather: latest.weather || '--',
+                location: latest.location || '--',
+                is_speaking: latest.is_speaking || false,
+                is_music_playing: latest.is_music_playing || false,
+                emergency_status: latest.emergency_status || 'NONE',       // <--- NEW
+                emergency_countdown: latest.emergency_countdown !== undefined ? latest.emergency_countdown : null ,// <--- NEW
+                traffic: latest.traffic || '--',
+                whatsapp_sender: latest.whatsapp_sender || null
+            });
+            if (latest.is_music_playing) setShowMusicWidget(true);
+        };
+
+        const applyUpdate = (changes) => {
+            latest = { ...latest, ...changes };
+            render();
+        };
+
+        // Fallback: long-poll if the push channel is unavailable
+        const startPolling = async () => {
+            if (polling) return;
+            polling = true;
+            while (polling) {
+                try {
+                    applyUpdate(await systemAPI.getDashboardStatus(20));
+                } catch (error) {
+                    console.error("Telemetry error:", error);
+                    await new Promise((resolve) => setTimeout(resolve, (error.retryAfter || 1) * 1000));
                 }
-            } catch (error) { console.error("Telemetry error:", error); }
-        }, 500);
-        return () => clearInterval(intervalId);
-    }, [isSystemActive, showMusicWidget]);
+            }
+        };
+
+        const unsubscribe = systemAPI.subscribeDashboard(applyUpdate, (error) => {
+            console.warn("Dashboard stream unavailable, polling instead:", error);
+            startPolling();
+        });
+        // The trip clock ticks locally; the server only pushes trip_start
+        clockId = setInterval(() => { if (latest.trip_start) render(); }, 1000);
+
+        return () => {
+            unsubscribe();
+            clearInterval(clockId);
+            polling = false;
+        };
+    }, [isSystemActive]);
 
     const handleEndTrip = async () => {
         await logout();
@@ -77,18 +112,18 @@ const Dashboard = () => {
     };
 
     const handleToggleMusic = async () => {
-        try { await fetch('http://127.0.0.1:5002/api/system/music/toggle', { method: 'POST' }); }
+        try { await fetch('http://127.0.0.1:5000/api/system/music/toggle', { method: 'POST' }); }
         catch (error) { console.error("Toggle error:", error); }
     };
 
     const handleNextMusic = async () => {
-        try { await fetch('http://127.0.0.1:5002/api/system/music/next', { method: 'POST' }); }
+        try { await fetch('http://127.0.0.1:5000/api/system/music/next', { method: 'POST' }); }
         catch (error) { console.error("Next track error:", error); }
     };
 
 
     const handleCancelEmergency = async () => {
-        try { await fetch('http://127.0.0.1:5002/api/system/emergency/cancel', { method: 'POST' }); }
+        try { await fetch('http://127.0.0.1:5000/api/system/emergency/cancel', { method: 'POST' }); }
         catch (error) { console.error("Cancel error:", error); }
     };
 
@@ -1,7 +1,7 @@
 import React, { useState, useRef } from 'react'; // FIX 1: Removed unused useEffect
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { authAPI } from '../services/api';
+import { authAPI, SCAN_STREAM_URL } from '../services/api';
 import NeonButton from '../components/NeonButton';
 import BackgroundWrapper from '../components/BackgroundWrapper';
 
@@ -153,7 +153,7 @@ const Settings = () => {
                         <div className="bg-black/50 p-6 rounded-2xl text-center border border-cyan-500/50">
                             <div className="text-4xl animate-pulse mb-2">📸</div>
                             <p className="text-cyan-300 font-mono font-bold tracking-widest">{scanStatus}</p>
-                            <img src="http://localhost:5000/video-feed" alt="Scan Stream" className="mt-4 rounded-xl border border-white/10 w-full object-cover" />
+                            <img src={SCAN_STREAM_URL} alt="Scan Stream" className="mt-4 rounded-xl border border-white/10 w-full object-cover" />
                         </div>
                     ) : (
                         <button
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
-import { authAPI } from '../../services/api';
+import { authAPI, SCAN_STREAM_URL } from '../../services/api';
 import NeonButton from "../../components/NeonButton";
 import AnimatedTextLink from "../../components/AnimatedTextLink";
 import BackgroundWrapper from "../../components/BackgroundWrapper";
@@ -18,29 +18,34 @@ const FaceLogin = () => {
 
     // Refs for intervals, strict mode protection, and camera cache-busting
     const pollIntervalRef = useRef(null);
+    const streamCloseRef = useRef(null);
     const scanStartedRef = useRef(false);
 
     // Lazy initialization for the cache-buster to satisfy React purity rules
     const [streamKey] = useState(() => Date.now());
 
     // 1. Define functions FIRST
+    // Shows a status update; returns true once the scan has an outcome
+    const handleScanUpdate = (update) => {
+        setScanState({ status: update.status, message: update.message });
+
+        if (update.status === 'success') {
+            setTimeout(() => {
+                login(update.driver);
+                navigate('/dashboard');
+            }, 1500);
+            return true;
+        }
+        return update.status === 'failed' || update.status === 'error';
+    };
+
     const pollScanStatus = (sessionId) => {
         pollIntervalRef.current = setInterval(async () => {
             try {
                 const response = await authAPI.checkFaceStatus(sessionId);
 
-                if (response.success) {
-                    setScanState({ status: response.status, message: response.message });
-
-                    if (response.status === 'success') {
-                        clearInterval(pollIntervalRef.current);
-                        setTimeout(() => {
-                            login(response.driver);
-                            navigate('/dashboard');
-                        }, 1500);
-                    } else if (response.status === 'failed' || response.status === 'error') {
-                        clearInterval(pollIntervalRef.current);
-                    }
+                if (response.success && handleScanUpdate(response)) {
+                    clearInterval(pollIntervalRef.current);
                 }
             } catch (error) {
                 // Log the error so ESLint knows it is being used
@@ -51,11 +56,25 @@ const FaceLogin = () => {
         }, 1000);
     };
 
+    // Status is pushed by the server; falls back to polling if the stream fails
+    const watchScanStatus = (sessionId) => {
+        let latest = {};
+        let finished = false;
+        streamCloseRef.current = authAPI.watchFaceStatus(sessionId, (changes) => {
+            latest = { ...latest, ...changes };
+            finished = handleScanUpdate(latest);
+        }, (error) => {
+            if (finished) return; // server closes the stream after the outcome
+            console.warn("Scan stream unavailable, polling instead:", error);
+            pollScanStatus(sessionId);
+        });
+    };
+
     const startScan = async () => {
         try {
             const response = await authAPI.startFaceScan();
             if (response.success) {
-                pollScanStatus(response.session_id);
+                watchScanStatus(response.session_id);
             } else {
                 setScanState({ status: 'error', message: response.error || 'Failed to start scanner.' });
             }
@@ -80,6 +99,7 @@ const FaceLogin = () => {
 
         return () => {
             if (pollIntervalRef.current) clearInterval(pollIntervalRef.current);
+            if (streamCloseRef.current) streamCloseRef.current();
         };
     }, []); // eslint-disable-line react-hooks/exhaustive-deps
 
@@ -121,7 +141,7 @@ const FaceLogin = () => {
                     scanState.status === 'success' ? 'border-green-500 shadow-[0_0_50px_rgba(34,197,94,0.4)]' : 'border-cyan-500 shadow-[0_0_30px_rgba(6,182,212,0.3)]'
                 }`}>
                     <img
-                        src={`http://localhost:5000/video-feed?t=${streamKey}`}
+                        src={`${SCAN_STREAM_URL}?t=${streamKey}`}
                         alt="Face Scan Stream"
                         className="w-full h-full object-cover"
                     />
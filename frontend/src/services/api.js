@@ -1,11 +1,28 @@
 // src/services/api.js
 
-// Backend URLs
-// Port 5000: Handles Registration, Face Scanning, and Auth Fallbacks
-const AUTH_URL = 'http://localhost:5000/api';
+// Backend URL: one server (backend/server.py) on port 5000 handles
+// registration, face scanning, auth, the AI dashboard loop and telemetry
+const SERVER_URL = 'http://localhost:5000';
+const AUTH_URL = `${SERVER_URL}/api`;
+const SYSTEM_URL = `${SERVER_URL}/api`;
 
-// Port 5002: Handles the active AI Dashboard loop and telemetry
-const SYSTEM_URL = 'http://localhost:5002/api';
+// Opens a server-sent event stream. The server sends the full state first
+// ('snapshot' event), then only the fields that changed. Returns a close function.
+const subscribe = (url, onData, onError) => {
+    if (typeof EventSource === 'undefined') {
+        onError(new Error('EventSource not supported'));
+        return () => {};
+    }
+    const source = new EventSource(url);
+    const handle = (event) => onData(JSON.parse(event.data));
+    source.addEventListener('snapshot', handle);
+    source.onmessage = handle;
+    source.onerror = (error) => {
+        source.close();
+        onError(error);
+    };
+    return () => source.close();
+};
 
 // ==========================================
 // AUTHENTICATION API (Talks to api_server.py)
@@ -21,6 +38,10 @@ export const authAPI = {
         const res = await fetch(`${AUTH_URL}/auth/face/status/${sessionId}`);
         return res.json();
     },
+    // Pushes scan status changes as they happen (onData gets the changed fields)
+    watchFaceStatus: (sessionId, onData, onError) => {
+        return subscribe(`${AUTH_URL}/auth/face/events/${sessionId}`, onData, onError);
+    },
 
     // Update Contacts for Private Drivers
     updateContacts: async (driver_id, trusted_contacts) => {
@@ -85,10 +106,29 @@ export const systemAPI = {
         const res = await fetch(`${SYSTEM_URL}/system/stop`, { method: 'POST' });
         return res.json();
     },
-    // Polls the live telemetry data (EAR, Distraction, Weather, Traffic)
-    getDashboardStatus: async () => {
-        const res = await fetch(`${SYSTEM_URL}/dashboard/status`);
+    // Polls the live telemetry data (EAR, Distraction, Weather, Traffic).
+    // With `wait` the server holds the request until something changes; 'no-cache'
+    // makes the browser revalidate with the ETag, so unchanged state is a 304.
+    getDashboardStatus: async (wait = 0) => {
+        const query = wait ? `?wait=${wait}` : '';
+        const res = await fetch(`${SYSTEM_URL}/dashboard/status${query}`, { cache: 'no-cache' });
+        if (res.status === 503) {
+            // Server is shedding load: tell the caller how long to back off
+            const error = new Error('Server busy');
+            error.retryAfter = Number(res.headers.get('Retry-After')) || 5;
+            throw error;
+        }
         return res.json();
+    },
+    // Recent EAR, MAR, yaw, pitch, fatigue and phone confidence, downsampled for charts:
+    // { signals: { ear: { t: [...epoch s], v: [...] }, ... } }
+    getSignals: async (window = '300s', points = 200) => {
+        const res = await fetch(`${SYSTEM_URL}/signals?window=${window}&points=${points}`);
+        return res.json();
+    },
+    // Pushes dashboard changes as they happen (onData gets the changed fields)
+    subscribeDashboard: (onData, onError) => {
+        return subscribe(`${SYSTEM_URL}/dashboard/events`, onData, onError);
     }
 };
 
@@ -105,4 +145,6 @@ export const externalAPI = {
     }
 };
  // Helper for the MJPEG video stream URL so we don't hardcode it in components
-export const VIDEO_STREAM_URL = 'http://localhost:5002/video-feed';
\ No newline at end of file
+export const VIDEO_STREAM_URL = `${SERVER_URL}/video-feed`;
+// Face-scan preview (login / face update)
+export const SCAN_STREAM_URL = `${AUTH_URL}/auth/face/video-feed`;
\ No newline at end of file